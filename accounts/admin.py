@@ -104,9 +104,15 @@ class CompanyProfileAdmin(admin.ModelAdmin):
     @admin.action(description="Suspend selected companies")
     def suspend_companies(self, request, queryset):
         from internships.models import Job, Internship
-        company_users = queryset.values_list('user', flat=True)
-        Job.objects.filter(company__in=company_users, status='open').update(status='closed')
-        Internship.objects.filter(company__in=company_users, status='open').update(status='closed')
+        from internships.signals import postings_closed
+        company_users = list(queryset.values_list('user', flat=True))
+        job_ids = list(Job.objects.filter(company__in=company_users, status='open').values_list('id', flat=True))
+        internship_ids = list(Internship.objects.filter(company__in=company_users, status='open').values_list('id', flat=True))
+        Job.objects.filter(id__in=job_ids).update(status='closed')
+        Internship.objects.filter(id__in=internship_ids).update(status='closed')
+        # update() bypasses post_save, so refresh search, recommendations and stats here
+        postings_closed('job', job_ids)
+        postings_closed('internship', internship_ids)
         updated = queryset.update(approval_status='suspended')
         self.message_user(request, f"{updated} company/companies suspended. All their open posts have been closed.")
 
@@ -21,6 +21,7 @@ urlpatterns = [
 
     # Admin dashboard
     path("admin-dashboard/", views.admin_dashboard, name="admin_dashboard"),
+    path("admin-dashboard/history/", views.admin_metrics_history, name="admin_metrics_history"),
 
     # Social login
     path("select-role/", social_views.select_role, name="select_role"),
@@ -1,5 +1,5 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import Http404
+from django.http import Http404, JsonResponse
 from django.core.exceptions import PermissionDenied
 from django.contrib.auth import login, authenticate, logout
 from django.contrib import messages
@@ -187,8 +187,8 @@ def dashboard(request):
         
         # Advanced search features
         saved_searches_count = SavedSearch.objects.filter(user=user).count()
-        from internships.search import get_recommended_jobs
-        recommended_jobs_list = get_recommended_jobs(user, limit=5)
+        from internships.recommendations import get_recommendations
+        recommended_jobs_list = get_recommendations(user, limit=5)
         recommended_count = len(recommended_jobs_list)
         
         # New features: notifications, resumes, assessments, unread chats
@@ -246,7 +246,8 @@ def dashboard(request):
         if profile.completeness_score != old_score:
             profile.save(update_fields=['completeness_score'])
         
-        from internships.models import Internship, Application, Job, JobApplication, JobView
+        from internships.models import Internship, Application, Job, JobApplication
+        from internships.company_stats import get_company_stats
         from django.db.models import Count, Q
         
         # Get company's internships with application counts and status breakdown
@@ -266,42 +267,8 @@ def dashboard(request):
             interview_count=Count('job_applications', filter=Q(job_applications__status='interview')),
         ).order_by('-created_at')
         
-        # Calculate stats
-        total_internship_posts = my_internships.count()
-        total_job_posts = my_jobs.count()
-        total_posts = total_internship_posts + total_job_posts
-        active_posts = my_internships.filter(status='open').count() + my_jobs.filter(status='open').count()
-        
-        # Total applications across all postings
-        internship_applications = Application.objects.filter(internship__company=user).count()
-        job_applications = JobApplication.objects.filter(job__company=user).count()
-        total_applications = internship_applications + job_applications
-        
-        # Application status counts across all postings
-        pending_applications = Application.objects.filter(
-            internship__company=user, status='pending'
-        ).count() + JobApplication.objects.filter(
-            job__company=user, status='pending'
-        ).count()
-        
-        accepted_applications = Application.objects.filter(
-            internship__company=user, status='accepted'
-        ).count() + JobApplication.objects.filter(
-            job__company=user, status='accepted'
-        ).count()
-        
-        rejected_applications = Application.objects.filter(
-            internship__company=user, status='rejected'
-        ).count() + JobApplication.objects.filter(
-            job__company=user, status='rejected'
-        ).count()
-        
-        interview_applications = JobApplication.objects.filter(
-            job__company=user, status='interview'
-        ).count()
-        
-        # Total views
-        total_views = JobView.objects.filter(job__company=user).count()
+        # Post, application and view totals from the company's counters row
+        stats = get_company_stats(user)
         
         # Recent internship applications
         recent_internship_apps = Application.objects.filter(
@@ -327,16 +294,16 @@ def dashboard(request):
             'profile': profile,
             'my_internships': my_internships[:5],
             'my_jobs': my_jobs[:5],
-            'total_posts': total_posts,
-            'total_internship_posts': total_internship_posts,
-            'total_job_posts': total_job_posts,
-            'active_posts': active_posts,
-            'total_applications': total_applications,
-            'pending_applications': pending_applications,
-            'accepted_applications': accepted_applications,
-            'rejected_applications': rejected_applications,
-            'interview_applications': interview_applications,
-            'total_views': total_views,
+            'total_posts': stats.total_posts,
+            'total_internship_posts': stats.internship_posts,
+            'total_job_posts': stats.job_posts,
+            'active_posts': stats.active_posts,
+            'total_applications': stats.total_applications,
+            'pending_applications': stats.pending_applications,
+            'accepted_applications': stats.accepted_applications,
+            'rejected_applications': stats.rejected_applications,
+            'interview_applications': stats.interview_applications,
+            'total_views': stats.total_views,
             'recent_internship_apps': recent_internship_apps,
             'recent_job_apps': recent_job_apps,
             'unread_notifications': unread_notifications,
@@ -569,24 +536,11 @@ def admin_dashboard(request):
         raise PermissionDenied("Only administrators can access this page.")
 
     from internships.models import Job, Internship, JobApplication, Application
-    from .models import CustomUser, CompanyProfile
-    from django.db.models import Count
-
-    # Summary statistics
-    total_users = CustomUser.objects.filter(user_type='user').count()
-    total_companies = CustomUser.objects.filter(user_type='company').count()
-    total_jobs = Job.objects.count()
-    total_internships = Internship.objects.count()
-    total_job_applications = JobApplication.objects.count()
-    total_internship_applications = Application.objects.count()
-    total_applications = total_job_applications + total_internship_applications
+    from internships.platform_metrics import get_metrics, metrics_history
 
-    # Active/Open counts
-    active_jobs = Job.objects.filter(status='open').count()
-    active_internships = Internship.objects.filter(status='open').count()
-
-    # Pending company approvals
-    pending_companies = CompanyProfile.objects.filter(approval_status='pending').count()
+    # Summary statistics, status breakdowns and jobs per month (cached snapshot)
+    metrics = get_metrics(refresh=request.GET.get('refresh') == '1')
+    total_applications = metrics['total_job_applications'] + metrics['total_internship_applications']
 
     # Recent 5 job posts
     recent_jobs = Job.objects.select_related(
@@ -608,46 +562,30 @@ def admin_dashboard(request):
         'internship', 'applicant'
     ).order_by('-applied_at')[:5]
 
-    # Graph-ready data: applications per status (for future charts)
-    job_apps_by_status = dict(
-        JobApplication.objects.values_list('status').annotate(count=Count('id')).order_by('status')
-    )
-    intern_apps_by_status = dict(
-        Application.objects.values_list('status').annotate(count=Count('id')).order_by('status')
-    )
-
-    # Graph-ready data: jobs posted per month (last 6 months)
-    from django.db.models.functions import TruncMonth
-    from django.utils import timezone
-    from datetime import timedelta
-
-    six_months_ago = timezone.now() - timedelta(days=180)
-    jobs_per_month = list(
-        Job.objects.filter(created_at__gte=six_months_ago)
-        .annotate(month=TruncMonth('created_at'))
-        .values('month')
-        .annotate(count=Count('id'))
-        .order_by('month')
-    )
-
     context = {
-        'total_users': total_users,
-        'total_companies': total_companies,
-        'total_jobs': total_jobs,
-        'total_internships': total_internships,
+        **metrics,
         'total_applications': total_applications,
-        'total_job_applications': total_job_applications,
-        'total_internship_applications': total_internship_applications,
-        'active_jobs': active_jobs,
-        'active_internships': active_internships,
-        'pending_companies': pending_companies,
         'recent_jobs': recent_jobs,
         'recent_internships': recent_internships,
         'recent_job_apps': recent_job_apps,
         'recent_intern_apps': recent_intern_apps,
-        'job_apps_by_status': job_apps_by_status,
-        'intern_apps_by_status': intern_apps_by_status,
-        'jobs_per_month': jobs_per_month,
+        'metrics_history': metrics_history(days=30),
     }
 
     return render(request, 'accounts/admin_dashboard.html', context)
+
+
+@login_required
+def admin_metrics_history(request):
+    """Daily platform metrics snapshots as chart-ready JSON - staff only"""
+    if not request.user.is_staff:
+        raise PermissionDenied("Only administrators can access this page.")
+
+    from internships.platform_metrics import history_series, metrics_history
+
+    try:
+        days = min(max(int(request.GET.get('days', 30)), 1), 365)
+    except ValueError:
+        days = 30
+    return JsonResponse(history_series(metrics_history(days=days)))
+
@@ -1,20 +1,23 @@
 import json
-from channels.generic.websocket import AsyncWebSocketConsumer
+from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 
+from .message_buffer import abuffer_message, aflush_room, flush_room, parse_client_id
+from .participants import ais_participant
+from .updates import room_group
 
-class ChatConsumer(AsyncWebSocketConsumer):
+
+class ChatConsumer(AsyncWebsocketConsumer):
     async def connect(self):
-        self.room_id = self.scope['url_route']['kwargs']['room_id']
-        self.room_group_name = f'chat_{self.room_id}'
+        self.room_id = int(self.scope['url_route']['kwargs']['room_id'])
+        self.room_group_name = room_group(self.room_id)
         user = self.scope['user']
 
         if user.is_anonymous:
             await self.close()
             return
 
-        is_participant = await self.check_participant(user, self.room_id)
-        if not is_participant:
+        if not await ais_participant(self.room_id, user):
             await self.close()
             return
 
@@ -23,16 +26,20 @@ class ChatConsumer(AsyncWebSocketConsumer):
 
     async def disconnect(self, close_code):
         await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
+        await aflush_room(self.room_id)
 
     async def receive(self, text_data):
         data = json.loads(text_data)
         message_type = data.get('type', 'chat_message')
 
         if message_type == 'chat_message':
-            message = await self.save_message(
-                self.scope['user'],
+            # Broadcast now; the write-behind buffer stores it within CHAT_MESSAGE_FLUSH_MS
+            client_id = parse_client_id(data.get('client_id'))
+            created_at = await abuffer_message(
                 self.room_id,
+                self.scope['user'].id,
                 data['message'],
+                client_id,
             )
             await self.channel_layer.group_send(
                 self.room_group_name,
@@ -41,8 +48,8 @@ class ChatConsumer(AsyncWebSocketConsumer):
                     'message': data['message'],
                     'sender_id': self.scope['user'].id,
                     'sender_name': self.scope['user'].username,
-                    'timestamp': message.created_at.isoformat(),
-                    'message_id': message.id,
+                    'timestamp': created_at.isoformat(),
+                    'client_id': str(client_id),
                 },
             )
         elif message_type == 'typing':
@@ -71,7 +78,13 @@ class ChatConsumer(AsyncWebSocketConsumer):
             'sender_id': event['sender_id'],
             'sender_name': event['sender_name'],
             'timestamp': event['timestamp'],
-            'message_id': event['message_id'],
+            'client_id': event['client_id'],
+        }))
+
+    async def message_stored(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'message_stored',
+            'ids': event['ids'],
         }))
 
     async def typing_indicator(self, event):
@@ -87,26 +100,10 @@ class ChatConsumer(AsyncWebSocketConsumer):
             'reader_id': event['reader_id'],
         }))
 
-    @database_sync_to_async
-    def check_participant(self, user, room_id):
-        from .models import ChatRoom
-        try:
-            room = ChatRoom.objects.select_related(
-                'application__applicant', 'application__job__company',
-            ).get(id=room_id)
-            return user in [room.application.applicant, room.application.job.company]
-        except ChatRoom.DoesNotExist:
-            return False
-
-    @database_sync_to_async
-    def save_message(self, user, room_id, content):
-        from .models import ChatRoom, Message
-        room = ChatRoom.objects.get(id=room_id)
-        return Message.objects.create(room=room, sender=user, content=content)
-
     @database_sync_to_async
     def mark_messages_read(self, user, room_id):
         from .models import Message
+        flush_room(room_id)
         Message.objects.filter(
             room_id=room_id, is_read=False,
         ).exclude(sender=user).update(is_read=True)
@@ -0,0 +1,276 @@
+"""
+Database-backed channel layer for running several ASGI worker processes
+on one host without Redis.
+
+Each process names its channels ``specific.<process id>!<token>``.
+Messages for channels of the same process are delivered in memory; the
+rest go through the ChannelLayerMessage table. Sends and group sends are
+collected for ``batch_interval`` seconds and written with one membership
+lookup and one bulk insert, as one row per receiving process, so a
+group_send to a room whose members sit on three workers costs at most
+three rows however many sockets listen. Each process polls for its rows
+every ``poll_interval`` seconds (one indexed query) and fans group
+messages out to its local members.
+
+Backpressure: a local channel holds at most ``capacity`` messages
+(send() raises ChannelFull and group sends drop, as with the Redis
+layer), and once ``max_pending`` messages wait to be written the sender
+awaits the write instead of buffering more.
+"""
+
+import asyncio
+import logging
+import secrets
+import time
+from copy import deepcopy
+from datetime import timedelta
+
+from channels.db import database_sync_to_async
+from channels.exceptions import ChannelFull
+from channels.layers import BaseChannelLayer
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+FETCH_BATCH = 100
+CLEANUP_INTERVAL = 30
+
+
+def _running(task):
+    """Whether an asyncio task is still pending on the current event loop."""
+    return task is not None and not task.done() and task.get_loop() is asyncio.get_running_loop()
+
+
+class DatabaseChannelLayer(BaseChannelLayer):
+    """Channel layer shared by worker processes through the database"""
+
+    extensions = ('groups', 'flush')
+
+    def __init__(
+        self,
+        expiry=60,
+        group_expiry=86400,
+        capacity=100,
+        channel_capacity=None,
+        poll_interval=0.05,
+        batch_interval=0.005,
+        max_pending=1000,
+        **kwargs,
+    ):
+        super().__init__(expiry=expiry, capacity=capacity, **kwargs)
+        self.channel_capacity = self.compile_capacities(channel_capacity or {})
+        self.group_expiry = group_expiry
+        self.poll_interval = poll_interval
+        self.batch_interval = batch_interval
+        self.max_pending = max_pending
+        self.process_id = secrets.token_hex(6)
+        self.channels = {}  # local channel -> asyncio.Queue
+        self.groups = {}  # group -> local channels in it
+        self.receivers = set()  # process prefixes (and general channels) polled by this process
+        self.outbox = []  # [channel, group, message] entries waiting to be written
+        self._flush_task = None
+        self._poll_task = None
+        self._cleaned_at = 0
+
+    # ==================== LOCAL DELIVERY ====================
+
+    def _is_local(self, channel):
+        return self.non_local_name(channel) in self.receivers
+
+    def _queue(self, channel):
+        queue = self.channels.get(channel)
+        if queue is None:
+            queue = self.channels[channel] = asyncio.Queue(maxsize=self.get_capacity(channel))
+        return queue
+
+    def _deliver(self, channel, message):
+        """Put a message on a local channel; False if the channel is full."""
+        try:
+            self._queue(channel).put_nowait(deepcopy(message))
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    # ==================== CHANNEL API ====================
+
+    async def send(self, channel, message):
+        assert isinstance(message, dict), 'message is not a dict'
+        assert self.valid_channel_name(channel), 'Channel name not valid'
+        if self._is_local(channel):
+            if not self._deliver(channel, message):
+                raise ChannelFull(channel)
+            return
+        await self._enqueue([channel, '', message])
+
+    async def receive(self, channel):
+        assert self.valid_channel_name(channel), 'Channel name not valid'
+        self.receivers.add(self.non_local_name(channel))
+        queue = self._queue(channel)
+        self._start_polling()
+        try:
+            return await queue.get()
+        finally:
+            if queue.empty():
+                self.channels.pop(channel, None)
+
+    async def new_channel(self, prefix='specific.'):
+        process = f'{prefix}{self.process_id}!'
+        self.receivers.add(process)
+        return f'{process}{secrets.token_hex(6)}'
+
+    async def flush(self):
+        from .models import ChannelLayerGroup, ChannelLayerMessage
+
+        self.channels, self.groups, self.outbox = {}, {}, []
+
+        def delete_all():
+            ChannelLayerMessage.objects.all().delete()
+            ChannelLayerGroup.objects.all().delete()
+
+        await database_sync_to_async(delete_all)()
+
+    async def close(self):
+        for task in (self._flush_task, self._poll_task):
+            if _running(task):
+                task.cancel()
+        await self._flush_outbox()
+
+    # ==================== GROUPS ====================
+
+    async def group_add(self, group, channel):
+        assert self.valid_group_name(group), 'Group name not valid'
+        assert self.valid_channel_name(channel), 'Channel name not valid'
+        if self._is_local(channel):
+            self.groups.setdefault(group, set()).add(channel)
+        await database_sync_to_async(self._save_membership)(group, channel)
+
+    async def group_discard(self, group, channel):
+        assert self.valid_channel_name(channel), 'Invalid channel name'
+        assert self.valid_group_name(group), 'Invalid group name'
+        members = self.groups.get(group)
+        if members is not None:
+            members.discard(channel)
+            if not members:
+                self.groups.pop(group, None)
+        await database_sync_to_async(self._delete_membership)(group, channel)
+
+    async def group_send(self, group, message):
+        assert isinstance(message, dict), 'Message is not a dict'
+        assert self.valid_group_name(group), 'Invalid group name'
+        for channel in list(self.groups.get(group, ())):
+            self._deliver(channel, message)  # a full channel misses the message
+        await self._enqueue([None, group, message])
+
+    def _save_membership(self, group, channel):
+        from .models import ChannelLayerGroup
+
+        ChannelLayerGroup.objects.update_or_create(
+            group=group,
+            channel=channel,
+            defaults={
+                'process': self.non_local_name(channel),
+                'expires_at': timezone.now() + timedelta(seconds=self.group_expiry),
+            },
+        )
+
+    def _delete_membership(self, group, channel):
+        from .models import ChannelLayerGroup
+
+        ChannelLayerGroup.objects.filter(group=group, channel=channel).delete()
+
+    # ==================== OUTGOING ====================
+
+    async def _enqueue(self, entry):
+        self.outbox.append(entry)
+        if len(self.outbox) >= self.max_pending:
+            await self._flush_outbox()  # backpressure: the sender waits for the write
+        elif not _running(self._flush_task):
+            self._flush_task = asyncio.ensure_future(self._flush_soon())
+
+    async def _flush_soon(self):
+        try:
+            await asyncio.sleep(self.batch_interval)
+        finally:
+            # Also when cancelled, e.g. as async_to_sync() closes its event loop after a send from sync code
+            try:
+                await self._flush_outbox()
+            except Exception:
+                logger.exception('Channel layer write failed')
+
+    async def _flush_outbox(self):
+        entries, self.outbox = self.outbox, []
+        if entries:
+            await database_sync_to_async(self._write)(entries)
+
+    def _write(self, entries):
+        """One membership lookup and one bulk insert (a row per receiving process) for a batch."""
+        from .models import ChannelLayerGroup, ChannelLayerMessage
+
+        now = timezone.now()
+        groups = {group for _channel, group, _message in entries if group}
+        processes = {}
+        if groups:
+            for group, process in (
+                ChannelLayerGroup.objects.filter(group__in=groups, expires_at__gt=now)
+                .exclude(process__in=self.receivers)
+                .values_list('group', 'process')
+                .distinct()
+            ):
+                processes.setdefault(group, []).append(process)
+
+        batches = {}
+        for channel, group, message in entries:
+            targets = processes.get(group, ()) if group else [self.non_local_name(channel)]
+            for process in targets:
+                batches.setdefault(process, []).append([channel, group, message])
+        ChannelLayerMessage.objects.bulk_create(
+            [
+                ChannelLayerMessage(process=process, payload=payload, expires_at=now + timedelta(seconds=self.expiry))
+                for process, payload in batches.items()
+            ]
+        )
+
+    # ==================== INCOMING ====================
+
+    def _start_polling(self):
+        if not _running(self._poll_task):
+            self._poll_task = asyncio.ensure_future(self._poll())
+
+    async def _poll(self):
+        while self.channels or self.groups:
+            try:
+                entries, more = await database_sync_to_async(self._fetch)()
+            except Exception:
+                logger.exception('Channel layer poll failed')
+                entries, more = [], False
+            for channel, group, message in entries:
+                if group:
+                    for member in list(self.groups.get(group, ())):
+                        self._deliver(member, message)
+                elif not self._deliver(channel, message):
+                    logger.warning(f'Channel {channel} is full; dropped a message')
+            if not more:
+                await asyncio.sleep(self.poll_interval)
+
+    def _fetch(self):
+        """Claim this process's pending rows, oldest first. Returns (entries, more rows waiting)."""
+        from .models import ChannelLayerGroup, ChannelLayerMessage
+
+        now = timezone.now()
+        if time.monotonic() - self._cleaned_at > CLEANUP_INTERVAL:
+            self._cleaned_at = time.monotonic()
+            ChannelLayerMessage.objects.filter(expires_at__lt=now).delete()
+            ChannelLayerGroup.objects.filter(expires_at__lt=now).delete()
+
+        rows = list(
+            ChannelLayerMessage.objects.filter(process__in=self.receivers, expires_at__gte=now)
+            .order_by('pk')
+            .values_list('pk', 'process', 'payload')[:FETCH_BATCH]
+        )
+        ChannelLayerMessage.objects.filter(pk__in=[pk for pk, process, _ in rows if '!' in process]).delete()
+        entries = []
+        for pk, process, payload in rows:
+            # A general channel can be read by several processes: only the one whose delete wins delivers
+            if '!' in process or ChannelLayerMessage.objects.filter(pk=pk).delete()[0]:
+                entries.extend(payload)
+        return entries, len(rows) == FETCH_BATCH
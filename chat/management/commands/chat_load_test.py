@@ -0,0 +1,253 @@
+"""
+Load test for the chat websocket.
+
+Opens many simulated clients against ``ws/chat/<room_id>/`` on a running
+ASGI server (e.g. several daphne/uvicorn workers sharing the database
+channel layer), lets a few of them send messages and measures how many
+broadcasts reach every client and how fast. Clients authenticate as the
+room's two participants through sessions created here, so the server
+must use the same database. Raise the open-file limit (``ulimit -n``)
+before opening thousands of clients.
+"""
+
+import asyncio
+import base64
+import json
+import os
+import struct
+import time
+from importlib import import_module
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.management.base import BaseCommand, CommandError
+
+from chat.models import ChatRoom, Message
+
+MARKER = '[load-test]'
+
+
+# ==================== MINIMAL WEBSOCKET CLIENT ====================
+
+
+async def ws_connect(url, cookie, timeout):
+    parts = urlsplit(url)
+    secure = parts.scheme == 'wss'
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(parts.hostname, parts.port or (443 if secure else 80), ssl=secure or None),
+        timeout,
+    )
+    key = base64.b64encode(os.urandom(16)).decode()
+    origin = f'{"https" if secure else "http"}://{parts.netloc}'
+    writer.write(
+        (
+            f'GET {parts.path or "/"} HTTP/1.1\r\nHost: {parts.netloc}\r\n'
+            f'Upgrade: websocket\r\nConnection: Upgrade\r\n'
+            f'Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n'
+            f'Origin: {origin}\r\nCookie: {cookie}\r\n\r\n'
+        ).encode()
+    )
+    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), timeout)
+    if not head.startswith(b'HTTP/1.1 101'):
+        writer.close()
+        raise ConnectionError(head.split(b'\r\n', 1)[0].decode(errors='replace'))
+    return reader, writer
+
+
+def encode_frame(payload, opcode=0x1):
+    """A masked client frame (text by default)."""
+    mask = os.urandom(4)
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('!BB', 0x80 | opcode, 0x80 | length)
+    elif length < 65536:
+        header = struct.pack('!BBH', 0x80 | opcode, 0x80 | 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 0x80 | 127, length)
+    return header + mask + bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+
+
+async def read_frame(reader):
+    """(opcode, payload) of the next frame."""
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        (length,) = struct.unpack('!H', await reader.readexactly(2))
+    elif length == 127:
+        (length,) = struct.unpack('!Q', await reader.readexactly(8))
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask:
+        payload = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+    return first & 0x0F, payload
+
+
+# ==================== LOAD TEST ====================
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def _session_cookie(user):
+    session = import_module(settings.SESSION_ENGINE).SessionStore()
+    session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    return session, f'{settings.SESSION_COOKIE_NAME}={session.session_key}'
+
+
+class LoadTest:
+    def __init__(self, url, cookies, options):
+        self.url = url
+        self.cookies = cookies
+        self.options = options
+        self.connected = 0
+        self.errors = {}
+        self.connect_times = []
+        self.latencies = []
+        self.sent = 0
+        self.start = None
+        self.stop = None
+
+    async def client(self, index, semaphore):
+        async with semaphore:
+            began = time.monotonic()
+            try:
+                reader, writer = await ws_connect(
+                    self.url, self.cookies[index % len(self.cookies)], self.options['timeout']
+                )
+            except (OSError, ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError) as exc:
+                error = f'{type(exc).__name__}: {exc}'[:120]
+                self.errors[error] = self.errors.get(error, 0) + 1
+                return
+            self.connect_times.append(time.monotonic() - began)
+            self.connected += 1
+
+        listener = asyncio.ensure_future(self.listen(reader, writer))
+        await self.start.wait()
+        if index < self.options['senders']:
+            for n in range(self.options['messages']):
+                text = f'{MARKER} {index} {n} {time.monotonic():.6f}'
+                writer.write(encode_frame(json.dumps({'type': 'chat_message', 'message': text}).encode()))
+                await writer.drain()
+                self.sent += 1
+                await asyncio.sleep(self.options['interval'])
+        await self.stop.wait()
+        listener.cancel()
+        try:
+            writer.write(encode_frame(struct.pack('!H', 1000), opcode=0x8))
+            await writer.drain()
+        except OSError:
+            pass
+        writer.close()
+
+    async def listen(self, reader, writer):
+        try:
+            while True:
+                opcode, payload = await read_frame(reader)
+                if opcode == 0x8:
+                    return
+                if opcode == 0x9:
+                    writer.write(encode_frame(payload, opcode=0xA))
+                    continue
+                if opcode != 0x1:
+                    continue
+                data = json.loads(payload)
+                message = data.get('message') or ''
+                if data.get('type') == 'chat_message' and message.startswith(MARKER):
+                    self.latencies.append(time.monotonic() - float(message.rsplit(' ', 1)[1]))
+        except (asyncio.IncompleteReadError, ConnectionError, OSError):
+            pass
+
+    async def run(self):
+        self.start, self.stop = asyncio.Event(), asyncio.Event()
+        semaphore = asyncio.Semaphore(self.options['connect_concurrency'])
+        clients = [asyncio.ensure_future(self.client(i, semaphore)) for i in range(self.options['clients'])]
+        while len(self.connect_times) + sum(self.errors.values()) < len(clients) and not all(c.done() for c in clients):
+            await asyncio.sleep(0.1)
+
+        began = time.monotonic()
+        self.start.set()
+        senders = min(self.options['senders'], self.connected)
+        expected = senders * self.options['messages'] * self.connected
+        deadline = None
+        while len(self.latencies) < expected:
+            if deadline is None and self.sent >= senders * self.options['messages']:
+                deadline = time.monotonic() + self.options['settle']
+            if deadline is not None and time.monotonic() > deadline:
+                break
+            await asyncio.sleep(0.05)
+        elapsed = time.monotonic() - began
+        self.stop.set()
+        await asyncio.gather(*clients, return_exceptions=True)
+        return expected, elapsed
+
+
+class Command(BaseCommand):
+    help = 'Open many simulated websocket clients against a chat room and measure broadcast delivery'
+
+    def add_arguments(self, parser):
+        parser.add_argument('room_id', type=int, help='Chat room to load')
+        parser.add_argument('--url', default='ws://127.0.0.1:8000', help='Base websocket URL of the ASGI server')
+        parser.add_argument('--clients', type=int, default=1000, help='Simulated websocket clients')
+        parser.add_argument('--senders', type=int, default=10, help='Clients that send messages')
+        parser.add_argument('--messages', type=int, default=5, help='Messages per sender')
+        parser.add_argument('--interval', type=float, default=0.1, help="Seconds between a sender's messages")
+        parser.add_argument('--connect-concurrency', type=int, default=100, help='Handshakes in flight at once')
+        parser.add_argument('--timeout', type=float, default=10.0, help='Connect/handshake timeout in seconds')
+        parser.add_argument(
+            '--settle', type=float, default=5.0, help='Seconds to wait for outstanding deliveries after the last send'
+        )
+        parser.add_argument('--keep-messages', action='store_true', help='Keep the load-test messages in the room')
+
+    def handle(self, *args, **options):
+        room = (
+            ChatRoom.objects.select_related('application__applicant', 'application__job__company')
+            .filter(pk=options['room_id'])
+            .first()
+        )
+        if room is None:
+            raise CommandError(f'Chat room {options["room_id"]} does not exist')
+
+        sessions, cookies = zip(*(_session_cookie(user) for user in room.get_participants()))
+        url = f'{options["url"].rstrip("/")}/ws/chat/{room.pk}/'
+        test = LoadTest(url, cookies, options)
+        self.stdout.write(f'Opening {options["clients"]} client(s) against {url}')
+        try:
+            expected, elapsed = asyncio.run(test.run())
+        finally:
+            for session in sessions:
+                session.delete()
+            if not options['keep_messages']:
+                # The servers store what they still buffer within CHAT_MESSAGE_FLUSH_MS (and as the
+                # clients disconnect); wait for that, or those messages would outlive the cleanup
+                time.sleep(2 * settings.CHAT_MESSAGE_FLUSH_MS / 1000)
+                Message.objects.filter(room=room, content__startswith=MARKER).delete()
+
+        self.stdout.write(
+            f'Connected: {test.connected}/{options["clients"]} '
+            f'(handshake p50 {_percentile(test.connect_times, 0.5) * 1000:.0f} ms, '
+            f'p95 {_percentile(test.connect_times, 0.95) * 1000:.0f} ms)'
+        )
+        for error, count in sorted(test.errors.items(), key=lambda item: -item[1])[:5]:
+            self.stdout.write(self.style.WARNING(f'  {count} x {error}'))
+        delivered = len(test.latencies)
+        self.stdout.write(
+            f'Sent {test.sent} message(s); delivered {delivered}/{expected} broadcast(s) in {elapsed:.1f} s '
+            f'({delivered / elapsed if elapsed else 0:.0f}/s)'
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                'Delivery latency: '
+                + ', '.join(
+                    f'{label} {_percentile(test.latencies, q) * 1000:.1f} ms'
+                    for label, q in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99), ('max', 1.0))
+                )
+            )
+        )
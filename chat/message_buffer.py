@@ -0,0 +1,171 @@
+"""
+Write-behind buffer for chat messages sent over the websocket.
+
+ChatConsumer broadcasts a message as soon as it arrives, identified by
+its client-assigned ``client_id``, after appending it to the room's
+buffer in this process's memory instead of inserting it, so receiving a
+message costs no database round trip. Each process writes a room's
+buffer with one bulk_create every CHAT_MESSAGE_FLUSH_MS milliseconds.
+Batches are taken and written under a per-room lock, so the messages a
+process handles are stored in the order it broadcast them.
+Message.client_id is unique, so a message re-sent after a reconnect is
+stored once.
+
+Once a flush has stored messages it sends the room a ``message_stored``
+event mapping their client ids to the stored ids, so websocket clients
+can advance the last id they sync from and waiting long-polls wake up
+(see chat.updates).
+
+A failed write puts its batch back at the front of the buffer and is
+retried on the next tick, and a consumer flushes the room when it
+disconnects. Messages still buffered when the process itself dies are
+lost: at most CHAT_MESSAGE_FLUSH_MS of traffic. Reads that must see
+every message (the chat page and the AJAX endpoints) flush this
+process's buffer of the room first.
+"""
+
+import asyncio
+import logging
+import threading
+import uuid
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from .updates import aannounce_stored, announce_stored
+
+logger = logging.getLogger(__name__)
+
+# room id -> [(client id, sender id, content, created_at)] waiting in this process, in broadcast order
+_buffers = {}
+_buffers_lock = threading.Lock()
+# room id -> lock held while a batch is taken and written, so batches are stored in order
+_write_locks = {}
+# room id -> this process's pending flush timer
+_flushers = {}
+
+
+def parse_client_id(value):
+    """The client's message id as a UUID, or a fresh one if it sent none (or garbage)."""
+    try:
+        return uuid.UUID(str(value))
+    except (TypeError, ValueError):
+        return uuid.uuid4()
+
+
+def buffer_message(room_id, sender_id, content, client_id):
+    """Append a message to this process's buffer of the room; returns its created_at."""
+    created_at = timezone.now()
+    with _buffers_lock:
+        _buffers.setdefault(room_id, []).append((str(client_id), sender_id, content, created_at))
+    return created_at
+
+
+def has_pending(room_id):
+    return bool(_buffers.get(room_id))
+
+
+def flush_room(room_id):
+    """
+    Insert this process's buffered messages of the room in broadcast
+    order with one bulk_create and announce them to the room. Returns
+    the number of messages written.
+    """
+    stored = flush_room_ids(room_id)
+    if stored:
+        announce_stored(room_id, stored)
+    return len(stored)
+
+
+def flush_room_ids(room_id):
+    """flush_room() without the announcement, returning {client_id: message id} of the messages it wrote."""
+    from .models import Message
+
+    client_ids = _flush(room_id)
+    if not client_ids:
+        return {}
+    return {
+        str(client_id): pk
+        for client_id, pk in Message.objects.filter(room_id=room_id, client_id__in=client_ids).values_list(
+            'client_id', 'pk'
+        )
+    }
+
+
+def _flush(room_id):
+    """flush_room(); returns the client ids of the messages written."""
+    from django.contrib.auth import get_user_model
+
+    from .models import ChatRoom, Message
+
+    if not has_pending(room_id):
+        return []
+    with _write_locks.setdefault(room_id, threading.Lock()):
+        with _buffers_lock:
+            events = _buffers.pop(room_id, [])
+        if not events:
+            return []  # written by the flush that held the lock
+        try:
+            if not ChatRoom.objects.filter(pk=room_id).exists():
+                return []
+            sender_ids = set(
+                get_user_model()
+                .objects.filter(pk__in={sender_id for _, sender_id, _, _ in events})
+                .values_list('pk', flat=True)
+            )
+            Message.objects.bulk_create(
+                [
+                    Message(
+                        room_id=room_id,
+                        sender_id=sender_id,
+                        content=content,
+                        client_id=client_id,
+                        created_at=created_at,
+                    )
+                    for client_id, sender_id, content, created_at in events
+                    if sender_id in sender_ids
+                ],
+                ignore_conflicts=True,
+            )
+        except Exception:
+            # Keep the batch ahead of anything buffered since, for the next flush
+            with _buffers_lock:
+                _buffers[room_id] = events + _buffers.get(room_id, [])
+            raise
+    return [client_id for client_id, sender_id, _, _ in events if sender_id in sender_ids]
+
+
+# ==================== CONSUMER SIDE ====================
+
+
+async def abuffer_message(room_id, sender_id, content, client_id):
+    """buffer_message() from a consumer; also arms this process's flush timer for the room."""
+    created_at = buffer_message(room_id, sender_id, content, client_id)
+    timer = _flushers.get(room_id)
+    if timer is None or timer.done() or timer.get_loop() is not asyncio.get_running_loop():
+        _flushers[room_id] = asyncio.ensure_future(_flush_later(room_id))
+    return created_at
+
+
+async def aflush_room(room_id):
+    """flush_room() from a consumer; then tells the room's sockets the ids the messages were stored under."""
+    if not has_pending(room_id):
+        return 0
+    stored = await database_sync_to_async(flush_room_ids)(room_id)
+    if stored:
+        await aannounce_stored(room_id, stored)
+    return len(stored)
+
+
+async def _flush_later(room_id):
+    try:
+        while has_pending(room_id):
+            await asyncio.sleep(settings.CHAT_MESSAGE_FLUSH_MS / 1000)
+            try:
+                await aflush_room(room_id)
+            except Exception:
+                logger.exception(f'Flushing chat room {room_id} failed; retrying')
+    finally:
+        if _flushers.get(room_id) is asyncio.current_task():
+            del _flushers[room_id]
@@ -1,5 +1,6 @@
-from django.db import models
 from django.conf import settings
+from django.db import models
+from django.utils import timezone
 
 
 class ChatRoom(models.Model):
@@ -49,7 +50,11 @@ class Message(models.Model):
     content = models.TextField()
     attachment = models.FileField(upload_to='chat_attachments/', blank=True, null=True)
     is_read = models.BooleanField(default=False)
-    created_at = models.DateTimeField(auto_now_add=True)
+    client_id = models.UUIDField(
+        null=True, blank=True, unique=True, editable=False,
+        help_text="Id assigned by the sending client; makes buffered and retried writes idempotent",
+    )
+    created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         ordering = ['created_at']
@@ -58,7 +63,45 @@ class Message(models.Model):
         indexes = [
             models.Index(fields=['room', 'is_read']),
             models.Index(fields=['room', 'created_at']),
+            models.Index(fields=['room', 'id']),
         ]
 
     def __str__(self):
         return f"{self.sender.username}: {self.content[:50]}"
+
+
+class ChannelLayerMessage(models.Model):
+    """Batch of channel layer messages in transit to one ASGI worker process (see chat.layers)"""
+    process = models.CharField(max_length=100, help_text="Receiving process prefix, or the channel name for a general channel")
+    payload = models.JSONField(default=list, help_text="[channel, group, message] entries, in send order")
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['process', 'id']),
+            models.Index(fields=['expires_at']),
+        ]
+        verbose_name = "Channel Layer Message"
+        verbose_name_plural = "Channel Layer Messages"
+
+    def __str__(self):
+        return f"{self.process} ({len(self.payload)} message(s))"
+
+
+class ChannelLayerGroup(models.Model):
+    """Membership of a channel in a channel layer group, shared by every ASGI worker process"""
+    group = models.CharField(max_length=100)
+    channel = models.CharField(max_length=100)
+    process = models.CharField(max_length=100)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('group', 'channel')
+        indexes = [
+            models.Index(fields=['group', 'expires_at']),
+        ]
+        verbose_name = "Channel Layer Group Membership"
+        verbose_name_plural = "Channel Layer Group Memberships"
+
+    def __str__(self):
+        return f"{self.group}: {self.channel}"
@@ -0,0 +1,71 @@
+"""
+Cached chat room authorization.
+
+Whether a user may use a room is decided on every websocket connect and
+every AJAX call (including the polling fallback). Instead of loading the
+room with its application, applicant and company each time, the ids of
+a room's two participants are cached as a small tuple, so authorization
+is one cache lookup and an integer comparison. The entry is dropped when
+the room or its application is saved or deleted (see chat.signals) and
+expires after PARTICIPANTS_TTL regardless.
+"""
+
+from channels.db import database_sync_to_async
+from django.core.cache import cache
+
+PARTICIPANTS_TTL = 60 * 60
+# Rooms that do not exist are remembered briefly, so bogus ids cost no query either
+MISSING_ROOM_TTL = 60
+
+# JobApplication fields whose change alters who takes part in its chat room
+PARTICIPANT_FIELDS = {'applicant', 'job'}
+
+
+def _key(room_id):
+    return f'chat_room:{room_id}:participants'
+
+
+def cached_participants(room_id):
+    """(applicant id, company id) of a room from the cache; () for a missing room, None if not cached."""
+    return cache.get(_key(room_id))
+
+
+def remember_participants(room_id, applicant_id, company_id):
+    cache.set(_key(room_id), (applicant_id, company_id), PARTICIPANTS_TTL)
+
+
+def room_participants(room_id):
+    """(applicant id, company id) of a room, or () if it does not exist; one query on a cache miss."""
+    from .models import ChatRoom
+
+    participants = cached_participants(room_id)
+    if participants is None:
+        participants = (
+            ChatRoom.objects.filter(pk=room_id)
+            .values_list(
+                'application__applicant_id',
+                'application__job__company_id',
+            )
+            .first()
+        )
+        if participants is None:
+            cache.set(_key(room_id), (), MISSING_ROOM_TTL)
+            return ()
+        remember_participants(room_id, *participants)
+    return participants
+
+
+def is_participant(room_id, user):
+    return user.is_authenticated and user.pk in room_participants(room_id)
+
+
+async def ais_participant(room_id, user):
+    """is_participant() for consumers and async views; only a cache miss hops to a thread."""
+    participants = cached_participants(room_id)
+    if participants is None:
+        participants = await database_sync_to_async(room_participants)(room_id)
+    return user.is_authenticated and user.pk in participants
+
+
+def forget_participants(room_ids):
+    cache.delete_many([_key(room_id) for room_id in room_ids])
@@ -0,0 +1,22 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from internships.models import JobApplication
+
+from .models import ChatRoom
+from .participants import PARTICIPANT_FIELDS, forget_participants
+
+
+@receiver(post_save, sender=ChatRoom)
+@receiver(post_delete, sender=ChatRoom)
+def drop_room_participants(sender, instance, **kwargs):
+    """Rooms are authorized from a cached participant map"""
+    forget_participants([instance.pk])
+
+
+@receiver(post_save, sender=JobApplication)
+def drop_application_room_participants(sender, instance, created=False, update_fields=None, **kwargs):
+    # Deleting an application deletes its room, which is handled above
+    if created or (update_fields is not None and not PARTICIPANT_FIELDS.intersection(update_fields)):
+        return
+    forget_participants(ChatRoom.objects.filter(application_id=instance.pk).values_list('pk', flat=True))
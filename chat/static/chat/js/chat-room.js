@@ -9,18 +9,18 @@
     const chatForm = document.getElementById('chatForm');
     const typingIndicator = document.getElementById('typingIndicator');
     const fileInput = document.getElementById('fileInput');
+    const loadOlderWrap = document.getElementById('loadOlder');
 
     let ws = null;
     let wsConnected = false;
     let typingTimeout = null;
-    let pollInterval = null;
-    let lastTimestamp = null;
-
-    // Track the latest timestamp from existing messages
-    const existingMsgs = document.querySelectorAll('[data-message-id]');
-    if (existingMsgs.length > 0) {
-        // We'll get the timestamp from polling
-    }
+    let polling = null;        // AbortController of the pending long-poll request
+    let roomVersion = null;
+    // Newest and oldest stored message ids this page holds; syncs ask only for what lies beyond them
+    let lastId = parseInt(configEl.dataset.lastMessageId) || 0;
+    let oldestId = parseInt(configEl.dataset.oldestMessageId) || 0;
+    // Stored ids of websocket messages whose broadcast has not arrived yet, by client id
+    const storedIds = {};
 
     function scrollToBottom() {
         messagesContainer.scrollTop = messagesContainer.scrollHeight;
@@ -33,22 +33,32 @@
         return div.innerHTML;
     }
 
+    // Id the server stores the message under, so retries and echoes are recognised
+    function newClientId() {
+        if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+        return 'xxxxxxxx-xxxx-4xxx-yxxx-xxxxxxxxxxxx'.replace(/[xy]/g, c => {
+            const r = Math.random() * 16 | 0;
+            return (c === 'x' ? r : (r & 0x3 | 0x8)).toString(16);
+        });
+    }
+
+    function isShown(data) {
+        if (data.client_id && document.querySelector(`[data-client-id="${data.client_id}"]`)) return true;
+        const id = data.message_id || data.id;
+        return Boolean(id) && Boolean(document.querySelector(`[data-message-id="${id}"]`));
+    }
+
     function formatTime(isoString) {
         const d = new Date(isoString);
         return d.toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' });
     }
 
-    function appendMessage(data) {
+    function buildMessage(data) {
         const isMe = data.sender_id === currentUserId;
-        const container = messagesContainer.querySelector('.max-w-5xl');
-
-        // Remove empty state if present
-        const emptyState = container.querySelector('.text-center.text-gray-500');
-        if (emptyState) emptyState.remove();
-
         const wrapper = document.createElement('div');
         wrapper.className = `flex ${isMe ? 'justify-end' : 'justify-start'}`;
         wrapper.setAttribute('data-message-id', data.message_id || data.id || '');
+        if (data.client_id) wrapper.setAttribute('data-client-id', data.client_id);
 
         let attachmentHtml = '';
         if (data.attachment) {
@@ -75,13 +85,93 @@
                     ${checkHtml}
                 </div>
             </div>`;
+        return wrapper;
+    }
+
+    function appendMessage(data) {
+        if (isShown(data)) return;
+        const container = messagesContainer.querySelector('.max-w-5xl');
+
+        // Remove empty state if present
+        const emptyState = container.querySelector('.text-center.text-gray-500');
+        if (emptyState) emptyState.remove();
 
-        container.appendChild(wrapper);
+        container.appendChild(buildMessage(data));
         scrollToBottom();
+        if (data.client_id && storedIds[data.client_id]) {
+            noteStored(data.client_id, storedIds[data.client_id]);
+            delete storedIds[data.client_id];
+        }
+    }
+
+    // A websocket message was written under `id`: label it and sync from there on
+    function noteStored(clientId, id) {
+        const el = document.querySelector(`[data-client-id="${clientId}"]`);
+        if (!el) {
+            storedIds[clientId] = id;
+            return;
+        }
+        el.setAttribute('data-message-id', id);
+        const receipt = el.querySelector('.read-receipt');
+        if (receipt) receipt.setAttribute('data-msg-id', id);
+        lastId = Math.max(lastId, id);
+        if (!oldestId) oldestId = id;
+    }
 
-        if (data.timestamp) lastTimestamp = data.timestamp;
+    // ─── Sync ───────────────────────────────────────────
+    // Sync responses send each message as an array in data.fields order, with sender names once in data.participants
+    function unpackMessages(data) {
+        const names = data.participants || {};
+        return (data.messages || []).map(row => {
+            const m = {};
+            data.fields.forEach((field, i) => { m[field] = row[i]; });
+            m.sender_name = names[m.sender_id] || '';
+            m.message = m.content;
+            return m;
+        });
     }
 
+    function applySync(data) {
+        unpackMessages(data).forEach(m => {
+            appendMessage(m);
+            lastId = Math.max(lastId, m.id);
+            if (!oldestId) oldestId = m.id;
+        });
+    }
+
+    // Fetch what was stored while the socket was down
+    function catchUp() {
+        fetch(`/chat/api/messages/${roomId}/?after=${lastId}`, { headers: { 'X-Requested-With': 'XMLHttpRequest' } })
+            .then(r => r.json())
+            .then(data => {
+                if (data.error) return;
+                applySync(data);
+                if (data.has_more) catchUp();
+            })
+            .catch(() => {});
+    }
+
+    function loadOlder() {
+        if (!oldestId) return;
+        fetch(`/chat/api/messages/${roomId}/?before=${oldestId}`, { headers: { 'X-Requested-With': 'XMLHttpRequest' } })
+            .then(r => r.json())
+            .then(data => {
+                if (data.error) return;
+                const container = messagesContainer.querySelector('.max-w-5xl');
+                const previousHeight = messagesContainer.scrollHeight;
+                const older = unpackMessages(data);
+                older.slice().reverse().forEach(m => {
+                    if (!isShown(m)) container.insertBefore(buildMessage(m), container.firstChild);
+                });
+                if (older.length) oldestId = older[0].id;
+                // Keep the messages the user was reading in place
+                messagesContainer.scrollTop += messagesContainer.scrollHeight - previousHeight;
+                if (!data.has_older) loadOlderWrap.classList.add('hidden');
+            })
+            .catch(() => {});
+    }
+    if (loadOlderWrap) loadOlderWrap.querySelector('button').addEventListener('click', loadOlder);
+
     function markAllRead() {
         if (wsConnected && ws) {
             ws.send(JSON.stringify({ type: 'mark_read' }));
@@ -95,7 +185,8 @@
 
         ws.onopen = function() {
             wsConnected = true;
-            if (pollInterval) { clearInterval(pollInterval); pollInterval = null; }
+            stopPolling();
+            catchUp();
             markAllRead();
         };
 
@@ -104,6 +195,8 @@
             if (data.type === 'chat_message') {
                 appendMessage(data);
                 if (data.sender_id !== currentUserId) markAllRead();
+            } else if (data.type === 'message_stored') {
+                Object.entries(data.ids).forEach(([clientId, id]) => noteStored(clientId, id));
             } else if (data.type === 'typing') {
                 typingIndicator.classList.remove('hidden');
                 clearTimeout(typingTimeout);
@@ -128,28 +221,41 @@
         };
     }
 
-    // ─── AJAX Polling Fallback ──────────────────────────
+    // ─── Long-Poll Fallback ─────────────────────────────
+    // The server holds each request until the room changes, so an idle room is not re-queried
     function startPolling() {
-        if (pollInterval) return;
-        pollInterval = setInterval(fetchNewMessages, 3000);
+        if (polling) return;
+        polling = new AbortController();
+        waitForMessages(polling);
+    }
+
+    function stopPolling() {
+        if (polling) { polling.abort(); polling = null; }
     }
 
-    function fetchNewMessages() {
-        let url = `/chat/api/messages/${roomId}/`;
-        if (lastTimestamp) url += `?after=${encodeURIComponent(lastTimestamp)}`;
+    function waitForMessages(controller) {
+        if (controller.signal.aborted) return;
+        const params = new URLSearchParams({ after: lastId });
+        if (roomVersion) params.set('version', roomVersion);
 
-        fetch(url, { headers: { 'X-Requested-With': 'XMLHttpRequest' } })
-            .then(r => r.json())
+        fetch(`/chat/api/wait/${roomId}/?${params}`, {
+            headers: { 'X-Requested-With': 'XMLHttpRequest' },
+            signal: controller.signal,
+        })
+            // 204: nothing was stored while the request was held
+            .then(r => (r.status === 204 ? null : r.json()))
             .then(data => {
-                if (data.messages) {
-                    data.messages.forEach(m => {
-                        if (!document.querySelector(`[data-message-id="${m.id}"]`)) {
-                            appendMessage({ ...m, message: m.content });
-                        }
-                    });
+                if (data && data.error) throw new Error(data.error);
+                if (data) {
+                    // With more messages waiting, ask again at once instead of waiting for a change
+                    roomVersion = data.has_more ? null : data.version;
+                    applySync(data);
                 }
+                waitForMessages(controller);
             })
-            .catch(() => {});
+            .catch(() => {
+                if (!controller.signal.aborted) setTimeout(() => waitForMessages(controller), 3000);
+            });
     }
 
     // ─── Send Message ───────────────────────────────────
@@ -158,12 +264,14 @@
         const text = messageInput.value.trim();
         if (!text) return;
 
+        const clientId = newClientId();
         if (wsConnected && ws) {
-            ws.send(JSON.stringify({ type: 'chat_message', message: text }));
+            ws.send(JSON.stringify({ type: 'chat_message', message: text, client_id: clientId }));
         } else {
             // AJAX fallback
             const formData = new FormData();
             formData.append('message', text);
+            formData.append('client_id', clientId);
             fetch(`/chat/api/send/${roomId}/`, {
                 method: 'POST',
                 headers: { 'X-CSRFToken': csrfToken },
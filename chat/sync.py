@@ -0,0 +1,76 @@
+"""
+Id-based incremental sync for chat messages.
+
+Message ids grow with insertion order within a room (the write-behind
+buffer inserts each batch in broadcast order under a per-room lock), so
+a client that remembers the newest id it holds asks for ``after=<id>``
+and receives exactly what it lacks, read through the (room, id) index.
+Unlike the old timestamp cursor, messages sharing a created_at are
+neither skipped nor repeated. ``before=<id>`` pages backwards for
+"load older".
+
+Messages are sent as arrays in FIELDS order, with each sender's name
+listed once in a ``participants`` header instead of on every message.
+"""
+
+from django.contrib.auth import get_user_model
+
+FIELDS = ('id', 'sender_id', 'content', 'timestamp', 'is_read', 'attachment', 'client_id')
+PAGE_SIZE = 50
+MAX_SYNC = 200
+
+
+def _rows(queryset):
+    from .models import Message
+
+    storage = Message._meta.get_field('attachment').storage
+    return [
+        [
+            pk,
+            sender_id,
+            content,
+            created_at.isoformat(),
+            is_read,
+            storage.url(attachment) if attachment else None,
+            str(client_id) if client_id else None,
+        ]
+        for pk, sender_id, content, created_at, is_read, attachment, client_id in queryset.values_list(
+            'pk',
+            'sender_id',
+            'content',
+            'created_at',
+            'is_read',
+            'attachment',
+            'client_id',
+        )
+    ]
+
+
+def sync_messages(room_id, after=None, before=None, limit=PAGE_SIZE):
+    """
+    Compact messages of a room: with `after`, those newer than that id,
+    oldest first and at most MAX_SYNC ('has_more' tells the client to
+    sync again); otherwise the `limit` newest messages older than
+    `before` (or overall), oldest first, with 'has_older'. Returns a
+    JSON-ready dict with 'fields', 'participants' ({sender id: name}) and
+    'messages' (rows in FIELDS order).
+    """
+    from .models import Message
+
+    messages = Message.objects.filter(room_id=room_id)
+    if after is not None:
+        rows = _rows(messages.filter(pk__gt=after).order_by('pk')[: MAX_SYNC + 1])
+        result = {'has_more': len(rows) > MAX_SYNC}
+        rows = rows[:MAX_SYNC]
+    else:
+        if before is not None:
+            messages = messages.filter(pk__lt=before)
+        rows = _rows(messages.order_by('-pk')[: limit + 1])
+        result = {'has_older': len(rows) > limit}
+        rows = rows[:limit][::-1]
+
+    sender_ids = {row[1] for row in rows}
+    participants = (
+        dict(get_user_model().objects.filter(pk__in=sender_ids).values_list('pk', 'username')) if sender_ids else {}
+    )
+    return {'fields': FIELDS, 'participants': participants, 'messages': rows, **result}
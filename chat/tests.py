@@ -0,0 +1,337 @@
+import asyncio
+import uuid
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from channels.exceptions import ChannelFull
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from internships.models import Job, JobApplication
+
+from .layers import DatabaseChannelLayer
+from .message_buffer import _buffers, aflush_room, buffer_message, flush_room, has_pending
+from .models import ChannelLayerGroup, ChannelLayerMessage, ChatRoom, Message
+from .participants import is_participant
+from .sync import FIELDS, sync_messages
+from .updates import room_group, watching
+
+User = get_user_model()
+
+
+def make_room():
+    applicant = User.objects.create_user(username='sam', email='sam@example.com', password='pass', user_type='user')
+    company = User.objects.create_user(username='acme', email='acme@example.com', password='pass', user_type='company')
+    job = Job.objects.create(
+        company=company,
+        title='Backend Developer',
+        description='Build APIs.',
+        job_type='full_time',
+        required_skills='Python',
+        qualifications='BSc',
+        experience_level='junior',
+        location='Kathmandu',
+        email='jobs@example.com',
+    )
+    application = JobApplication.objects.create(
+        job=job,
+        applicant=applicant,
+        full_name='Sam',
+        email='sam@example.com',
+        phone='1',
+        cv='cv.pdf',
+    )
+    return ChatRoom.objects.create(application=application)
+
+
+class DatabaseChannelLayerTests(TestCase):
+    """Two layer instances stand in for two ASGI worker processes sharing the database."""
+
+    def make_layer(self, **kwargs):
+        return DatabaseChannelLayer(poll_interval=0.01, batch_interval=0, **kwargs)
+
+    async def test_group_send_reaches_members_in_other_processes(self):
+        a, b = self.make_layer(), self.make_layer()
+        channel_a, channel_b = await a.new_channel(), await b.new_channel()
+        await a.group_add('chat_1', channel_a)
+        await b.group_add('chat_1', channel_b)
+
+        await a.group_send('chat_1', {'type': 'chat_message', 'text': 'hello'})
+        self.assertEqual((await asyncio.wait_for(a.receive(channel_a), 1))['text'], 'hello')
+        self.assertEqual((await asyncio.wait_for(b.receive(channel_b), 1))['text'], 'hello')
+
+        await b.group_discard('chat_1', channel_b)
+        self.assertFalse(await ChannelLayerGroup.objects.filter(channel=channel_b).aexists())
+        await a.close()
+        await b.close()
+
+    async def test_group_sends_are_batched_per_receiving_process(self):
+        a, b = self.make_layer(), self.make_layer()
+        channels_b = [await b.new_channel() for _ in range(3)]
+        for channel in channels_b:
+            await b.group_add('chat_2', channel)
+        for n in range(3):
+            await a.group_send('chat_2', {'type': 'chat_message', 'n': n})
+        await a.close()
+
+        # Nine deliveries, one row: the receiving process fans out locally
+        rows = [row async for row in ChannelLayerMessage.objects.all()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(len(rows[0].payload), 3)
+        for channel in channels_b:
+            received = [(await asyncio.wait_for(b.receive(channel), 1))['n'] for _ in range(3)]
+            self.assertEqual(received, [0, 1, 2])
+        await b.close()
+
+    def test_group_send_from_sync_code_is_written(self):
+        b = self.make_layer()
+        channel = async_to_sync(b.new_channel)()
+        async_to_sync(b.group_add)('chat_4', channel)
+
+        # async_to_sync() closes its event loop before the batch interval ends
+        a = DatabaseChannelLayer(batch_interval=10)
+        async_to_sync(a.group_send)('chat_4', {'type': 'chat_message'})
+        self.assertEqual(ChannelLayerMessage.objects.count(), 1)
+
+    async def test_backpressure(self):
+        a = DatabaseChannelLayer(batch_interval=10, max_pending=2, capacity=1)
+        b = self.make_layer()
+        remote = await b.new_channel()
+        await b.group_add('chat_3', remote)
+
+        await a.group_send('chat_3', {'type': 'chat_message'})
+        self.assertFalse(await ChannelLayerMessage.objects.aexists())
+        # A full outbox is written before the sender continues
+        await a.group_send('chat_3', {'type': 'chat_message'})
+        self.assertTrue(await ChannelLayerMessage.objects.aexists())
+        self.assertEqual(a.outbox, [])
+
+        local = await a.new_channel()
+        await a.send(local, {'type': 'chat_message'})
+        with self.assertRaises(ChannelFull):
+            await a.send(local, {'type': 'chat_message'})
+        await a.close()
+        await b.close()
+
+
+class MessageBufferTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(_buffers.clear)
+        self.room = make_room()
+        self.applicant = self.room.application.applicant
+        self.company = self.room.application.job.company
+
+    def test_flush_writes_buffered_messages_in_order_once(self):
+        client_ids = [uuid.uuid4() for _ in range(3)]
+        for n, client_id in enumerate(client_ids):
+            sender = self.applicant if n % 2 == 0 else self.company
+            buffer_message(self.room.id, sender.id, f'message {n}', client_id)
+        self.assertFalse(Message.objects.exists())
+
+        self.assertEqual(flush_room(self.room.id), 3)
+        stored = list(Message.objects.order_by('pk').values_list('content', 'client_id'))
+        self.assertEqual(stored, [(f'message {n}', client_id) for n, client_id in enumerate(client_ids)])
+        self.assertEqual(flush_room(self.room.id), 0)
+
+        # A message the client re-sends after a reconnect is not stored twice
+        buffer_message(self.room.id, self.applicant.id, 'message 0', client_ids[0])
+        flush_room(self.room.id)
+        self.assertEqual(Message.objects.count(), 3)
+
+    def test_buffering_costs_no_queries(self):
+        with self.assertNumQueries(0):
+            buffer_message(self.room.id, self.applicant.id, 'hi', uuid.uuid4())
+        self.assertTrue(has_pending(self.room.id))
+
+    def test_a_failed_write_keeps_the_batch_in_order(self):
+        buffer_message(self.room.id, self.applicant.id, 'first', uuid.uuid4())
+        with (
+            mock.patch.object(Message.objects, 'bulk_create', side_effect=RuntimeError('database is down')),
+            self.assertRaises(RuntimeError),
+        ):
+            flush_room(self.room.id)
+        buffer_message(self.room.id, self.company.id, 'second', uuid.uuid4())
+
+        self.assertEqual(flush_room(self.room.id), 2)
+        self.assertFalse(has_pending(self.room.id))
+        self.assertEqual(list(Message.objects.order_by('pk').values_list('content', flat=True)), ['first', 'second'])
+
+    async def test_consumer_flush_announces_stored_ids(self):
+        layer = DatabaseChannelLayer(poll_interval=0.01, batch_interval=0)
+        channel = await layer.new_channel()
+        await layer.group_add(room_group(self.room.id), channel)
+        client_id = uuid.uuid4()
+        buffer_message(self.room.id, self.applicant.id, 'hi', client_id)
+
+        with mock.patch('chat.updates.get_channel_layer', return_value=layer):
+            self.assertEqual(await aflush_room(self.room.id), 1)
+            self.assertEqual(await aflush_room(self.room.id), 0)  # nothing new, nothing announced
+        stored = await Message.objects.aget(client_id=client_id)
+        event = await asyncio.wait_for(layer.receive(channel), 1)
+        self.assertEqual(event, {'type': 'message_stored', 'ids': {str(client_id): stored.pk}})
+        await layer.close()
+
+    def test_ajax_endpoints_see_buffered_messages(self):
+        client_id = uuid.uuid4()
+        buffer_message(self.room.id, self.company.id, 'over the socket', client_id)
+        self.client.login(username='sam', password='pass')
+
+        response = self.client.get(reverse('chat:fetch_messages', args=[self.room.id]))
+        self.assertEqual([row[-1] for row in response.json()['messages']], [str(client_id)])
+
+        retry_id = str(uuid.uuid4())
+        for _ in range(2):
+            response = self.client.post(
+                reverse('chat:send_message', args=[self.room.id]), {'message': 'over ajax', 'client_id': retry_id}
+            )
+            self.assertEqual(response.json()['client_id'], retry_id)
+        self.assertEqual(Message.objects.filter(content='over ajax').count(), 1)
+
+
+class ParticipantCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.room = make_room()
+        self.application = self.room.application
+        self.outsider = User.objects.create_user(
+            username='eve', email='eve@example.com', password='pass', user_type='user'
+        )
+
+    def test_authorization_is_served_from_the_cache(self):
+        with self.assertNumQueries(1):
+            self.assertTrue(is_participant(self.room.id, self.application.applicant))
+        with self.assertNumQueries(0):
+            self.assertTrue(is_participant(self.room.id, self.application.job.company))
+            self.assertFalse(is_participant(self.room.id, self.outsider))
+        self.assertFalse(is_participant(self.room.id + 100, self.outsider))
+        with self.assertNumQueries(0):
+            self.assertFalse(is_participant(self.room.id + 100, self.outsider))
+
+    def test_application_and_room_changes_invalidate(self):
+        applicant = self.application.applicant
+        self.assertTrue(is_participant(self.room.id, applicant))
+        self.application.applicant = self.outsider
+        self.application.save()
+        self.assertTrue(is_participant(self.room.id, self.outsider))
+        self.assertFalse(is_participant(self.room.id, applicant))
+
+        # Status changes keep the cached entry
+        self.application.status = 'reviewed'
+        self.application.save(update_fields=['status'])
+        with self.assertNumQueries(0):
+            self.assertTrue(is_participant(self.room.id, self.outsider))
+
+        room_id = self.room.id
+        self.room.delete()
+        self.assertFalse(is_participant(room_id, self.outsider))
+
+    def test_ajax_endpoints_reject_outsiders(self):
+        self.client.login(username='eve', password='pass')
+        response = self.client.get(reverse('chat:fetch_messages', args=[self.room.id]))
+        self.assertEqual(response.status_code, 403)
+
+
+class LongPollTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(_buffers.clear)
+        self.room = make_room()
+        self.applicant = self.room.application.applicant
+        self.url = reverse('chat:wait_messages', args=[self.room.id])
+
+    async def test_a_stored_message_ends_the_wait(self):
+        async with watching(self.room.id) as watch:
+            version = watch.version
+            waiter = asyncio.ensure_future(watch.wait(5))
+            buffer_message(self.room.id, self.applicant.id, 'ping', uuid.uuid4())
+            await asyncio.sleep(0.1)
+            self.assertFalse(waiter.done())  # buffered is not yet readable
+            await aflush_room(self.room.id)
+            self.assertTrue(await asyncio.wait_for(waiter, 2))
+            self.assertNotEqual(watch.version, version)
+            self.assertFalse(await watch.wait(0.1))
+
+    @override_settings(CHAT_LONG_POLL_SECONDS=0.2)
+    async def test_endpoint_holds_idle_requests_without_queries(self):
+        await self.async_client.alogin(username='sam', password='pass')
+        data = (await self.async_client.get(self.url)).json()
+        self.assertEqual(data['messages'], [])
+
+        # Nothing new: the held request times out empty and never reads the room
+        with mock.patch('chat.views._sync') as sync:
+            idle = await self.async_client.get(self.url, {'version': data['version']})
+        self.assertEqual(idle.status_code, 204)
+        sync.assert_not_called()
+
+        # A message sent over AJAX (stored and announced by a sync view) wakes a held request
+        with override_settings(CHAT_LONG_POLL_SECONDS=5):
+            waiter = asyncio.ensure_future(self.async_client.get(self.url, {'version': data['version']}))
+            await asyncio.sleep(0.1)
+            await self.async_client.post(reverse('chat:send_message', args=[self.room.id]), {'message': 'ping'})
+            changed = (await asyncio.wait_for(waiter, 2)).json()
+        self.assertEqual([row[2] for row in changed['messages']], ['ping'])
+        self.assertNotEqual(changed['version'], data['version'])
+
+        # A version this process did not hand out is answered at once
+        stale = (await self.async_client.get(self.url, {'version': 'stale'})).json()
+        self.assertEqual([row[2] for row in stale['messages']], ['ping'])
+
+        await self.async_client.alogout()
+        await User.objects.acreate_user(username='eve', email='eve@example.com', password='pass', user_type='user')
+        await self.async_client.alogin(username='eve', password='pass')
+        self.assertEqual((await self.async_client.get(self.url)).status_code, 403)
+
+
+class MessageSyncTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.room = make_room()
+        self.applicant = self.room.application.applicant
+        self.company = self.room.application.job.company
+        moment = timezone.now()
+        # Same timestamp on every message: the old created_at cursor would skip them
+        self.messages = [
+            Message.objects.create(
+                room=self.room,
+                sender=self.applicant if n % 2 else self.company,
+                content=f'message {n}',
+                created_at=moment,
+            )
+            for n in range(5)
+        ]
+        self.ids = [m.id for m in self.messages]
+
+    def test_after_returns_exactly_what_the_client_lacks(self):
+        data = sync_messages(self.room.id, after=self.ids[1])
+        self.assertEqual([row[0] for row in data['messages']], self.ids[2:])
+        self.assertFalse(data['has_more'])
+        self.assertEqual(sync_messages(self.room.id, after=self.ids[-1])['messages'], [])
+
+    def test_compact_rows_with_participants_header(self):
+        data = sync_messages(self.room.id, after=self.ids[2])
+        self.assertEqual(data['fields'], FIELDS)
+        self.assertEqual(data['participants'], {self.applicant.id: 'sam', self.company.id: 'acme'})
+        row = dict(zip(FIELDS, data['messages'][0]))
+        self.assertEqual((row['id'], row['sender_id'], row['content']), (self.ids[3], self.applicant.id, 'message 3'))
+
+    def test_backfill_pages(self):
+        latest = sync_messages(self.room.id, limit=2)
+        self.assertEqual([row[0] for row in latest['messages']], self.ids[3:])
+        self.assertTrue(latest['has_older'])
+        older = sync_messages(self.room.id, before=self.ids[3], limit=2)
+        self.assertEqual([row[0] for row in older['messages']], self.ids[1:3])
+        oldest = sync_messages(self.room.id, before=self.ids[1], limit=2)
+        self.assertEqual([row[0] for row in oldest['messages']], self.ids[:1])
+        self.assertFalse(oldest['has_older'])
+
+    def test_fetch_endpoint(self):
+        self.client.login(username='sam', password='pass')
+        url = reverse('chat:fetch_messages', args=[self.room.id])
+        data = self.client.get(url, {'after': self.ids[3]}).json()
+        self.assertEqual([row[0] for row in data['messages']], self.ids[4:])
+        self.assertEqual(data['participants'], {str(self.company.id): 'acme'})
+        self.assertEqual(self.client.get(url, {'after': '2026-01-01T00:00:00'}).status_code, 400)
@@ -0,0 +1,123 @@
+"""
+Change notification for the chat long-poll endpoint.
+
+Stored messages are announced to the room's channel layer group with a
+``message_stored`` event: by a consumer's flush of the websocket buffer
+and by the AJAX send and upload views. While requests wait on a room,
+this process keeps one channel in that group and wakes them when such
+an event arrives, so a waiting request costs no database queries. The
+subscription outlives its last waiter by LINGER seconds, so a client
+polling again right after a response finds it in place.
+
+Each subscription has a version that moves with every event it
+receives. wait_messages_ajax returns it with the messages; a request
+passing back the current version is held until the next event (or
+CHAT_LONG_POLL_SECONDS), any other version (a new subscription, or a
+request served by another process) reads the messages at once.
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+logger = logging.getLogger(__name__)
+
+LINGER = 10
+
+# room id -> this process's RoomWatch
+_watches = {}
+
+
+def room_group(room_id):
+    """Channel layer group of the room's websocket consumers."""
+    return f'chat_{room_id}'
+
+
+async def aannounce_stored(room_id, ids):
+    """Tell the room's sockets and waiting long-polls that messages were stored ({client id: message id})."""
+    await get_channel_layer().group_send(room_group(room_id), {'type': 'message_stored', 'ids': ids})
+
+
+def announce_stored(room_id, ids):
+    async_to_sync(aannounce_stored)(room_id, ids)
+
+
+class RoomWatch:
+    """This process's channel in a room's group, and the requests waiting on it."""
+
+    def __init__(self, room_id):
+        self.room_id = room_id
+        self.version = None  # stays None if subscribing failed
+        self.waiters = 0
+        self.idle_since = time.monotonic()
+        self.ready = asyncio.Event()
+        self.changed = asyncio.Event()
+        self.task = asyncio.ensure_future(self._run())
+
+    def active(self):
+        return not self.task.done() and self.task.get_loop() is asyncio.get_running_loop()
+
+    async def wait(self, timeout):
+        """Whether messages were stored within `timeout` seconds."""
+        try:
+            await asyncio.wait_for(self.changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def _bump(self):
+        self.version = str(time.time_ns())
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    async def _run(self):
+        layer = get_channel_layer()
+        group = room_group(self.room_id)
+        channel = await layer.new_channel()
+        try:
+            await layer.group_add(group, channel)
+            subscribed_at = time.monotonic()
+            self.version = str(time.time_ns())
+            self.ready.set()
+            while self.waiters or time.monotonic() - self.idle_since < LINGER:
+                try:
+                    event = await asyncio.wait_for(layer.receive(channel), LINGER)
+                except asyncio.TimeoutError:
+                    continue
+                if event.get('type') == 'message_stored':
+                    self._bump()
+                if time.monotonic() - subscribed_at > getattr(layer, 'group_expiry', 86400) / 2:
+                    await layer.group_add(group, channel)  # renew the membership before it expires
+                    subscribed_at = time.monotonic()
+        except Exception:
+            logger.exception(f'Watching chat room {self.room_id} failed')
+        finally:
+            if _watches.get(self.room_id) is self:
+                del _watches[self.room_id]
+            # Requests still waiting read the messages instead
+            self.ready.set()
+            self.changed.set()
+            try:
+                await layer.group_discard(group, channel)
+            except Exception:
+                logger.exception(f'Leaving chat room {self.room_id} failed')
+
+
+@asynccontextmanager
+async def watching(room_id):
+    """This process's RoomWatch of the room, subscribed, and kept while the block runs."""
+    watch = _watches.get(room_id)
+    if watch is None or not watch.active():
+        watch = _watches[room_id] = RoomWatch(room_id)
+    watch.waiters += 1
+    try:
+        await watch.ready.wait()
+        yield watch
+    finally:
+        watch.waiters -= 1
+        if not watch.waiters:
+            watch.idle_since = time.monotonic()
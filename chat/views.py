@@ -1,27 +1,19 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse, HttpResponseForbidden
+from django.http import HttpResponse, JsonResponse, HttpResponseForbidden
 from django.views.decorators.http import require_POST
 from django.db.models import Q, Max, Count, Subquery, OuterRef
 
+from .message_buffer import flush_room, parse_client_id
 from .models import ChatRoom, Message
+from .participants import ais_participant, is_participant, remember_participants
+from .sync import PAGE_SIZE, sync_messages
+from .updates import announce_stored, watching
 from internships.models import JobApplication
 
 
-def _get_room_for_user(room_id, user):
-    """Return the ChatRoom if user is a participant, else None."""
-    try:
-        room = ChatRoom.objects.select_related(
-            'application__applicant',
-            'application__job__company',
-        ).get(id=room_id)
-    except ChatRoom.DoesNotExist:
-        return None
-    if user in [room.application.applicant, room.application.job.company]:
-        return room
-    return None
-
-
 @login_required
 def chat_room(request, application_id):
     """Show / create a chat room for a specific job application."""
@@ -34,9 +26,11 @@ def chat_room(request, application_id):
         return HttpResponseForbidden("You don't have permission to access this chat.")
 
     room, _ = ChatRoom.objects.get_or_create(application=application)
+    remember_participants(room.id, application.applicant_id, application.job.company_id)
+    flush_room(room.id)
 
-    messages_qs = room.messages.select_related('sender').order_by('-created_at')[:50]
-    chat_messages = list(reversed(messages_qs))
+    latest = list(room.messages.select_related('sender').order_by('-id')[:PAGE_SIZE + 1])
+    chat_messages = latest[:PAGE_SIZE][::-1]
 
     # Mark unread messages as read
     room.messages.filter(is_read=False).exclude(sender=request.user).update(is_read=True)
@@ -52,6 +46,8 @@ def chat_room(request, application_id):
         'room': room,
         'application': application,
         'chat_messages': chat_messages,
+        'has_older': len(latest) > PAGE_SIZE,
+        'last_message_id': chat_messages[-1].id if chat_messages else 0,
         'other_name': other_name,
         'current_user_id': request.user.id,
     })
@@ -117,60 +113,91 @@ def chat_list(request):
 @require_POST
 def send_message_ajax(request, room_id):
     """AJAX fallback – save a message and return JSON."""
-    room = _get_room_for_user(room_id, request.user)
-    if room is None:
+    if not is_participant(room_id, request.user):
         return JsonResponse({'error': 'Forbidden'}, status=403)
 
     content = request.POST.get('message', '').strip()
     if not content:
         return JsonResponse({'error': 'Empty message'}, status=400)
 
-    msg = Message.objects.create(room=room, sender=request.user, content=content)
+    # Buffered websocket messages come first; a retried send returns the stored message
+    flush_room(room_id)
+    msg, _ = Message.objects.get_or_create(
+        client_id=parse_client_id(request.POST.get('client_id')),
+        defaults={'room_id': room_id, 'sender': request.user, 'content': content},
+    )
+    if msg.room_id != room_id or msg.sender_id != request.user.id:
+        return JsonResponse({'error': 'Forbidden'}, status=403)
+    announce_stored(room_id, {str(msg.client_id): msg.id})
     return JsonResponse({
         'id': msg.id,
         'content': msg.content,
         'sender_id': msg.sender_id,
-        'sender_name': msg.sender.username,
+        'sender_name': request.user.username,
         'timestamp': msg.created_at.isoformat(),
+        'client_id': str(msg.client_id),
     })
 
 
+def _sync_params(request):
+    """The `after` / `before` message ids of a sync request; ValueError if malformed."""
+    return {name: int(request.GET[name]) for name in ('after', 'before') if request.GET.get(name)}
+
+
+def _sync(room_id, params):
+    flush_room(room_id)
+    return sync_messages(room_id, **params)
+
+
 @login_required
 def fetch_messages_ajax(request, room_id):
-    """AJAX fallback – return recent messages as JSON."""
-    room = _get_room_for_user(room_id, request.user)
-    if room is None:
+    """
+    AJAX fallback – messages as compact rows (see chat.sync): those after
+    message id `after`, or the page before message id `before`, or the
+    latest page.
+    """
+    if not is_participant(room_id, request.user):
         return JsonResponse({'error': 'Forbidden'}, status=403)
+    try:
+        params = _sync_params(request)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid message id'}, status=400)
+    return JsonResponse(_sync(room_id, params))
 
-    after = request.GET.get('after')
-    qs = room.messages.select_related('sender').order_by('created_at')
-    if after:
-        qs = qs.filter(created_at__gt=after)
-    else:
-        qs = qs.order_by('-created_at')[:50]
-        qs = sorted(qs, key=lambda m: m.created_at)
-
-    data = [
-        {
-            'id': m.id,
-            'content': m.content,
-            'sender_id': m.sender_id,
-            'sender_name': m.sender.username,
-            'timestamp': m.created_at.isoformat(),
-            'is_read': m.is_read,
-            'attachment': m.attachment.url if m.attachment else None,
-        }
-        for m in qs
-    ]
-    return JsonResponse({'messages': data})
+
+@login_required
+async def wait_messages_ajax(request, room_id):
+    """
+    Long-poll fallback – hold the request until messages are stored in
+    the room, then return those after message id `after` like
+    fetch_messages_ajax, plus a version to pass back with the next
+    request (see chat.updates). Without a current version the messages
+    are returned at once; after CHAT_LONG_POLL_SECONDS without a change
+    the response is an empty 204.
+    """
+    user = await request.auser()
+    if not await ais_participant(room_id, user):
+        return JsonResponse({'error': 'Forbidden'}, status=403)
+    try:
+        params = _sync_params(request)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid message id'}, status=400)
+
+    async with watching(room_id) as watch:
+        version = watch.version
+        if version is not None and request.GET.get('version') == version:
+            if not await watch.wait(settings.CHAT_LONG_POLL_SECONDS):
+                return HttpResponse(status=204)
+            version = watch.version
+        data = await sync_to_async(_sync)(room_id, params)
+    return JsonResponse({**data, 'version': version})
 
 
 @login_required
 @require_POST
 def upload_attachment(request, room_id):
     """Handle file upload for chat attachments."""
-    room = _get_room_for_user(room_id, request.user)
-    if room is None:
+    if not is_participant(room_id, request.user):
         return JsonResponse({'error': 'Forbidden'}, status=403)
 
     file = request.FILES.get('file')
@@ -187,17 +214,19 @@ def upload_attachment(request, room_id):
         return JsonResponse({'error': 'File type not allowed'}, status=400)
 
     content = request.POST.get('message', '') or file.name
+    flush_room(room_id)
     msg = Message.objects.create(
-        room=room,
+        room_id=room_id,
         sender=request.user,
         content=content,
         attachment=file,
     )
+    announce_stored(room_id, {})
     return JsonResponse({
         'id': msg.id,
         'content': msg.content,
         'sender_id': msg.sender_id,
-        'sender_name': msg.sender.username,
+        'sender_name': request.user.username,
         'timestamp': msg.created_at.isoformat(),
         'attachment': msg.attachment.url,
     })
@@ -1,8 +1,10 @@
 from django.contrib import admin
 from .models import (
-    Internship, Application, Job, JobApplication, JobBookmark, JobView,
+    Internship, Application, Job, JobApplication, JobBookmark, JobView, JobViewDaily, JobViewTotal,
     Interview, StatusChange, RejectionTag, AcceptanceTag, ApplicationRemark,
     AutoScreeningResult, CandidateFeedback, JobCategory, SavedSearch, SearchLog,
+    SearchIndexEntry, Skill, BackgroundTask, OutboundEmail, CompanyStats,
+    PlatformMetricsSnapshot, SearchTrendHourly,
 )
 
 
@@ -42,6 +44,21 @@ class JobViewAdmin(admin.ModelAdmin):
     ordering = ('-viewed_at',)
 
 
+@admin.register(JobViewDaily)
+class JobViewDailyAdmin(admin.ModelAdmin):
+    list_display = ('job', 'date', 'views', 'unique_viewers')
+    list_filter = ('date',)
+    search_fields = ('job__title',)
+    ordering = ('-date',)
+
+
+@admin.register(JobViewTotal)
+class JobViewTotalAdmin(admin.ModelAdmin):
+    list_display = ('job', 'views', 'unique_viewers', 'unique_ips', 'updated_at')
+    search_fields = ('job__title',)
+    readonly_fields = ('updated_at',)
+
+
 @admin.register(Interview)
 class InterviewAdmin(admin.ModelAdmin):
     list_display = ('application', 'interview_type', 'scheduled_at', 'duration_minutes', 'status')
@@ -161,3 +178,55 @@ class SearchLogAdmin(admin.ModelAdmin):
     list_filter = ('created_at',)
     search_fields = ('query', 'user__username')
     readonly_fields = ('created_at',)
+
+
+@admin.register(SearchTrendHourly)
+class SearchTrendHourlyAdmin(admin.ModelAdmin):
+    list_display = ('query', 'hour', 'count', 'zero_results')
+    list_filter = ('hour',)
+    search_fields = ('query',)
+
+
+@admin.register(SearchIndexEntry)
+class SearchIndexEntryAdmin(admin.ModelAdmin):
+    list_display = ('token', 'post_type', 'post_id', 'field', 'term_frequency')
+    list_filter = ('post_type', 'field')
+    search_fields = ('token',)
+
+
+@admin.register(Skill)
+class SkillAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug')
+    search_fields = ('name', 'slug')
+
+
+@admin.register(BackgroundTask)
+class BackgroundTaskAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'priority', 'attempts', 'run_after', 'started_at', 'finished_at')
+    list_filter = ('status', 'name')
+    readonly_fields = ('created_at', 'started_at', 'finished_at', 'locked_by', 'locked_until', 'last_error')
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'send_after', 'created_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('subject',)
+    readonly_fields = ('created_at', 'sent_at', 'batch_id', 'locked_until', 'last_error')
+
+
+@admin.register(CompanyStats)
+class CompanyStatsAdmin(admin.ModelAdmin):
+    list_display = ('company', 'job_posts', 'internship_posts', 'active_jobs', 'active_internships',
+                    'job_applications', 'internship_applications', 'total_views', 'updated_at')
+    search_fields = ('company__username',)
+    readonly_fields = ('updated_at',)
+
+
+@admin.register(PlatformMetricsSnapshot)
+class PlatformMetricsSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'total_users', 'total_companies', 'active_jobs', 'active_internships',
+                    'total_job_applications', 'total_internship_applications', 'pending_companies')
+    date_hierarchy = 'created_at'
+    readonly_fields = ('created_at',)
+
@@ -0,0 +1,243 @@
+"""
+Saved-search email alerts.
+
+Each alert-enabled SavedSearch is compiled once into a predicate over
+posting attributes that mirrors search_jobs / search_internships.
+Searches with the same query and filters share one predicate, and only
+postings created since the oldest pending alert are loaded, so a run costs
+(distinct searches x new postings) rather than (saved searches x all
+postings). Matches are sent as a single digest email per user, listing
+at most MAX_DIGEST_POSTINGS of them and linking to the user's saved
+searches for the rest.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .search import parse_smart_query
+from .search_index import MAX_TOKEN_LENGTH, posting_fields, query_terms
+from .skills import normalize_skill
+
+logger = logging.getLogger(__name__)
+
+# Searches not alerted for longer than this only get the most recent postings
+MAX_LOOKBACK = timedelta(days=7)
+MAX_DIGEST_POSTINGS = 20
+
+# Filter keys that do not restrict which new postings match
+_IGNORED_FILTERS = {'search_type', 'sort', 'page', 'date_posted'}
+
+
+def _values(filters, key):
+    """A filter value as a list, like QueryDict.getlist()."""
+    value = filters.get(key)
+    if value in (None, ''):
+        return []
+    if isinstance(value, list):
+        return [str(v) for v in value if str(v).strip()]
+    return [str(value)]
+
+
+def _value(filters, key):
+    values = _values(filters, key)
+    return values[-1].strip() if values else ''
+
+
+def search_key(saved):
+    """Canonical (post_type, query, filters) key; searches with equal keys share a predicate."""
+    filters = saved.filters if isinstance(saved.filters, dict) else {}
+    post_type = 'internship' if _value(filters, 'search_type') == 'internships' else 'job'
+    items = tuple(
+        sorted(
+            (key, tuple(sorted(v.strip().lower() for v in _values(filters, key))))
+            for key in filters
+            if key not in _IGNORED_FILTERS and _values(filters, key)
+        )
+    )
+    return post_type, ' '.join(saved.query.lower().split()), items
+
+
+# ==================== COMPILATION ====================
+
+
+def _keyword_predicate(query):
+    """Same matching rule as the inverted index: every keyword (last one as a prefix) or any detected skill."""
+    parsed = parse_smart_query(query)
+    exact, prefix = query_terms(parsed['keywords'])
+    exact = set(exact)
+    skill_phrases = {' '.join(s.lower().split())[:MAX_TOKEN_LENGTH] for s in parsed['detected_skills'] if s.strip()}
+    if not exact and prefix is None and not skill_phrases:
+        return parsed, None
+
+    def matches(post):
+        if skill_phrases & post['tokens']:
+            return True
+        if not exact and prefix is None:
+            return False
+        return exact <= post['tokens'] and (prefix is None or any(t.startswith(prefix) for t in post['tokens']))
+
+    return parsed, matches
+
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def compile_search(key):
+    """Build a predicate over posting dicts (see load_new_postings) for a search_key()."""
+    post_type, query, items = key
+    filters = {name: list(values) for name, values in items}
+    single = {name: values[-1] for name, values in filters.items()}
+
+    checks = []
+    parsed, keyword_check = _keyword_predicate(query)
+    if keyword_check is not None:
+        checks.append(keyword_check)
+
+    if post_type == 'job':
+        detected_type = parsed['detected_job_type'] if parsed['detected_job_type'] != 'internship' else ''
+        job_type = single.get('type') or detected_type or ''
+        if job_type:
+            checks.append(lambda post: post['type'] == job_type)
+        experience = single.get('experience') or parsed['detected_experience'] or ''
+        if experience:
+            checks.append(lambda post: post['experience'] == experience)
+        if single.get('remote') == 'yes':
+            checks.append(lambda post: post['is_remote'] or post['work_mode'] == 'remote')
+        salary_min = _int_or_none(single.get('salary_min', ''))
+        if salary_min is not None:
+            checks.append(lambda post: post['salary_max'] is not None and post['salary_max'] >= salary_min)
+        salary_max = _int_or_none(single.get('salary_max', ''))
+        if salary_max is not None:
+            checks.append(lambda post: post['salary_min'] is not None and post['salary_min'] <= salary_max)
+    elif single.get('type') in ('paid', 'unpaid'):
+        checks.append(lambda post: post['type'] == single['type'])
+
+    work_mode = single.get('work_mode') or parsed['detected_work_mode'] or ''
+    if work_mode:
+        checks.append(lambda post: post['work_mode'] == work_mode)
+    if single.get('category'):
+        checks.append(lambda post: post['category'] == single['category'])
+    skill_slugs = {normalize_skill(s) for s in filters.get('skills', ())}
+    if skill_slugs:
+        checks.append(lambda post: bool(skill_slugs & post['skills']))
+    location = single.get('location', '')
+    if location:
+        checks.append(lambda post: location in post['location'])
+
+    return lambda post: all(check(post) for check in checks)
+
+
+# ==================== MATCHING ====================
+
+
+def load_new_postings(post_type, since, until):
+    """Open postings of a type created in (since, until], as posting dicts keyed by id."""
+    from .models import Internship, Job
+
+    model = Job if post_type == 'job' else Internship
+    posts = (
+        model.objects.filter(
+            status='open',
+            created_at__gt=since,
+            created_at__lte=until,
+        )
+        .select_related('company__company_profile', 'category')
+        .prefetch_related('skill_set')
+    )
+
+    postings = {}
+    for post in posts:
+        tokens = set()
+        for field_tokens in posting_fields(post).values():
+            tokens.update(field_tokens)
+        postings[post.pk] = {
+            'post': post,
+            'created_at': post.created_at,
+            'tokens': tokens,
+            'skills': {skill.slug for skill in post.skill_set.all()},
+            'type': post.job_type if post_type == 'job' else post.internship_type,
+            'experience': getattr(post, 'experience_level', ''),
+            'work_mode': post.work_mode,
+            'is_remote': getattr(post, 'is_remote', False),
+            'category': post.category.slug if post.category else None,
+            'location': post.location.lower(),
+            'salary_min': getattr(post, 'salary_min', None),
+            'salary_max': getattr(post, 'salary_max', None),
+        }
+    return postings
+
+
+def _window_start(saved, now):
+    return max(saved.last_alerted or saved.created_at, now - MAX_LOOKBACK)
+
+
+def collect_alerts(now=None):
+    """
+    Match alert-enabled saved searches against new postings.
+    Returns ({user: [postings], premium and newest first}, [evaluated saved searches]).
+    """
+    from .models import SavedSearch
+
+    now = now or timezone.now()
+    searches = list(SavedSearch.objects.filter(alert_enabled=True).select_related('user'))
+    groups = {}
+    for saved in searches:
+        groups.setdefault(search_key(saved), []).append(saved)
+
+    postings = {}
+    for post_type in {key[0] for key in groups}:
+        since = min(_window_start(s, now) for key, group in groups.items() if key[0] == post_type for s in group)
+        postings[post_type] = load_new_postings(post_type, since, now)
+
+    by_user = {}
+    for key, group in groups.items():
+        new_posts = postings[key[0]]
+        if not new_posts:
+            continue
+        predicate = compile_search(key)
+        matched = [p for p in new_posts.values() if predicate(p)]
+        for saved in group:
+            since = _window_start(saved, now)
+            user_posts = by_user.setdefault(saved.user, {})
+            for p in matched:
+                if p['created_at'] > since:
+                    user_posts[(key[0], p['post'].pk)] = p['post']
+
+    digests = {}
+    for user, posts in by_user.items():
+        if posts:
+            digests[user] = sorted(posts.values(), key=lambda post: (not post.is_premium, -post.created_at.timestamp()))
+    return digests, searches
+
+
+def send_search_alerts(now=None, dry_run=False):
+    """Send one digest email per user with new postings matching their saved searches."""
+    from .emails import send_new_job_alert_email
+    from .models import SavedSearch
+
+    now = now or timezone.now()
+    digests, searches = collect_alerts(now)
+    sent = 0
+    if dry_run:
+        return {'searches': len(searches), 'digests': len(digests), 'sent': 0}
+
+    unsent = set()
+    for user, posts in digests.items():
+        if user.email and send_new_job_alert_email(
+            user, posts[:MAX_DIGEST_POSTINGS], more=max(len(posts) - MAX_DIGEST_POSTINGS, 0)
+        ):
+            sent += 1
+        else:
+            unsent.add(user.pk)
+    # A user whose digest was not queued keeps their window, so the postings are alerted next run
+    SavedSearch.objects.filter(
+        pk__in=[s.pk for s in searches if s.user_id not in unsent],
+    ).update(last_alerted=now)
+    logger.info(f'Search alerts: {len(searches)} saved searches, {sent} digest(s) sent')
+    return {'searches': len(searches), 'digests': len(digests), 'sent': sent}
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class InternshipsConfig(AppConfig):
     name = 'internships'
+
+    def ready(self):
+        import internships.signals  # noqa
@@ -0,0 +1,265 @@
+"""
+Materialized per-company counters for the company dashboards.
+
+CompanyStats holds post, application and view totals for one company,
+with HyperLogLog sketches of its job viewers that each view rollup
+merges into (see ``internships.job_views``). Signal handlers in ``internships.signals`` apply F() increments in the
+same transaction as the change that caused them; bulk operations that
+bypass signals call the helpers below. A missing row is rebuilt from
+scratch on first read, and ``python manage.py reconcile_company_stats``
+rebuilds every row. The dashboard's windowed figures (recent
+applications, top jobs) do not fit a counter and are cached for
+DASHBOARD_CACHE_TTL seconds instead.
+"""
+
+from collections import Counter
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+# Application statuses with their own counter
+STATUS_FIELDS = {
+    'pending': 'pending_applications',
+    'accepted': 'accepted_applications',
+    'rejected': 'rejected_applications',
+    'interview': 'interview_applications',
+}
+
+COUNTER_FIELDS = [
+    'job_posts',
+    'internship_posts',
+    'active_jobs',
+    'active_internships',
+    'job_applications',
+    'internship_applications',
+    *STATUS_FIELDS.values(),
+    'total_views',
+    'unique_viewers',
+    'unique_ips',
+]
+
+SKETCH_FIELDS = ['viewer_sketch', 'ip_sketch']
+
+DASHBOARD_CACHE_TTL = 300
+RECENT_APPLICATION_DAYS = 7
+TOP_JOBS = 5
+
+
+def adjust_company_stats(company_id, **deltas):
+    """Increment counters of a company's row in place. Companies without a row are built on first read."""
+    from .models import CompanyStats
+
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if company_id is None or not deltas:
+        return
+    CompanyStats.objects.filter(company_id=company_id).update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+
+
+def status_deltas(transitions):
+    """Counter deltas for (old_status, new_status) pairs; None stands for a created or deleted application."""
+    deltas = Counter()
+    for old, new in transitions:
+        if old in STATUS_FIELDS:
+            deltas[STATUS_FIELDS[old]] -= 1
+        if new in STATUS_FIELDS:
+            deltas[STATUS_FIELDS[new]] += 1
+    return deltas
+
+
+# ==================== REBUILD ====================
+
+
+def _grouped(queryset, company_field, **aggregates):
+    return {row.pop(company_field): row for row in queryset.values(company_field).annotate(**aggregates)}
+
+
+def compute_company_stats(company_ids=None):
+    """Count everything from the source tables: {company_id: {field: value}}, sketches included."""
+    from django.contrib.auth import get_user_model
+
+    from .hyperloglog import HyperLogLog
+    from .models import Application, Internship, Job, JobApplication, JobViewDaily
+
+    companies = get_user_model().objects.filter(user_type='company')
+    if company_ids is not None:
+        companies = companies.filter(pk__in=company_ids)
+    company_ids = list(companies.values_list('pk', flat=True))
+
+    def status_counts():
+        counts = {'total': Count('pk')}
+        for status, field in STATUS_FIELDS.items():
+            counts[field] = Count('pk', filter=Q(status=status))
+        return counts
+
+    jobs = _grouped(
+        Job.objects.filter(company_id__in=company_ids),
+        'company_id',
+        posts=Count('pk'),
+        active=Count('pk', filter=Q(status='open')),
+    )
+    internships = _grouped(
+        Internship.objects.filter(company_id__in=company_ids),
+        'company_id',
+        posts=Count('pk'),
+        active=Count('pk', filter=Q(status='open')),
+    )
+    job_apps = _grouped(
+        JobApplication.objects.filter(job__company_id__in=company_ids), 'job__company_id', **status_counts()
+    )
+    internship_apps = _grouped(
+        Application.objects.filter(internship__company_id__in=company_ids), 'internship__company_id', **status_counts()
+    )
+    views = _grouped(
+        JobViewDaily.objects.filter(job__company_id__in=company_ids), 'job__company_id', total=Sum('views')
+    )
+    sketches = {}
+    daily_sketches = JobViewDaily.objects.filter(job__company_id__in=company_ids).values_list(
+        'job__company_id', 'viewer_sketch', 'ip_sketch'
+    )
+    for company_id, viewer_sketch, ip_sketch in daily_sketches.iterator(chunk_size=500):
+        viewers, ips = sketches.setdefault(company_id, (HyperLogLog(), HyperLogLog()))
+        viewers.merge(HyperLogLog.from_bytes(viewer_sketch))
+        ips.merge(HyperLogLog.from_bytes(ip_sketch))
+
+    stats = {}
+    empty = {'posts': 0, 'active': 0, 'total': 0}
+    for company_id in company_ids:
+        job, internship = jobs.get(company_id, empty), internships.get(company_id, empty)
+        job_app, internship_app = job_apps.get(company_id, {}), internship_apps.get(company_id, {})
+        row = {
+            'job_posts': job['posts'],
+            'internship_posts': internship['posts'],
+            'active_jobs': job['active'],
+            'active_internships': internship['active'],
+            'job_applications': job_app.get('total', 0),
+            'internship_applications': internship_app.get('total', 0),
+            'total_views': views.get(company_id, {}).get('total') or 0,
+        }
+        viewers, ips = sketches.get(company_id, (HyperLogLog(), HyperLogLog()))
+        row.update(
+            unique_viewers=viewers.count(),
+            unique_ips=ips.count(),
+            viewer_sketch=viewers.to_bytes(),
+            ip_sketch=ips.to_bytes(),
+        )
+        for field in STATUS_FIELDS.values():
+            row[field] = job_app.get(field, 0) + internship_app.get(field, 0)
+        stats[company_id] = row
+    return stats
+
+
+def rebuild_company_stats(company_ids=None):
+    """Recount and store the rows of the given companies (all companies by default)."""
+    from .models import CompanyStats
+
+    rows = [
+        CompanyStats(company_id=company_id, **counters)
+        for company_id, counters in compute_company_stats(company_ids).items()
+    ]
+    CompanyStats.objects.bulk_create(
+        rows,
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=['company'],
+        update_fields=COUNTER_FIELDS + SKETCH_FIELDS,
+    )
+    return len(rows)
+
+
+def recount_active_postings(company_ids):
+    """Refresh open-posting counters after bulk status updates."""
+    from .models import CompanyStats, Internship, Job
+
+    company_ids = set(company_ids)
+    active_jobs = dict(
+        Job.objects.filter(company_id__in=company_ids, status='open').values_list('company_id').annotate(n=Count('pk'))
+    )
+    active_internships = dict(
+        Internship.objects.filter(company_id__in=company_ids, status='open')
+        .values_list('company_id')
+        .annotate(n=Count('pk'))
+    )
+    for company_id in company_ids:
+        CompanyStats.objects.filter(company_id=company_id).update(
+            active_jobs=active_jobs.get(company_id, 0),
+            active_internships=active_internships.get(company_id, 0),
+        )
+
+
+def fold_company_views(rolled_up):
+    """
+    Add rolled-up views, {company_id: [views delta, viewer sketch, ip
+    sketch]}, to the companies' rows. Companies without a row are built
+    on first read, from rollups that already include these views.
+    """
+    from .hyperloglog import HyperLogLog
+    from .models import CompanyStats
+
+    with transaction.atomic():
+        for stats in CompanyStats.objects.select_for_update().filter(company_id__in=rolled_up):
+            views, viewers, ips = rolled_up[stats.company_id]
+            viewers = HyperLogLog.from_bytes(stats.viewer_sketch).merge(viewers)
+            ips = HyperLogLog.from_bytes(stats.ip_sketch).merge(ips)
+            CompanyStats.objects.filter(pk=stats.pk).update(
+                total_views=F('total_views') + views,
+                unique_viewers=viewers.count(),
+                unique_ips=ips.count(),
+                viewer_sketch=viewers.to_bytes(),
+                ip_sketch=ips.to_bytes(),
+            )
+
+
+def get_company_stats(company):
+    """The company's counters row, built on first use."""
+    from .models import CompanyStats
+
+    stats = CompanyStats.objects.filter(company=company).first()
+    if stats is None:
+        rebuild_company_stats([company.pk])
+        stats = CompanyStats.objects.get(company=company)
+    return stats
+
+
+# ==================== DASHBOARD ROLLUP ====================
+
+
+def _dashboard_key(company_id):
+    return f'company_dashboard:{company_id}'
+
+
+def compute_dashboard_rollup(company):
+    """Applications of the last RECENT_APPLICATION_DAYS days and the most viewed jobs, with their application counts."""
+    from .job_views import view_count_annotation
+    from .models import Job, JobApplication
+
+    since = timezone.now() - timedelta(days=RECENT_APPLICATION_DAYS)
+    top_jobs = list(
+        Job.objects.filter(company=company)
+        .annotate(view_count=view_count_annotation())
+        .order_by('-view_count', '-created_at')[:TOP_JOBS]
+    )
+    # Count applications of the top jobs only, not of every job the company posted
+    app_counts = dict(
+        JobApplication.objects.filter(job__in=top_jobs).values_list('job_id').annotate(n=Count('pk')).order_by()
+    )
+    for job in top_jobs:
+        job.app_count = app_counts.get(job.pk, 0)
+    return {
+        'recent_applications': JobApplication.objects.filter(job__company=company, applied_at__gte=since).count(),
+        'top_jobs': top_jobs,
+    }
+
+
+def get_dashboard_rollup(company):
+    """The cached dashboard rollup, recomputed when older than DASHBOARD_CACHE_TTL."""
+    key = _dashboard_key(company.pk)
+    rollup = cache.get(key)
+    if rollup is None:
+        rollup = compute_dashboard_rollup(company)
+        cache.set(key, rollup, DASHBOARD_CACHE_TTL)
+    return rollup
@@ -1,9 +1,31 @@
+"""
+Outgoing email.
+
+Messages are rendered from cached, precompiled templates in
+templates/internships/emails/ and spooled to the OutboundEmail table, so
+web requests never talk to the mail server. The flush_outbox task (run by
+run_task_worker) delivers the outbox in batches over a single connection,
+paced by EMAIL_OUTBOX_BATCH_SIZE and EMAIL_OUTBOX_RATE_PER_SECOND.
+"""
 import logging
-from django.core.mail import EmailMultiAlternatives
+import uuid
+from datetime import timedelta
+from functools import cache
+
 from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.template.loader import get_template
+from django.urls import reverse
+from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
+MAX_SEND_ATTEMPTS = 5
+SEND_LOCK_SECONDS = 300
+RETRY_BACKOFF_SECONDS = 60
+
 
 def get_status_message(new_status):
     """Return a professional message based on the new application status."""
@@ -19,9 +41,162 @@ def get_status_message(new_status):
     return messages.get(new_status.lower(), 'Your application status has been updated.')
 
 
+# ==================== RENDERING & SPOOLING ====================
+
+@cache
+def _template(name):
+    """Compiled email template, loaded once per process."""
+    return get_template(f'internships/emails/{name}')
+
+
+def _render(name, context):
+    """Render the plain-text and HTML bodies of an email template."""
+    return (
+        _template(f'{name}.txt').render(context).strip(),
+        _template(f'{name}.html').render(context).strip(),
+    )
+
+
+def _post_title_and_company(application):
+    post = getattr(application, 'job', None) or getattr(application, 'internship', None)
+    if hasattr(post, 'title'):
+        company = getattr(post, 'company', 'the company')
+        if hasattr(company, 'name'):
+            return post.title, company.name
+        return post.title, str(company)
+    return str(post), 'the company'
+
+
+def queue_email(recipients, subject, body_text, body_html=''):
+    """Spool an email to the outbox; it is delivered by the task worker."""
+    from .models import OutboundEmail
+
+    email = OutboundEmail.objects.create(
+        recipients=list(recipients),
+        subject=subject[:255],
+        body_text=body_text,
+        body_html=body_html,
+    )
+    transaction.on_commit(schedule_outbox_flush)
+    return email
+
+
+def _pacing_seconds():
+    return settings.EMAIL_OUTBOX_BATCH_SIZE / settings.EMAIL_OUTBOX_RATE_PER_SECOND
+
+
+def schedule_outbox_flush(run_after=None):
+    """Queue a flush_outbox task unless one is already due soon enough."""
+    from .models import BackgroundTask
+    from .tasks import flush_outbox
+
+    run_after = run_after or timezone.now()
+    due = BackgroundTask.objects.filter(
+        name=flush_outbox.task_name, status='queued',
+        run_after__lte=run_after + timedelta(seconds=_pacing_seconds()),
+    )
+    if not due.exists():
+        flush_outbox.delay(_run_after=run_after)
+
+
+# ==================== DELIVERY ====================
+
+def _claim_outbox_batch(limit):
+    """Mark up to `limit` deliverable emails as ours in one UPDATE and return them."""
+    from .models import OutboundEmail
+
+    now = timezone.now()
+    deliverable = Q(status='queued', send_after__lte=now) | Q(status='sending', locked_until__lt=now)
+    ids = list(
+        OutboundEmail.objects.filter(deliverable).order_by('send_after', 'pk').values_list('pk', flat=True)[:limit]
+    )
+    if not ids:
+        return []
+    batch_id = uuid.uuid4().hex
+    OutboundEmail.objects.filter(deliverable, pk__in=ids).update(
+        status='sending',
+        batch_id=batch_id,
+        locked_until=now + timedelta(seconds=SEND_LOCK_SECONDS),
+        attempts=F('attempts') + 1,
+    )
+    return list(OutboundEmail.objects.filter(batch_id=batch_id, status='sending').order_by('pk'))
+
+
+def _record_failure(email, error):
+    from .models import OutboundEmail
+
+    if email.attempts < MAX_SEND_ATTEMPTS:
+        OutboundEmail.objects.filter(pk=email.pk).update(
+            status='queued', locked_until=None, last_error=str(error),
+            send_after=timezone.now() + timedelta(seconds=RETRY_BACKOFF_SECONDS * 2 ** (email.attempts - 1)),
+        )
+    else:
+        OutboundEmail.objects.filter(pk=email.pk).update(status='failed', locked_until=None, last_error=str(error))
+
+
+def send_outbox_batch(limit=None):
+    """
+    Deliver up to `limit` spooled emails over a single mail connection.
+    Messages go through send_messages() one at a time on that connection,
+    so one bad recipient does not fail the whole batch. Returns the number
+    of emails sent.
+    """
+    from .models import OutboundEmail
+
+    batch = _claim_outbox_batch(limit or settings.EMAIL_OUTBOX_BATCH_SIZE)
+    if not batch:
+        return 0
+
+    sent_ids = []
+    try:
+        with get_connection(fail_silently=False) as connection:
+            for email in batch:
+                message = EmailMultiAlternatives(
+                    subject=email.subject,
+                    body=email.body_text,
+                    from_email=settings.DEFAULT_FROM_EMAIL,
+                    to=email.recipients,
+                    connection=connection,
+                )
+                if email.body_html:
+                    message.attach_alternative(email.body_html, "text/html")
+                try:
+                    connection.send_messages([message])
+                    sent_ids.append(email.pk)
+                except Exception as e:
+                    logger.exception(f"Failed to send email {email.pk} to {', '.join(email.recipients)}")
+                    _record_failure(email, e)
+    except Exception as e:
+        # Could not open the connection: retry the unsent rest of the batch later
+        logger.exception('Failed to open the email connection')
+        for email in batch:
+            if email.pk not in sent_ids:
+                _record_failure(email, e)
+
+    OutboundEmail.objects.filter(pk__in=sent_ids).update(
+        status='sent', sent_at=timezone.now(), locked_until=None, last_error='',
+    )
+    logger.info(f"Outbox batch delivered {len(sent_ids)}/{len(batch)} email(s)")
+    return len(sent_ids)
+
+
+def next_outbox_run():
+    """When the next flush should run, or None when nothing is waiting."""
+    from django.db.models import Min
+
+    from .models import OutboundEmail
+
+    next_due = OutboundEmail.objects.filter(status='queued').aggregate(next_due=Min('send_after'))['next_due']
+    if next_due is None:
+        return None
+    return max(next_due, timezone.now() + timedelta(seconds=_pacing_seconds()))
+
+
+# ==================== MESSAGES ====================
+
 def send_application_status_email(application, old_status, new_status):
     """
-    Send email notification when application status changes.
+    Queue an email notification when application status changes.
     
     Args:
         application: JobApplication or Application object
@@ -29,342 +204,100 @@ def send_application_status_email(application, old_status, new_status):
         new_status: New status string
     """
     try:
-        job_title = getattr(application, 'job', None) or getattr(application, 'internship', None)
-        if hasattr(job_title, 'title'):
-            title = job_title.title
-            company = getattr(job_title, 'company', 'the company')
-            if hasattr(company, 'name'):
-                company_name = company.name
-            else:
-                company_name = str(company)
-        else:
-            title = str(job_title)
-            company_name = 'the company'
-
+        title, company_name = _post_title_and_company(application)
         applicant_email = application.applicant.email
         applicant_name = getattr(application.applicant, 'get_full_name', lambda: application.applicant.username)()
 
-        subject = f"Application Status Update - {title}"
-        status_message = get_status_message(new_status)
-
-        plain_message = f"""
-Dear {applicant_name},
-
-Your application status has been updated.
-
-Position: {title}
-Company: {company_name}
-Previous Status: {old_status}
-New Status: {new_status}
-
-{status_message}
-
-Best regards,
-The Remotely Internship Team
-        """.strip()
-
-        html_message = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <style>
-        body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-        .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-        .header {{ background-color: #4A90A4; color: white; padding: 20px; text-align: center; }}
-        .content {{ padding: 20px; background-color: #f9f9f9; }}
-        .status-box {{ background-color: white; padding: 15px; border-radius: 5px; margin: 15px 0; }}
-        .status-label {{ font-weight: bold; color: #666; }}
-        .old-status {{ color: #999; }}
-        .new-status {{ color: #4A90A4; font-weight: bold; }}
-        .message {{ padding: 15px; background-color: #e8f4f8; border-left: 4px solid #4A90A4; margin: 15px 0; }}
-        .footer {{ text-align: center; padding: 20px; color: #666; font-size: 12px; }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>Application Status Update</h1>
-        </div>
-        <div class="content">
-            <p>Dear {applicant_name},</p>
-            <p>Your application status has been updated.</p>
-            
-            <div class="status-box">
-                <p><span class="status-label">Position:</span> {title}</p>
-                <p><span class="status-label">Company:</span> {company_name}</p>
-                <p><span class="status-label">Previous Status:</span> <span class="old-status">{old_status}</span></p>
-                <p><span class="status-label">New Status:</span> <span class="new-status">{new_status}</span></p>
-            </div>
-            
-            <div class="message">
-                <p>{status_message}</p>
-            </div>
-            
-            <p>Best regards,<br>The Remotely Internship Team</p>
-        </div>
-        <div class="footer">
-            <p>This is an automated message. Please do not reply directly to this email.</p>
-        </div>
-    </div>
-</body>
-</html>
-        """.strip()
-
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[applicant_email],
-        )
-        email.attach_alternative(html_message, "text/html")
-        email.send(fail_silently=False)
-
-        logger.info(f"Application status email sent to {applicant_email} for {title}")
+        plain_message, html_message = _render('application_status', {
+            'applicant_name': applicant_name,
+            'title': title,
+            'company_name': company_name,
+            'old_status': old_status,
+            'new_status': new_status,
+            'status_message': get_status_message(new_status),
+        })
+        queue_email([applicant_email], f"Application Status Update - {title}", plain_message, html_message)
+
+        logger.info(f"Application status email queued for {applicant_email} for {title}")
         return True
 
     except Exception as e:
-        logger.exception(f"Failed to send application status email: {e}")
+        logger.exception(f"Failed to queue application status email: {e}")
         return False
 
 
 def send_interview_scheduled_email(interview):
     """
-    Send email notification when an interview is scheduled.
+    Queue an email notification when an interview is scheduled.
     
     Args:
         interview: Interview object with date, time, type, location/link, duration, notes
     """
     try:
         application = interview.application
-        job_title = getattr(application, 'job', None) or getattr(application, 'internship', None)
-        if hasattr(job_title, 'title'):
-            title = job_title.title
-            company = getattr(job_title, 'company', 'the company')
-            if hasattr(company, 'name'):
-                company_name = company.name
-            else:
-                company_name = str(company)
-        else:
-            title = str(job_title)
-            company_name = 'the company'
-
+        title, company_name = _post_title_and_company(application)
         applicant_email = application.applicant.email
         applicant_name = getattr(application.applicant, 'get_full_name', lambda: application.applicant.username)()
 
-        interview_date = interview.scheduled_at.strftime('%B %d, %Y')
-        interview_time = interview.scheduled_at.strftime('%I:%M %p')
-        interview_type = interview.get_interview_type_display()
-        duration = f"{interview.duration_minutes} minutes"
-        location = interview.location or ''
-        meeting_link = ''
-        notes = interview.notes or ''
-
-        subject = f"Interview Scheduled - {title} at {company_name}"
-
-        location_info = meeting_link if meeting_link else location if location else 'To be confirmed'
-
-        plain_message = f"""
-Dear {applicant_name},
-
-Congratulations! An interview has been scheduled for your application.
-
-Position: {title}
-Company: {company_name}
-
-Interview Details:
-- Date: {interview_date}
-- Time: {interview_time}
-- Type: {interview_type}
-- Duration: {duration}
-- Location/Link: {location_info}
-
-{f"Additional Notes: {notes}" if notes else ""}
-
-Please ensure you are available at the scheduled time. If you need to reschedule, please contact us as soon as possible.
-
-Best regards,
-The Remotely Internship Team
-        """.strip()
-
-        html_message = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <style>
-        body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-        .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-        .header {{ background-color: #28a745; color: white; padding: 20px; text-align: center; }}
-        .content {{ padding: 20px; background-color: #f9f9f9; }}
-        .details-box {{ background-color: white; padding: 20px; border-radius: 5px; margin: 15px 0; border: 1px solid #ddd; }}
-        .detail-row {{ padding: 8px 0; border-bottom: 1px solid #eee; }}
-        .detail-row:last-child {{ border-bottom: none; }}
-        .detail-label {{ font-weight: bold; color: #666; display: inline-block; width: 120px; }}
-        .notes {{ padding: 15px; background-color: #fff3cd; border-left: 4px solid #ffc107; margin: 15px 0; }}
-        .footer {{ text-align: center; padding: 20px; color: #666; font-size: 12px; }}
-        .highlight {{ color: #28a745; font-weight: bold; }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>Interview Scheduled!</h1>
-        </div>
-        <div class="content">
-            <p>Dear {applicant_name},</p>
-            <p>Congratulations! An interview has been scheduled for your application to <span class="highlight">{title}</span> at <span class="highlight">{company_name}</span>.</p>
-            
-            <div class="details-box">
-                <h3 style="margin-top: 0;">Interview Details</h3>
-                <div class="detail-row">
-                    <span class="detail-label">Date:</span> {interview_date}
-                </div>
-                <div class="detail-row">
-                    <span class="detail-label">Time:</span> {interview_time}
-                </div>
-                <div class="detail-row">
-                    <span class="detail-label">Type:</span> {interview_type}
-                </div>
-                <div class="detail-row">
-                    <span class="detail-label">Duration:</span> {duration}
-                </div>
-                <div class="detail-row">
-                    <span class="detail-label">Location/Link:</span> {location_info}
-                </div>
-            </div>
-            
-            {f'<div class="notes"><strong>Additional Notes:</strong><br>{notes}</div>' if notes else ''}
-            
-            <p>Please ensure you are available at the scheduled time. If you need to reschedule, please contact us as soon as possible.</p>
-            
-            <p>Best regards,<br>The Remotely Internship Team</p>
-        </div>
-        <div class="footer">
-            <p>This is an automated message. Please do not reply directly to this email.</p>
-        </div>
-    </div>
-</body>
-</html>
-        """.strip()
-
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[applicant_email],
-        )
-        email.attach_alternative(html_message, "text/html")
-        email.send(fail_silently=False)
-
-        logger.info(f"Interview scheduled email sent to {applicant_email} for {title}")
+        plain_message, html_message = _render('interview_scheduled', {
+            'applicant_name': applicant_name,
+            'title': title,
+            'company_name': company_name,
+            'interview_date': interview.scheduled_at.strftime('%B %d, %Y'),
+            'interview_time': interview.scheduled_at.strftime('%I:%M %p'),
+            'interview_type': interview.get_interview_type_display(),
+            'duration': f"{interview.duration_minutes} minutes",
+            'location_info': interview.location or 'To be confirmed',
+            'notes': interview.notes or '',
+        })
+        queue_email([applicant_email], f"Interview Scheduled - {title} at {company_name}", plain_message, html_message)
+
+        logger.info(f"Interview scheduled email queued for {applicant_email} for {title}")
         return True
 
     except Exception as e:
-        logger.exception(f"Failed to send interview scheduled email: {e}")
+        logger.exception(f"Failed to queue interview scheduled email: {e}")
         return False
 
 
-def send_new_job_alert_email(user, matching_jobs):
+def send_new_job_alert_email(user, matching_jobs, more=0):
     """
-    Send email to users about new jobs matching their skills.
+    Queue an email to a user about new jobs matching their skills.
     
     Args:
         user: User object
         matching_jobs: QuerySet or list of Job/Internship objects
+        more: Number of further matches left out of the email; it links to the user's saved searches for them
     """
     try:
         if not matching_jobs:
             return False
 
-        user_email = user.email
-        user_name = getattr(user, 'get_full_name', lambda: user.username)()
-
-        subject = f"New Job Opportunities Matching Your Skills"
+        from .models import Job
+        from .search_index import company_name
 
-        jobs_plain = []
-        jobs_html = []
+        user_name = getattr(user, 'get_full_name', lambda: user.username)()
+        site_url = getattr(settings, 'SITE_URL', '')
 
+        jobs = []
         for job in matching_jobs:
-            title = job.title
-            company = getattr(job, 'company', 'Company')
-            if hasattr(company, 'name'):
-                company_name = company.name
-            else:
-                company_name = str(company)
-            location = getattr(job, 'location', 'Remote')
-            job_id = getattr(job, 'id', '')
-            job_url = f"{settings.SITE_URL}/internships/{job_id}/" if hasattr(settings, 'SITE_URL') else f"/internships/{job_id}/"
-
-            jobs_plain.append(f"- {title} at {company_name} ({location})\n  Apply: {job_url}")
-            jobs_html.append(f"""
-                <div style="background-color: white; padding: 15px; border-radius: 5px; margin: 10px 0; border: 1px solid #ddd;">
-                    <h3 style="margin: 0 0 10px 0; color: #4A90A4;">{title}</h3>
-                    <p style="margin: 5px 0;"><strong>Company:</strong> {company_name}</p>
-                    <p style="margin: 5px 0;"><strong>Location:</strong> {location}</p>
-                    <a href="{job_url}" style="display: inline-block; padding: 8px 16px; background-color: #4A90A4; color: white; text-decoration: none; border-radius: 4px; margin-top: 10px;">View & Apply</a>
-                </div>
-            """)
-
-        plain_message = f"""
-Dear {user_name},
-
-We found new job opportunities that match your skills!
-
-{chr(10).join(jobs_plain)}
-
-Don't miss out on these opportunities. Apply now!
-
-Best regards,
-The Remotely Internship Team
-        """.strip()
-
-        html_message = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <style>
-        body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-        .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-        .header {{ background-color: #4A90A4; color: white; padding: 20px; text-align: center; }}
-        .content {{ padding: 20px; background-color: #f9f9f9; }}
-        .footer {{ text-align: center; padding: 20px; color: #666; font-size: 12px; }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>New Job Opportunities For You!</h1>
-        </div>
-        <div class="content">
-            <p>Dear {user_name},</p>
-            <p>We found <strong>{len(matching_jobs)}</strong> new job opportunities that match your skills!</p>
-            
-            {''.join(jobs_html)}
-            
-            <p style="margin-top: 20px;">Don't miss out on these opportunities. Apply now!</p>
-            
-            <p>Best regards,<br>The Remotely Internship Team</p>
-        </div>
-        <div class="footer">
-            <p>This is an automated message. Please do not reply directly to this email.</p>
-            <p>To update your job preferences, visit your profile settings.</p>
-        </div>
-    </div>
-</body>
-</html>
-        """.strip()
-
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[user_email],
-        )
-        email.attach_alternative(html_message, "text/html")
-        email.send(fail_silently=False)
-
-        logger.info(f"New job alert email sent to {user_email} with {len(matching_jobs)} jobs")
+            route = 'internships:job_detail' if isinstance(job, Job) else 'internships:internship_detail'
+            jobs.append({
+                'title': job.title,
+                'company_name': company_name(job) or str(job.company),
+                'location': getattr(job, 'location', 'Remote'),
+                'url': f"{site_url}{reverse(route, args=[job.pk])}",
+            })
+
+        context = {'user_name': user_name, 'jobs': jobs, 'more': more}
+        if more:
+            context['more_url'] = f"{site_url}{reverse('internships:my_saved_searches')}"
+        plain_message, html_message = _render('new_job_alert', context)
+        queue_email([user.email], "New Job Opportunities Matching Your Skills", plain_message, html_message)
+
+        logger.info(f"New job alert email queued for {user.email} with {len(jobs)} jobs")
         return True
 
     except Exception as e:
-        logger.exception(f"Failed to send new job alert email: {e}")
+        logger.exception(f"Failed to queue new job alert email: {e}")
         return False
@@ -0,0 +1,237 @@
+"""
+Facet counts (skills, categories, locations) for the advanced search.
+
+Each process keeps the facet values of every open job and internship in
+memory: {post_id: (category slug, location, skill slugs)}. Postings that
+open, close or change are recorded in a sequence-numbered log (see
+``internships.signals``); on the next read each process reloads just
+those postings instead of the whole table, and falls back to a full
+reload only when the log no longer covers the gap.
+
+Counts are computed over the postings that match the search without its
+facet filters, and each facet is counted with the other facets' filters
+applied (but not its own), so a selected skill or category does not hide
+the alternatives. For the plain listing (every open posting, no facet
+selected) the counts are per-value totals kept up to date with the
+table; any other search is counted in the database with one GROUP BY
+query per facet.
+"""
+
+import time
+from collections import Counter
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .skills import normalize_skill
+
+# Beyond this many changed postings since the last sync, reload everything
+MAX_SYNC_BACKLOG = 200
+LOG_TTL = 60 * 60
+
+SEQ_KEY = 'facets:seq'
+# Changes whenever the log restarts (e.g. after a cache clear), forcing a full reload
+EPOCH_KEY = 'facets:epoch'
+
+# Model fields whose change alters a posting's facet values
+FACET_FIELDS = {'category', 'location', 'required_skills', 'status'}
+
+_facets = {
+    'epoch': None,
+    'seq': None,
+    'posts': {'job': {}, 'internship': {}},
+    'skill_names': {},
+    'totals': {'job': None, 'internship': None},
+}
+
+
+def _log_key(seq):
+    return f'facets:log:{seq}'
+
+
+def note_postings_changed(post_type, post_ids):
+    """Record postings whose facet values may have changed (opened, closed, edited or deleted)."""
+    if len(post_ids) > MAX_SYNC_BACKLOG:
+        cache.set(EPOCH_KEY, time.time_ns(), None)  # every process reloads
+        return
+    for post_id in post_ids:
+        try:
+            seq = cache.incr(SEQ_KEY)
+        except ValueError:
+            seq = 1
+            cache.set(EPOCH_KEY, time.time_ns(), None)
+            cache.set(SEQ_KEY, seq, None)
+        cache.set(_log_key(seq), (post_type, post_id), LOG_TTL)
+
+
+# ==================== LOADING ====================
+
+
+def _load(post_type, post_ids=None):
+    """Facet values of open postings of a type (all, or only the given ids)."""
+    from .models import Internship, InternshipSkill, Job, JobSkill
+
+    model, link_model, post_field = (
+        (Job, JobSkill, 'job') if post_type == 'job' else (Internship, InternshipSkill, 'internship')
+    )
+    posts = model.objects.filter(status='open')
+    links = link_model.objects.filter(**{f'{post_field}__status': 'open'})
+    if post_ids is not None:
+        posts = posts.filter(pk__in=post_ids)
+        links = links.filter(**{f'{post_field}_id__in': post_ids})
+
+    skills = {}
+    for post_id, slug, name in links.values_list(f'{post_field}_id', 'skill__slug', 'skill__name'):
+        skills.setdefault(post_id, set()).add(slug)
+        _facets['skill_names'].setdefault(slug, name)
+    return {
+        pk: (category, (location or '').strip(), frozenset(skills.get(pk, ())))
+        for pk, category, location in posts.values_list('pk', 'category__slug', 'location')
+    }
+
+
+def _new_totals():
+    return {'skills': Counter(), 'categories': Counter(), 'locations': Counter()}
+
+
+def _count(totals, facets, sign=1):
+    """Add (or with sign=-1, remove) one posting's facet values to per-value totals."""
+    category, location, skills = facets
+    for slug in skills:
+        totals['skills'][slug] += sign
+    if category:
+        totals['categories'][category] += sign
+    if location:
+        totals['locations'][location] += sign
+
+
+def _load_type(post_type):
+    posts = _facets['posts'][post_type] = _load(post_type)
+    totals = _facets['totals'][post_type] = _new_totals()
+    for facets in posts.values():
+        _count(totals, facets)
+
+
+def _sync():
+    """Bring this process's facet table up to date with the change log."""
+    epoch = cache.get(EPOCH_KEY)
+    if epoch is None:
+        epoch = time.time_ns()
+        cache.set(EPOCH_KEY, epoch, None)
+    seq = cache.get(SEQ_KEY, 0)
+    if _facets['epoch'] == epoch and _facets['seq'] == seq:
+        return
+    if _facets['epoch'] == epoch and _facets['seq'] is not None and 0 < seq - _facets['seq'] <= MAX_SYNC_BACKLOG:
+        logged = cache.get_many([_log_key(s) for s in range(_facets['seq'] + 1, seq + 1)])
+        if len(logged) == seq - _facets['seq']:
+            changed = {'job': set(), 'internship': set()}
+            for post_type, post_id in logged.values():
+                changed[post_type].add(post_id)
+            for post_type, post_ids in changed.items():
+                if post_ids:
+                    posts, totals = _facets['posts'][post_type], _facets['totals'][post_type]
+                    for post_id in post_ids:
+                        facets = posts.pop(post_id, None)
+                        if facets is not None:
+                            _count(totals, facets, -1)
+                    reloaded = _load(post_type, post_ids)
+                    for facets in reloaded.values():
+                        _count(totals, facets)
+                    posts.update(reloaded)
+            _facets['seq'] = seq
+            return
+
+    _facets['skill_names'] = {}
+    _load_type('job')
+    _load_type('internship')
+    _facets['epoch'], _facets['seq'] = epoch, seq
+
+
+def open_postings(post_type):
+    """{post_id: (category slug, location, skill slugs)} for the open postings of a type."""
+    _sync()
+    return _facets['posts'][post_type]
+
+
+# ==================== COUNTS ====================
+
+
+def _sorted_counts(counter):
+    return sorted(((value, n) for value, n in counter.items() if n > 0), key=lambda item: (-item[1], item[0].lower()))
+
+
+def _is_every_open_posting(queryset):
+    """Whether a search base is the plain listing: open postings with no other condition."""
+    return queryset.query.where == queryset.model.objects.filter(status='open').query.where
+
+
+def _grouped_counts(queryset, *fields):
+    return queryset.order_by().values_list(*fields).annotate(n=Count('pk'))
+
+
+def facet_counts(post_type, base_queryset, filters):
+    """
+    Counts per skill, category and location for a search. base_queryset
+    is the search before its category, skills and location filters
+    (search_jobs / search_internships return it as 'facet_base');
+    filters is their 'filters' dict. Returns {'skills', 'categories',
+    'locations'} as lists of (value, count), most frequent first; skills
+    are display names, categories slugs.
+    """
+    category = filters.get('category') or ''
+    skills = {normalize_skill(s) for s in filters.get('skills') or () if s.strip()}
+    location = filters.get('location') or ''
+
+    if not (category or skills or location) and _is_every_open_posting(base_queryset):
+        open_postings(post_type)
+        totals, names = _facets['totals'][post_type], _facets['skill_names']
+        skill_counts = Counter()
+        for slug, n in totals['skills'].items():
+            skill_counts[names.get(slug, slug)] += n
+        return {
+            'skills': _sorted_counts(skill_counts),
+            'categories': _sorted_counts(totals['categories']),
+            'locations': _sorted_counts(totals['locations']),
+        }
+
+    base = base_queryset.filter(status='open')
+    in_category = Q(category__slug=category) if category else Q()
+    in_skills = Q(skill_set__slug__in=skills) if skills else Q()
+    in_location = Q(location__icontains=location) if location else Q()
+    # Skills are matched through a subquery, like filter_by_skills, so postings are not repeated per skill
+    with_skills = base.filter(pk__in=base.model.objects.filter(in_skills).values('pk')) if skills else base
+
+    counts = {'skills': Counter(), 'categories': Counter(), 'locations': Counter()}
+    for name, n in _grouped_counts(base.filter(in_category, in_location, skill_set__isnull=False), 'skill_set__name'):
+        counts['skills'][name] += n
+    for slug, n in _grouped_counts(with_skills.filter(in_location, category__isnull=False), 'category__slug'):
+        counts['categories'][slug] += n
+    for post_location, n in _grouped_counts(with_skills.filter(in_category), 'location'):
+        post_location = (post_location or '').strip()
+        if post_location:
+            counts['locations'][post_location] += n
+    return {facet: _sorted_counts(counter) for facet, counter in counts.items()}
+
+
+def all_skill_names():
+    """Display names of the skills used by open jobs and internships."""
+    open_postings('job')
+    used = set()
+    for post_type in ('job', 'internship'):
+        for _category, _location, post_skills in _facets['posts'][post_type].values():
+            used |= post_skills
+    return sorted((_facets['skill_names'].get(slug, slug) for slug in used), key=str.lower)
+
+
+def all_locations():
+    """Locations of open jobs and internships."""
+    open_postings('job')
+    return sorted(
+        {
+            location
+            for post_type in ('job', 'internship')
+            for _category, location, _skills in _facets['posts'][post_type].values()
+            if location
+        },
+        key=str.lower,
+    )
@@ -0,0 +1,273 @@
+"""
+Job view tracking.
+
+job_detail hits are appended to a buffer in the process's memory instead
+of inserting a JobView row each; a background thread writes it out with
+one bulk_create every FLUSH_SECONDS (see internships.write_buffer).
+``python manage.py rollup_job_views`` then aggregates JobView rows
+into JobViewDaily (views and unique viewers per job per day), which is
+what the analytics pages read, so their cost does not grow with the
+lifetime number of views. Each daily row carries HyperLogLog sketches of
+its viewers and IPs; every rollup also folds the days it wrote into
+cumulative per-job (JobViewTotal) and per-company (CompanyStats) totals
+and sketches, so all-time views and distinct counts are read from one
+row instead of merging the whole history.
+"""
+
+import re
+from datetime import datetime, timedelta
+
+from django.db.models import F, Max, Min, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .hyperloglog import HyperLogLog
+from .write_buffer import WriteBuffer
+
+FLUSH_SECONDS = 60
+
+BOT_RE = re.compile(r'bot|crawl|spider|slurp|preview|headless|facebookexternalhit', re.IGNORECASE)
+
+
+def is_bot(user_agent):
+    """Whether a User-Agent belongs to a crawler or link previewer."""
+    return bool(user_agent and BOT_RE.search(user_agent))
+
+
+def _write_views(events):
+    from django.contrib.auth import get_user_model
+
+    from .models import Job, JobView
+
+    job_ids = set(Job.objects.filter(pk__in={e[0] for e in events}).values_list('pk', flat=True))
+    viewer_ids = set(
+        get_user_model().objects.filter(pk__in={e[1] for e in events if e[1] is not None}).values_list('pk', flat=True)
+    )
+    rows = [
+        JobView(
+            job_id=job_id,
+            viewer_id=viewer_id if viewer_id in viewer_ids else None,
+            ip_address=ip_address,
+            viewed_at=viewed_at,
+        )
+        for job_id, viewer_id, ip_address, viewed_at in events
+        if job_id in job_ids
+    ]
+    JobView.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+_views = WriteBuffer('job views', _write_views, FLUSH_SECONDS)
+
+
+def record_job_view(job_id, viewer_id=None, ip_address=None):
+    """Buffer one job view in this process; written within FLUSH_SECONDS, off the request."""
+    _views.add((job_id, viewer_id, ip_address, timezone.now()))
+
+
+def flush_job_views():
+    """Write this process's buffered views to JobView in one bulk insert. Returns the number written."""
+    return _views.flush()
+
+
+# ==================== DAILY ROLLUPS ====================
+
+
+def _visitor(viewer_id, ip_address):
+    """Identity of a viewer: the user when signed in, otherwise the IP."""
+    if viewer_id is not None:
+        return f'user:{viewer_id}'
+    if ip_address:
+        return f'ip:{ip_address}'
+    return None
+
+
+def rollup_job_views(since=None):
+    """
+    Recompute JobViewDaily for every day from `since` through today, and
+    fold those days into the affected jobs' and companies' totals. By
+    default this starts at the last rolled-up day, which may have been
+    partial. Returns the number of (job, day) rows written.
+    """
+    from .models import JobView, JobViewDaily
+
+    if since is None:
+        since = JobViewDaily.objects.aggregate(last=Max('date'))['last']
+    if since is None:
+        first = JobView.objects.aggregate(first=Min('viewed_at'))['first']
+        if first is None:
+            return 0
+        since = timezone.localdate(first)
+
+    start = timezone.make_aware(datetime.combine(since, datetime.min.time()))
+    rows = (
+        JobView.objects.filter(viewed_at__gte=start)
+        .annotate(date=TruncDate('viewed_at'))
+        .values_list('job_id', 'date', 'viewer_id', 'ip_address')
+    )
+    days = {}
+    for job_id, date, viewer_id, ip_address in rows.iterator(chunk_size=2000):
+        day = days.get((job_id, date))
+        if day is None:
+            day = days[(job_id, date)] = [0, HyperLogLog(), HyperLogLog()]
+        day[0] += 1
+        visitor = _visitor(viewer_id, ip_address)
+        if visitor is not None:
+            day[1].add(visitor)
+        if ip_address:
+            day[2].add(ip_address)
+
+    daily = [
+        JobViewDaily(
+            job_id=job_id,
+            date=date,
+            views=views,
+            unique_viewers=viewers.count(),
+            unique_ips=ips.count(),
+            viewer_sketch=viewers.to_bytes(),
+            ip_sketch=ips.to_bytes(),
+        )
+        for (job_id, date), (views, viewers, ips) in days.items()
+    ]
+    previous = {
+        (job_id, date): views
+        for job_id, date, views in JobViewDaily.objects.filter(date__gte=since).values_list('job_id', 'date', 'views')
+    }
+    JobViewDaily.objects.bulk_create(
+        daily,
+        batch_size=200,
+        update_conflicts=True,
+        unique_fields=['job', 'date'],
+        update_fields=['views', 'unique_viewers', 'unique_ips', 'viewer_sketch', 'ip_sketch'],
+    )
+
+    rolled_up = {}
+    for (job_id, date), (views, viewers, ips) in days.items():
+        job = rolled_up.setdefault(job_id, [0, HyperLogLog(), HyperLogLog()])
+        job[0] += views - previous.get((job_id, date), 0)
+        job[1].merge(viewers)
+        job[2].merge(ips)
+    fold_view_totals(rolled_up)
+    return len(daily)
+
+
+def merge_sketches(rows):
+    """Merge (viewer_sketch, ip_sketch) pairs one at a time; returns the two HyperLogLogs."""
+    viewers, ips = HyperLogLog(), HyperLogLog()
+    for viewer_sketch, ip_sketch in rows:
+        viewers.merge(HyperLogLog.from_bytes(viewer_sketch))
+        ips.merge(HyperLogLog.from_bytes(ip_sketch))
+    return viewers, ips
+
+
+def _total_row(job_id, views, viewers, ips):
+    from .models import JobViewTotal
+
+    return JobViewTotal(
+        job_id=job_id,
+        views=views,
+        unique_viewers=viewers.count(),
+        unique_ips=ips.count(),
+        viewer_sketch=viewers.to_bytes(),
+        ip_sketch=ips.to_bytes(),
+    )
+
+
+def _build_total(job_id):
+    """A job's JobViewTotal from its whole daily history; done once, for jobs rolled up before totals existed."""
+    from .models import JobViewDaily
+
+    rows = JobViewDaily.objects.filter(job_id=job_id)
+    viewers, ips = merge_sketches(rows.values_list('viewer_sketch', 'ip_sketch').iterator(chunk_size=500))
+    return _total_row(job_id, rows.aggregate(views=Sum('views'))['views'] or 0, viewers, ips)
+
+
+def fold_view_totals(rolled_up):
+    """
+    Add freshly rolled-up days, {job_id: [views delta, viewer sketch,
+    ip sketch]}, to the jobs' JobViewTotal rows and their companies'
+    CompanyStats. Sketch merges are idempotent, so a partial day rolled
+    up again is not counted twice.
+    """
+    from .company_stats import fold_company_views
+    from .models import Job, JobViewTotal
+
+    totals = {total.job_id: total for total in JobViewTotal.objects.filter(job_id__in=rolled_up)}
+    rows = []
+    for job_id, (views, viewers, ips) in rolled_up.items():
+        total = totals.get(job_id)
+        if total is None:
+            rows.append(_build_total(job_id))  # already includes the new days
+            continue
+        rows.append(
+            _total_row(
+                job_id,
+                total.views + views,
+                HyperLogLog.from_bytes(total.viewer_sketch).merge(viewers),
+                HyperLogLog.from_bytes(total.ip_sketch).merge(ips),
+            )
+        )
+    JobViewTotal.objects.bulk_create(
+        rows,
+        batch_size=200,
+        update_conflicts=True,
+        unique_fields=['job'],
+        update_fields=['views', 'unique_viewers', 'unique_ips', 'viewer_sketch', 'ip_sketch', 'updated_at'],
+    )
+
+    companies = {}
+    for job_id, company_id in Job.objects.filter(pk__in=rolled_up).values_list('pk', 'company_id'):
+        views, viewers, ips = rolled_up[job_id]
+        company = companies.setdefault(company_id, [0, HyperLogLog(), HyperLogLog()])
+        company[0] += views
+        company[1].merge(viewers)
+        company[2].merge(ips)
+    fold_company_views(companies)
+
+
+def prune_job_views(before):
+    """Delete raw JobView rows before a date that has already been rolled up."""
+    from .models import JobView, JobViewDaily
+
+    last = JobViewDaily.objects.aggregate(last=Max('date'))['last']
+    if last is None:
+        return 0
+    before = min(before, last)
+    deleted, _ = JobView.objects.filter(
+        viewed_at__lt=timezone.make_aware(datetime.combine(before, datetime.min.time()))
+    ).delete()
+    return deleted
+
+
+# ==================== READS ====================
+
+
+def job_view_stats(job, days=30):
+    """
+    Views of a job from the rollups: total views, unique viewers and IPs
+    (from its JobViewTotal row), and the daily views of the last `days`
+    days as [{'date', 'count'}].
+    """
+    from .models import JobViewDaily, JobViewTotal
+
+    total = JobViewTotal.objects.filter(job=job).first()
+    if total is None:
+        total = _build_total(job.pk)
+        JobViewTotal.objects.bulk_create([total], ignore_conflicts=True)
+    since = timezone.localdate() - timedelta(days=days)
+    return {
+        'total_views': total.views,
+        'unique_viewers': total.unique_viewers,
+        'unique_ips': total.unique_ips,
+        'daily_views': [
+            {'date': date, 'count': views}
+            for date, views in JobViewDaily.objects.filter(job=job, date__gte=since)
+            .order_by('date')
+            .values_list('date', 'views')
+        ],
+    }
+
+
+def view_count_annotation():
+    """Annotation for a Job queryset: total rolled-up views of each job."""
+    return Coalesce(F('view_totals__views'), 0)
@@ -0,0 +1,38 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from internships.search import parse_smart_query
+
+SAMPLE_QUERIES = [
+    'Senior Python Django developer remote full-time',
+    'react native mobile app internship wfh',
+    'entry level data analyst excel power bi',
+    'machine learning engineer pytorch tensorflow hybrid',
+    'part time graphic designer figma photoshop',
+    'devops kubernetes docker aws 5+ years',
+    'node.js typescript backend contract',
+    'marketing intern kathmandu',
+]
+
+
+class Command(BaseCommand):
+    help = 'Micro-benchmark parse_smart_query over a fixed set of sample queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=2000, help='Passes over the sample queries')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+
+        def run():
+            for query in SAMPLE_QUERIES:
+                parse_smart_query(query)
+
+        elapsed = min(timeit.repeat(run, number=iterations, repeat=3))
+        per_query = elapsed / (iterations * len(SAMPLE_QUERIES)) * 1e6
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'parse_smart_query: {per_query:.1f} µs/query over {len(SAMPLE_QUERIES)} queries x {iterations} iterations'
+            )
+        )
@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from internships.models import Job, Internship
+from internships.signals import postings_closed
 
 
 class Command(BaseCommand):
@@ -9,13 +10,19 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         today = timezone.now().date()
 
-        expired_jobs = Job.objects.filter(
+        expired_job_ids = list(Job.objects.filter(
             status='open', deadline__lt=today
-        ).update(status='closed')
+        ).values_list('id', flat=True))
+        expired_jobs = Job.objects.filter(id__in=expired_job_ids).update(status='closed')
 
-        expired_internships = Internship.objects.filter(
+        expired_internship_ids = list(Internship.objects.filter(
             status='open', deadline__lt=today
-        ).update(status='closed')
+        ).values_list('id', flat=True))
+        expired_internships = Internship.objects.filter(id__in=expired_internship_ids).update(status='closed')
+
+        # update() bypasses post_save, so refresh the search index and caches here
+        postings_closed('job', expired_job_ids)
+        postings_closed('internship', expired_internship_ids)
 
         total = expired_jobs + expired_internships
         self.stdout.write(self.style.SUCCESS(
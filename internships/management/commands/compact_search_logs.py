@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from internships.search_trends import compact_search_logs, rebuild_search_trends
+
+
+class Command(BaseCommand):
+    help = 'Delete raw search logs that are already counted in the hourly search trends'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=30, help='Keep raw search logs from the last N days (default 30)'
+        )
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='First recompute the hourly counters from all raw logs (for logs that predate them)',
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            self.stdout.write(f'Rebuilt {rebuild_search_trends()} hourly bucket(s)')
+        deleted = compact_search_logs(timezone.now() - timedelta(days=options['days']))
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} raw search log(s)'))
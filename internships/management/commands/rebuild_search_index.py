@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from internships.search_index import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the keyword search index from all open jobs and internships'
+
+    def handle(self, *args, **options):
+        total = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} search entries'))
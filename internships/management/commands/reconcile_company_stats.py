@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from internships.company_stats import rebuild_company_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the company dashboard counters from the source tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, action='append', help='Only this company user id (repeatable)')
+
+    def handle(self, *args, **options):
+        count = rebuild_company_stats(options['company'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt counters for {count} company/companies'))
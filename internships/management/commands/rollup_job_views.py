@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from internships.job_views import prune_job_views, rollup_job_views
+
+
+class Command(BaseCommand):
+    help = 'Roll raw job views up into daily per-job totals'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='Recompute the last N days instead of continuing from the last rollup',
+        )
+        parser.add_argument(
+            '--prune-days', type=int, default=None, help='Afterwards delete raw views older than N days'
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['days'] is not None:
+            since = timezone.localdate() - timedelta(days=options['days'])
+        rows = rollup_job_views(since=since)
+        message = f'Wrote {rows} daily row(s)'
+
+        if options['prune_days'] is not None:
+            pruned = prune_job_views(timezone.localdate() - timedelta(days=options['prune_days']))
+            message += f', pruned {pruned} raw view(s)'
+        self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,39 @@
+import os
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+
+from internships.task_queue import DEFAULT_VISIBILITY_TIMEOUT, load_tasks, run_pending
+
+
+class Command(BaseCommand):
+    help = 'Run queued background tasks (screening, emails, ...)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process the runnable tasks and exit')
+        parser.add_argument('--batch', type=int, default=10, help='Tasks claimed per poll')
+        parser.add_argument('--sleep', type=float, default=1.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument(
+            '--visibility-timeout',
+            type=int,
+            default=DEFAULT_VISIBILITY_TIMEOUT,
+            help='Seconds before a claimed task may be picked up by another worker',
+        )
+
+    def handle(self, *args, **options):
+        load_tasks()
+        worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        processed = 0
+        self.stdout.write(f'Worker {worker_id} started')
+        try:
+            while True:
+                count = run_pending(worker_id, limit=options['batch'], visibility_timeout=options['visibility_timeout'])
+                processed += count
+                if not count:
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} task(s)'))
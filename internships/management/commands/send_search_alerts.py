@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from internships.alerts import send_search_alerts
+
+
+class Command(BaseCommand):
+    help = 'Email users a digest of new postings matching their alert-enabled saved searches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Match only; send nothing and keep last_alerted')
+
+    def handle(self, *args, **options):
+        result = send_search_alerts(dry_run=options['dry_run'])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Evaluated {result["searches"]} saved search(es): {result["digests"]} digest(s), {result["sent"]} queued'
+            )
+        )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from internships.platform_metrics import record_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Store a snapshot of the platform-wide admin dashboard metrics'
+
+    def handle(self, *args, **options):
+        snapshot = record_snapshot()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Snapshot saved: {snapshot.total_users} users, {snapshot.total_companies} companies, '
+                f'{snapshot.active_jobs} active jobs, {snapshot.active_internships} active internships'
+            )
+        )
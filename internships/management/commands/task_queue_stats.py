@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from internships.task_queue import queue_metrics
+
+
+def _ms(duration):
+    return f'{duration.total_seconds() * 1000:.0f}ms' if duration is not None else '-'
+
+
+class Command(BaseCommand):
+    help = 'Show background task counts and latency per task name'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24, help='Window for finished tasks')
+
+    def handle(self, *args, **options):
+        metrics = queue_metrics(since=timezone.now() - timedelta(hours=options['hours']))
+        if not metrics:
+            self.stdout.write('No tasks in the window')
+            return
+        for name, row in sorted(metrics.items()):
+            self.stdout.write(
+                f'{name}: queued={row.get("queued", 0)} running={row.get("running", 0)} '
+                f'done={row.get("done", 0)} failed={row.get("failed", 0)} '
+                f'wait avg={_ms(row.get("avg_wait"))} max={_ms(row.get("max_wait"))} '
+                f'run avg={_ms(row.get("avg_run"))} max={_ms(row.get("max_run"))}'
+            )
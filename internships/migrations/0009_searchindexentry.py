@@ -0,0 +1,149 @@
+# Generated by Django 6.0.1 on 2026-10-17 09:12
+
+import re
+from collections import Counter
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import migrations, models
+
+# Frozen copy of the tokenizer in internships.search_index, so later
+# changes to it do not alter what this migration writes
+MAX_TOKEN_LENGTH = 64
+TOKEN_RE = re.compile(r'[a-z0-9.][a-z0-9+#.]*')
+STOP_WORDS = {
+    'a',
+    'an',
+    'and',
+    'are',
+    'as',
+    'at',
+    'be',
+    'by',
+    'for',
+    'from',
+    'in',
+    'is',
+    'it',
+    'of',
+    'on',
+    'or',
+    'our',
+    'the',
+    'to',
+    'we',
+    'with',
+    'you',
+    'your',
+    'will',
+}
+POSTINGS_PER_BATCH = 500
+
+
+def tokenize(text):
+    if not text:
+        return []
+    tokens = []
+    for token in TOKEN_RE.findall(text.lower()):
+        token = token.rstrip('.')
+        if token.startswith('..'):
+            token = token.lstrip('.')
+        if token and token not in STOP_WORDS:
+            tokens.append(token[:MAX_TOKEN_LENGTH])
+    return tokens
+
+
+def skill_terms(skills_str):
+    if not skills_str:
+        return []
+    terms = []
+    for skill in skills_str.split(','):
+        phrase = ' '.join(skill.lower().split())
+        if not phrase:
+            continue
+        words = tokenize(phrase)
+        if len(words) != 1 or words[0] != phrase:
+            terms.append(phrase[:MAX_TOKEN_LENGTH])
+        terms.extend(words)
+    return terms
+
+
+def posting_fields(post):
+    try:
+        company_name = post.company.company_profile.company_name
+    except ObjectDoesNotExist:
+        company_name = ''
+    return {
+        'title': tokenize(post.title),
+        'skills': skill_terms(post.required_skills),
+        'description': tokenize(post.description),
+        'location': tokenize(post.location),
+        'company': tokenize(company_name),
+    }
+
+
+def build_search_index(apps, schema_editor):
+    SearchIndexEntry = apps.get_model('internships', 'SearchIndexEntry')
+    for post_type, model_name in (('job', 'Job'), ('internship', 'Internship')):
+        model = apps.get_model('internships', model_name)
+        postings = model.objects.filter(status='open').select_related('company__company_profile')
+        entries, batched = [], 0
+        for post in postings.iterator(chunk_size=POSTINGS_PER_BATCH):
+            for field, tokens in posting_fields(post).items():
+                for token, tf in Counter(tokens).items():
+                    entries.append(
+                        SearchIndexEntry(
+                            post_type=post_type,
+                            post_id=post.pk,
+                            token=token,
+                            field=field,
+                            term_frequency=tf,
+                            field_length=len(tokens),
+                        )
+                    )
+            batched += 1
+            if batched == POSTINGS_PER_BATCH:
+                SearchIndexEntry.objects.bulk_create(entries, batch_size=500)
+                entries, batched = [], 0
+        SearchIndexEntry.objects.bulk_create(entries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('internships', '0008_jobcategory_internship_work_mode_job_work_mode_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchIndexEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_type', models.CharField(choices=[('job', 'Job'), ('internship', 'Internship')], max_length=10)),
+                ('post_id', models.PositiveIntegerField()),
+                ('token', models.CharField(max_length=64)),
+                (
+                    'field',
+                    models.CharField(
+                        choices=[
+                            ('title', 'Title'),
+                            ('skills', 'Required Skills'),
+                            ('description', 'Description'),
+                            ('location', 'Location'),
+                            ('company', 'Company Name'),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ('term_frequency', models.PositiveIntegerField(default=1)),
+                ('field_length', models.PositiveIntegerField(default=0, help_text='Number of tokens in the field')),
+            ],
+            options={
+                'verbose_name': 'Search Index Entry',
+                'verbose_name_plural': 'Search Index Entries',
+                'indexes': [
+                    models.Index(fields=['post_type', 'token'], name='internships_post_ty_02fb55_idx'),
+                    models.Index(fields=['post_type', 'post_id'], name='internships_post_ty_8a06e1_idx'),
+                ],
+            },
+        ),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,227 @@
+# Generated by Django 6.0.1 on 2026-10-17 10:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copies of the helpers in internships.skills, so later changes to
+# them do not alter what this migration writes
+MAX_SKILL_LENGTH = 100
+
+
+def parse_skills(skills_str):
+    skills = {}
+    if not skills_str:
+        return skills
+    for raw in skills_str.split(','):
+        name = ' '.join(raw.split())[:MAX_SKILL_LENGTH]
+        if name:
+            skills.setdefault('-'.join(name.lower().split())[:MAX_SKILL_LENGTH], name)
+    return skills
+
+
+def get_skill_ids(skills, skill_model):
+    if not skills:
+        return {}
+    ids = dict(skill_model.objects.filter(slug__in=skills).values_list('slug', 'id'))
+    missing = [skill_model(slug=slug, name=name) for slug, name in skills.items() if slug not in ids]
+    if missing:
+        skill_model.objects.bulk_create(missing, ignore_conflicts=True)
+        ids = dict(skill_model.objects.filter(slug__in=skills).values_list('slug', 'id'))
+    return ids
+
+
+def backfill_skills(apps, schema_editor):
+    Skill = apps.get_model('internships', 'Skill')
+    sources = (
+        (apps.get_model('internships', 'Job'), 'required_skills', apps.get_model('internships', 'JobSkill'), 'job_id'),
+        (
+            apps.get_model('internships', 'Internship'),
+            'required_skills',
+            apps.get_model('internships', 'InternshipSkill'),
+            'internship_id',
+        ),
+        (
+            apps.get_model('accounts', 'UserProfile'),
+            'skills',
+            apps.get_model('internships', 'UserProfileSkill'),
+            'profile_id',
+        ),
+        (
+            apps.get_model('assessments', 'VerifiedBadge'),
+            'skill_name',
+            apps.get_model('internships', 'BadgeSkill'),
+            'badge_id',
+        ),
+    )
+    for model, field, link_model, owner_field in sources:
+        parsed = {pk: parse_skills(value) for pk, value in model.objects.values_list('pk', field)}
+        all_skills = {}
+        for skills in parsed.values():
+            for slug, name in skills.items():
+                all_skills.setdefault(slug, name)
+        ids = get_skill_ids(all_skills, Skill)
+        link_model.objects.bulk_create(
+            [
+                link_model(**{owner_field: pk, 'skill_id': ids[slug]})
+                for pk, skills in parsed.items()
+                for slug in skills
+            ],
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('accounts', '__first__'),
+        ('assessments', '__first__'),
+        ('internships', '0009_searchindexentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BadgeSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                (
+                    'badge',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='skill_links',
+                        to='assessments.verifiedbadge',
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name='InternshipSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                (
+                    'internship',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='skill_links',
+                        to='internships.internship',
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name='JobSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                (
+                    'job',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name='skill_links', to='internships.job'
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Display name, as first entered', max_length=100)),
+                (
+                    'slug',
+                    models.CharField(help_text="Normalized key, e.g. 'react-native'", max_length=100, unique=True),
+                ),
+                (
+                    'badges',
+                    models.ManyToManyField(
+                        blank=True,
+                        related_name='skill_set',
+                        through='internships.BadgeSkill',
+                        to='assessments.verifiedbadge',
+                    ),
+                ),
+                (
+                    'internships',
+                    models.ManyToManyField(
+                        blank=True,
+                        related_name='skill_set',
+                        through='internships.InternshipSkill',
+                        to='internships.internship',
+                    ),
+                ),
+                (
+                    'jobs',
+                    models.ManyToManyField(
+                        blank=True, related_name='skill_set', through='internships.JobSkill', to='internships.job'
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'Skill',
+                'verbose_name_plural': 'Skills',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='jobskill',
+            name='skill',
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, related_name='job_links', to='internships.skill'
+            ),
+        ),
+        migrations.AddField(
+            model_name='internshipskill',
+            name='skill',
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, related_name='internship_links', to='internships.skill'
+            ),
+        ),
+        migrations.AddField(
+            model_name='badgeskill',
+            name='skill',
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, related_name='badge_links', to='internships.skill'
+            ),
+        ),
+        migrations.CreateModel(
+            name='UserProfileSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                (
+                    'profile',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='skill_links',
+                        to='accounts.userprofile',
+                    ),
+                ),
+                (
+                    'skill',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='profile_links',
+                        to='internships.skill',
+                    ),
+                ),
+            ],
+            options={
+                'unique_together': {('profile', 'skill')},
+            },
+        ),
+        migrations.AddField(
+            model_name='skill',
+            name='profiles',
+            field=models.ManyToManyField(
+                blank=True, related_name='skill_set', through='internships.UserProfileSkill', to='accounts.userprofile'
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name='jobskill',
+            unique_together={('job', 'skill')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='internshipskill',
+            unique_together={('internship', 'skill')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='badgeskill',
+            unique_together={('badge', 'skill')},
+        ),
+        migrations.RunPython(backfill_skills, migrations.RunPython.noop),
+    ]
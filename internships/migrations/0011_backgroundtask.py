@@ -0,0 +1,56 @@
+# Generated by Django 6.0.1 on 2026-10-17 11:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('internships', '0010_badgeskill_internshipskill_jobskill_skill_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackgroundTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('priority', models.SmallIntegerField(default=5, help_text='Higher runs first')),
+                (
+                    'status',
+                    models.CharField(
+                        choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')],
+                        default='queued',
+                        max_length=10,
+                    ),
+                ),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('max_attempts', models.PositiveSmallIntegerField(default=3)),
+                (
+                    'run_after',
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, help_text='Not picked up before this time (retry backoff)'
+                    ),
+                ),
+                (
+                    'locked_until',
+                    models.DateTimeField(blank=True, help_text='Visibility timeout of the current attempt', null=True),
+                ),
+                ('locked_by', models.CharField(blank=True, max_length=100)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Background Task',
+                'verbose_name_plural': 'Background Tasks',
+                'ordering': ['-created_at'],
+                'indexes': [
+                    models.Index(fields=['status', 'priority', 'run_after'], name='internships_status_d94961_idx'),
+                    models.Index(fields=['name', 'finished_at'], name='internships_name_2e2249_idx'),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-17 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('accounts', '__first__'),
+        ('internships', '0012_outboundemail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userprofileskill',
+            index=models.Index(fields=['skill', 'profile'], name='internships_skill_i_816c7f_idx'),
+        ),
+    ]
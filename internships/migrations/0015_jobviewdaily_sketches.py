@@ -0,0 +1,32 @@
+# Generated by Django 6.0.1 on 2026-10-17 13:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('internships', '0014_alter_jobview_viewed_at_jobviewdaily'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobviewdaily',
+            name='ip_sketch',
+            field=models.BinaryField(blank=True, default=b''),
+        ),
+        migrations.AddField(
+            model_name='jobviewdaily',
+            name='unique_ips',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='jobviewdaily',
+            name='viewer_sketch',
+            field=models.BinaryField(blank=True, default=b''),
+        ),
+        migrations.AlterField(
+            model_name='jobviewdaily',
+            name='unique_viewers',
+            field=models.PositiveIntegerField(default=0, help_text='Signed-in users, plus anonymous IPs'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 6.0.1 on 2026-10-17 13:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('internships', '0015_jobviewdaily_sketches'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompanyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_posts', models.IntegerField(default=0)),
+                ('internship_posts', models.IntegerField(default=0)),
+                ('active_jobs', models.IntegerField(default=0)),
+                ('active_internships', models.IntegerField(default=0)),
+                ('job_applications', models.IntegerField(default=0)),
+                ('internship_applications', models.IntegerField(default=0)),
+                ('pending_applications', models.IntegerField(default=0)),
+                ('accepted_applications', models.IntegerField(default=0)),
+                ('rejected_applications', models.IntegerField(default=0)),
+                ('interview_applications', models.IntegerField(default=0)),
+                ('total_views', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                (
+                    'company',
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='company_stats',
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'Company Stats',
+                'verbose_name_plural': 'Company Stats',
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0.1 on 2026-10-17 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('internships', '0016_companystats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlatformMetricsSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('total_users', models.PositiveIntegerField(default=0)),
+                ('total_companies', models.PositiveIntegerField(default=0)),
+                ('total_jobs', models.PositiveIntegerField(default=0)),
+                ('total_internships', models.PositiveIntegerField(default=0)),
+                ('total_job_applications', models.PositiveIntegerField(default=0)),
+                ('total_internship_applications', models.PositiveIntegerField(default=0)),
+                ('active_jobs', models.PositiveIntegerField(default=0)),
+                ('active_internships', models.PositiveIntegerField(default=0)),
+                ('pending_companies', models.PositiveIntegerField(default=0)),
+                ('job_apps_by_status', models.JSONField(blank=True, default=dict)),
+                ('intern_apps_by_status', models.JSONField(blank=True, default=dict)),
+            ],
+            options={
+                'verbose_name': 'Platform Metrics Snapshot',
+                'verbose_name_plural': 'Platform Metrics Snapshots',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
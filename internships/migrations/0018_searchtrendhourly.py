@@ -0,0 +1,52 @@
+# Generated by Django 6.0.1 on 2026-10-17 14:55
+
+from django.db import migrations, models
+
+
+def backfill_search_trends(apps, schema_editor):
+    from internships.search_trends import normalize_query
+
+    SearchLog = apps.get_model('internships', 'SearchLog')
+    SearchTrendHourly = apps.get_model('internships', 'SearchTrendHourly')
+    buckets = {}
+    for query, created_at, results_count in (
+        SearchLog.objects.values_list('query', 'created_at', 'results_count').order_by().iterator(chunk_size=2000)
+    ):
+        query = normalize_query(query)
+        if query:
+            bucket = buckets.setdefault((query, created_at.replace(minute=0, second=0, microsecond=0)), [0, 0])
+            bucket[0] += 1
+            bucket[1] += results_count == 0
+    SearchTrendHourly.objects.bulk_create(
+        [
+            SearchTrendHourly(query=query, hour=hour, count=count, zero_results=zero)
+            for (query, hour), (count, zero) in buckets.items()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('internships', '0017_platformmetricssnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTrendHourly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('query', models.CharField(max_length=255)),
+                ('hour', models.DateTimeField(db_index=True)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('zero_results', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Search Trend (Hourly)',
+                'verbose_name_plural': 'Search Trends (Hourly)',
+                'ordering': ['-hour', '-count'],
+                'unique_together': {('query', 'hour')},
+            },
+        ),
+        migrations.RunPython(backfill_search_trends, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 6.0.1 on 2026-10-17 02:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def drop_company_stats(apps, schema_editor):
+    # Existing rows have no view sketches; get_company_stats rebuilds each one with them on first read
+    apps.get_model('internships', 'CompanyStats').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('internships', '0019_alter_searchlog_created_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='companystats',
+            name='ip_sketch',
+            field=models.BinaryField(blank=True, default=b''),
+        ),
+        migrations.AddField(
+            model_name='companystats',
+            name='unique_ips',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='companystats',
+            name='unique_viewers',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='companystats',
+            name='viewer_sketch',
+            field=models.BinaryField(blank=True, default=b''),
+        ),
+        migrations.CreateModel(
+            name='JobViewTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('views', models.IntegerField(default=0)),
+                ('unique_viewers', models.PositiveIntegerField(default=0)),
+                ('unique_ips', models.PositiveIntegerField(default=0)),
+                ('viewer_sketch', models.BinaryField(blank=True, default=b'')),
+                ('ip_sketch', models.BinaryField(blank=True, default=b'')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                (
+                    'job',
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE, related_name='view_totals', to='internships.job'
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'Job View (Total)',
+                'verbose_name_plural': 'Job Views (Total)',
+            },
+        ),
+        migrations.RunPython(drop_company_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-17 02:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('internships', '0020_jobviewtotal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='searchlog',
+            name='results_capped',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-17 03:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('internships', '0021_searchlog_results_capped'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='searchlog',
+            name='weight',
+            field=models.FloatField(default=1.0),
+        ),
+    ]
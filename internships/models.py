@@ -1,5 +1,6 @@
-from django.db import models
 from django.conf import settings
+from django.db import models
+from django.utils import timezone
 
 
 class Job(models.Model):
@@ -366,7 +367,8 @@ class JobView(models.Model):
         blank=True
     )
     ip_address = models.GenericIPAddressField(null=True, blank=True)
-    viewed_at = models.DateTimeField(auto_now_add=True)
+    # Set when the view happened, not when the buffered batch is written
+    viewed_at = models.DateTimeField(default=timezone.now, db_index=True)
     
     class Meta:
         ordering = ['-viewed_at']
@@ -378,6 +380,45 @@ class JobView(models.Model):
         return f"{viewer_name} viewed {self.job.title}"
 
 
+class JobViewDaily(models.Model):
+    """Daily rollup of JobView rows, read by the analytics pages"""
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='daily_views')
+    date = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+    unique_viewers = models.PositiveIntegerField(default=0, help_text="Signed-in users, plus anonymous IPs")
+    unique_ips = models.PositiveIntegerField(default=0)
+    # HyperLogLog sketches (see internships.hyperloglog), merged for multi-day and company-wide counts
+    viewer_sketch = models.BinaryField(blank=True, default=b'')
+    ip_sketch = models.BinaryField(blank=True, default=b'')
+
+    class Meta:
+        ordering = ['-date']
+        unique_together = ['job', 'date']
+        verbose_name = "Job View (Daily)"
+        verbose_name_plural = "Job Views (Daily)"
+
+    def __str__(self):
+        return f"{self.job.title} - {self.date}: {self.views}"
+
+
+class JobViewTotal(models.Model):
+    """All-time views of a job, with cumulative sketches folded in by each rollup"""
+    job = models.OneToOneField(Job, on_delete=models.CASCADE, related_name='view_totals')
+    views = models.IntegerField(default=0)
+    unique_viewers = models.PositiveIntegerField(default=0)
+    unique_ips = models.PositiveIntegerField(default=0)
+    viewer_sketch = models.BinaryField(blank=True, default=b'')
+    ip_sketch = models.BinaryField(blank=True, default=b'')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Job View (Total)"
+        verbose_name_plural = "Job Views (Total)"
+
+    def __str__(self):
+        return f"{self.job.title}: {self.views}"
+
+
 class Interview(models.Model):
     """Interview scheduling model"""
     INTERVIEW_TYPE_CHOICES = (
@@ -646,7 +687,11 @@ class SearchLog(models.Model):
         null=True, blank=True
     )
     results_count = models.PositiveIntegerField(default=0)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # results_count stopped counting at the search's count cap
+    results_capped = models.BooleanField(default=False)
+    # Searches this row stands for when logging is sampled (1 / SEARCH_LOG_SAMPLE_RATE)
+    weight = models.FloatField(default=1.0)
+    created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         ordering = ['-created_at']
@@ -657,4 +702,249 @@ class SearchLog(models.Model):
         verbose_name_plural = "Search Logs"
 
     def __str__(self):
-        return f"{self.query} ({self.results_count} results)"
+        return f"{self.query} ({self.results_count}{'+' if self.results_capped else ''} results)"
+
+
+class SearchTrendHourly(models.Model):
+    """Searches per normalized query per hour; the compacted form of SearchLog used for trending"""
+    query = models.CharField(max_length=255)
+    hour = models.DateTimeField(db_index=True)
+    count = models.PositiveIntegerField(default=0)
+    zero_results = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-hour', '-count']
+        unique_together = ['query', 'hour']
+        verbose_name = "Search Trend (Hourly)"
+        verbose_name_plural = "Search Trends (Hourly)"
+
+    def __str__(self):
+        return f"{self.query} @ {self.hour:%Y-%m-%d %H:00}: {self.count}"
+
+
+class SearchIndexEntry(models.Model):
+    """Inverted index posting: one token found in one field of an open job/internship"""
+    POST_TYPE_CHOICES = (
+        ('job', 'Job'),
+        ('internship', 'Internship'),
+    )
+    FIELD_CHOICES = (
+        ('title', 'Title'),
+        ('skills', 'Required Skills'),
+        ('description', 'Description'),
+        ('location', 'Location'),
+        ('company', 'Company Name'),
+    )
+
+    post_type = models.CharField(max_length=10, choices=POST_TYPE_CHOICES)
+    post_id = models.PositiveIntegerField()
+    token = models.CharField(max_length=64)
+    field = models.CharField(max_length=20, choices=FIELD_CHOICES)
+    term_frequency = models.PositiveIntegerField(default=1)
+    field_length = models.PositiveIntegerField(default=0, help_text="Number of tokens in the field")
+
+    class Meta:
+        verbose_name = "Search Index Entry"
+        verbose_name_plural = "Search Index Entries"
+        indexes = [
+            models.Index(fields=['post_type', 'token']),
+            models.Index(fields=['post_type', 'post_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.token} -> {self.post_type}#{self.post_id} ({self.field})"
+
+
+class Skill(models.Model):
+    """Canonical skill, shared by postings, profiles and verified badges"""
+    name = models.CharField(max_length=100, help_text="Display name, as first entered")
+    slug = models.CharField(max_length=100, unique=True, help_text="Normalized key, e.g. 'react-native'")
+    jobs = models.ManyToManyField('Job', through='JobSkill', related_name='skill_set', blank=True)
+    internships = models.ManyToManyField('Internship', through='InternshipSkill', related_name='skill_set', blank=True)
+    profiles = models.ManyToManyField('accounts.UserProfile', through='UserProfileSkill', related_name='skill_set', blank=True)
+    badges = models.ManyToManyField('assessments.VerifiedBadge', through='BadgeSkill', related_name='skill_set', blank=True)
+
+    class Meta:
+        ordering = ['name']
+        verbose_name = "Skill"
+        verbose_name_plural = "Skills"
+
+    def __str__(self):
+        return self.name
+
+
+class JobSkill(models.Model):
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='skill_links')
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='job_links')
+
+    class Meta:
+        unique_together = ['job', 'skill']
+
+
+class InternshipSkill(models.Model):
+    internship = models.ForeignKey(Internship, on_delete=models.CASCADE, related_name='skill_links')
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='internship_links')
+
+    class Meta:
+        unique_together = ['internship', 'skill']
+
+
+class UserProfileSkill(models.Model):
+    profile = models.ForeignKey('accounts.UserProfile', on_delete=models.CASCADE, related_name='skill_links')
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='profile_links')
+
+    class Meta:
+        unique_together = ['profile', 'skill']
+        # Reverse index skill -> profiles, used to find the users a new posting matches
+        indexes = [
+            models.Index(fields=['skill', 'profile']),
+        ]
+
+
+class BadgeSkill(models.Model):
+    badge = models.ForeignKey('assessments.VerifiedBadge', on_delete=models.CASCADE, related_name='skill_links')
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='badge_links')
+
+    class Meta:
+        unique_together = ['badge', 'skill']
+
+
+class BackgroundTask(models.Model):
+    """A unit of deferred work, run by the run_task_worker command"""
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    priority = models.SmallIntegerField(default=5, help_text="Higher runs first")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now, help_text="Not picked up before this time (retry backoff)")
+    locked_until = models.DateTimeField(null=True, blank=True, help_text="Visibility timeout of the current attempt")
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'priority', 'run_after']),
+            models.Index(fields=['name', 'finished_at']),
+        ]
+        verbose_name = "Background Task"
+        verbose_name_plural = "Background Tasks"
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+
+class OutboundEmail(models.Model):
+    """Durable outbox: emails are spooled here and delivered in batches by the task worker"""
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    )
+
+    recipients = models.JSONField(default=list)
+    subject = models.CharField(max_length=255)
+    body_text = models.TextField()
+    body_html = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    send_after = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    batch_id = models.CharField(max_length=32, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'send_after']),
+            models.Index(fields=['batch_id']),
+        ]
+        verbose_name = "Outbound Email"
+        verbose_name_plural = "Outbound Emails"
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.status})"
+
+
+class CompanyStats(models.Model):
+    """Materialized dashboard counters for a company (see internships.company_stats)"""
+    company = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='company_stats'
+    )
+    # Signed: an out-of-order decrement must not fail the write that caused it
+    job_posts = models.IntegerField(default=0)
+    internship_posts = models.IntegerField(default=0)
+    active_jobs = models.IntegerField(default=0)
+    active_internships = models.IntegerField(default=0)
+    job_applications = models.IntegerField(default=0)
+    internship_applications = models.IntegerField(default=0)
+    pending_applications = models.IntegerField(default=0)
+    accepted_applications = models.IntegerField(default=0)
+    rejected_applications = models.IntegerField(default=0)
+    interview_applications = models.IntegerField(default=0)
+    total_views = models.IntegerField(default=0)
+    unique_viewers = models.PositiveIntegerField(default=0)
+    unique_ips = models.PositiveIntegerField(default=0)
+    # Cumulative HyperLogLog sketches of the company's job views, folded in by each rollup
+    viewer_sketch = models.BinaryField(blank=True, default=b'')
+    ip_sketch = models.BinaryField(blank=True, default=b'')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Company Stats"
+        verbose_name_plural = "Company Stats"
+
+    def __str__(self):
+        return f"{self.company.username} stats"
+
+    @property
+    def total_posts(self):
+        return self.job_posts + self.internship_posts
+
+    @property
+    def active_posts(self):
+        return self.active_jobs + self.active_internships
+
+    @property
+    def total_applications(self):
+        return self.job_applications + self.internship_applications
+
+
+class PlatformMetricsSnapshot(models.Model):
+    """Periodic snapshot of platform-wide metrics for the staff dashboard history"""
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    total_users = models.PositiveIntegerField(default=0)
+    total_companies = models.PositiveIntegerField(default=0)
+    total_jobs = models.PositiveIntegerField(default=0)
+    total_internships = models.PositiveIntegerField(default=0)
+    total_job_applications = models.PositiveIntegerField(default=0)
+    total_internship_applications = models.PositiveIntegerField(default=0)
+    active_jobs = models.PositiveIntegerField(default=0)
+    active_internships = models.PositiveIntegerField(default=0)
+    pending_companies = models.PositiveIntegerField(default=0)
+    job_apps_by_status = models.JSONField(default=dict, blank=True)
+    intern_apps_by_status = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Platform Metrics Snapshot"
+        verbose_name_plural = "Platform Metrics Snapshots"
+
+    def __str__(self):
+        return f"Metrics at {self.created_at:%Y-%m-%d %H:%M}"
@@ -0,0 +1,157 @@
+"""
+Keyset (cursor) pagination.
+
+Instead of COUNT(*) plus OFFSET, a page is fetched with a WHERE clause
+that continues after (or before) the boundary row of the previous page
+on the ordering keys, e.g. (is_premium, created_at, id) for postings,
+which the (-is_premium, -created_at) index serves directly. Deep pages
+therefore cost the same as the first one. The boundary is passed around
+as an opaque signed ``cursor`` query parameter that also names the keys
+it was made for, so a cursor from another sort order starts over at the
+first page; an optional total is counted up to APPROX_COUNT_CAP rows only.
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core import signing
+from django.db.models import Q
+
+POSTING_KEYS = ('-is_premium', '-created_at', '-pk')
+APPROX_COUNT_CAP = 1000
+CURSOR_SALT = 'internships.pagination'
+# Keys of an offset cursor into an in-memory id list
+OFFSET_KEYS = ('offset',)
+
+
+class KeysetPage:
+    """One page of results with next/previous cursors; iterates like a Paginator page."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None, count=None, count_capped=False):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = count
+        self.count_capped = count_capped
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def _encode(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def make_cursor(values, direction, keys):
+    return signing.dumps(
+        {'v': [_encode(v) for v in values], 'd': direction, 'k': list(keys)},
+        salt=CURSOR_SALT,
+        compress=True,
+    )
+
+
+def read_cursor(cursor, keys):
+    """
+    (values, direction) from a cursor made for `keys`, or (None, 'next')
+    for the first page, a bad cursor or one made for other keys.
+    """
+    if not cursor:
+        return None, 'next'
+    try:
+        data = signing.loads(cursor, salt=CURSOR_SALT)
+        values, direction, cursor_keys = data['v'], data['d'], data['k']
+    except (signing.BadSignature, KeyError, TypeError):
+        return None, 'next'
+    if cursor_keys != list(keys) or len(values) != len(keys) or direction not in ('next', 'prev'):
+        return None, 'next'
+    return values, direction
+
+
+def _after(keys, values, forward):
+    """Rows strictly after the boundary values in the (possibly reversed) key order."""
+    condition = Q()
+    equal = {}
+    for key, value in zip(keys, values):
+        field = key.lstrip('-')
+        descending = key.startswith('-')
+        lookup = 'lt' if descending == forward else 'gt'
+        condition |= Q(**equal, **{f'{field}__{lookup}': value})
+        equal[field] = value
+    return condition
+
+
+def _reversed(keys):
+    return [key[1:] if key.startswith('-') else f'-{key}' for key in keys]
+
+
+def _key_values(obj, keys):
+    return [getattr(obj, key.lstrip('-')) for key in keys]
+
+
+def approximate_count(queryset, cap=APPROX_COUNT_CAP):
+    """(count, capped): the number of rows, counted up to `cap`."""
+    count = queryset.order_by()[: cap + 1].count()
+    return min(count, cap), count > cap
+
+
+def keyset_paginate(queryset, cursor, per_page, keys=POSTING_KEYS, with_count=False):
+    """
+    The page of `queryset` (ordered by `keys`, which must end in a unique
+    field) that `cursor` points at; the first page without one.
+    """
+    values, direction = read_cursor(cursor, keys)
+    forward = direction == 'next'
+    base = queryset
+    if values is not None:
+        queryset = queryset.filter(_after(keys, values, forward))
+    rows = list(queryset.order_by(*(keys if forward else _reversed(keys)))[: per_page + 1])
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if not forward:
+        rows.reverse()
+
+    has_next = more if forward else True
+    has_previous = values is not None if forward else more
+    page = KeysetPage(
+        rows,
+        next_cursor=make_cursor(_key_values(rows[-1], keys), 'next', keys) if rows and has_next else None,
+        previous_cursor=make_cursor(_key_values(rows[0], keys), 'prev', keys) if rows and has_previous else None,
+    )
+    if with_count:
+        page.count, page.count_capped = approximate_count(base)
+    return page
+
+
+def paginate_ids(ids, cursor, per_page):
+    """A page of an in-memory id list (e.g. relevance-ranked ids); the cursor holds the offset."""
+    values, direction = read_cursor(cursor, OFFSET_KEYS)
+    start = values[0] if values is not None and isinstance(values[0], int) else 0
+    if direction == 'prev':
+        start = max(start - per_page, 0)
+    start = min(max(start, 0), len(ids))
+    end = start + per_page
+    return KeysetPage(
+        ids[start:end],
+        next_cursor=make_cursor([end], 'next', OFFSET_KEYS) if end < len(ids) else None,
+        previous_cursor=make_cursor([start], 'prev', OFFSET_KEYS) if start > 0 else None,
+        count=len(ids),
+    )
@@ -0,0 +1,126 @@
+"""
+Platform-wide metrics for the staff dashboard.
+
+compute_metrics() gathers every dashboard figure with a handful of
+grouped queries; get_metrics() serves it from the cache for
+METRICS_CACHE_TTL seconds. ``python manage.py snapshot_platform_metrics``
+(run periodically) stores a PlatformMetricsSnapshot row, so charts over
+time read the snapshot history instead of scanning live tables.
+"""
+
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+METRICS_CACHE_KEY = 'platform_metrics'
+METRICS_CACHE_TTL = 60
+JOBS_PER_MONTH_DAYS = 180
+
+# Scalar metrics stored on each snapshot
+SNAPSHOT_FIELDS = [
+    'total_users',
+    'total_companies',
+    'total_jobs',
+    'total_internships',
+    'total_job_applications',
+    'total_internship_applications',
+    'active_jobs',
+    'active_internships',
+    'pending_companies',
+]
+
+
+def compute_metrics():
+    """All dashboard metrics from live tables, in seven grouped queries."""
+    from accounts.models import CompanyProfile, CustomUser
+
+    from .models import Application, Internship, Job, JobApplication
+
+    users = dict(CustomUser.objects.values_list('user_type').annotate(count=Count('id')).order_by())
+    jobs = Job.objects.aggregate(total=Count('id'), active=Count('id', filter=Q(status='open')))
+    internships = Internship.objects.aggregate(total=Count('id'), active=Count('id', filter=Q(status='open')))
+    job_apps_by_status = dict(
+        JobApplication.objects.values_list('status').annotate(count=Count('id')).order_by('status')
+    )
+    intern_apps_by_status = dict(
+        Application.objects.values_list('status').annotate(count=Count('id')).order_by('status')
+    )
+    pending_companies = CompanyProfile.objects.filter(approval_status='pending').count()
+    jobs_per_month = list(
+        Job.objects.filter(created_at__gte=timezone.now() - timedelta(days=JOBS_PER_MONTH_DAYS))
+        .annotate(month=TruncMonth('created_at'))
+        .values('month')
+        .annotate(count=Count('id'))
+        .order_by('month')
+    )
+
+    return {
+        'total_users': users.get('user', 0),
+        'total_companies': users.get('company', 0),
+        'total_jobs': jobs['total'],
+        'total_internships': internships['total'],
+        'total_job_applications': sum(job_apps_by_status.values()),
+        'total_internship_applications': sum(intern_apps_by_status.values()),
+        'active_jobs': jobs['active'],
+        'active_internships': internships['active'],
+        'pending_companies': pending_companies,
+        'job_apps_by_status': job_apps_by_status,
+        'intern_apps_by_status': intern_apps_by_status,
+        'jobs_per_month': jobs_per_month,
+        'computed_at': timezone.now(),
+    }
+
+
+def get_metrics(refresh=False):
+    """Cached metrics, recomputed when older than METRICS_CACHE_TTL or on refresh."""
+    metrics = None if refresh else cache.get(METRICS_CACHE_KEY)
+    if metrics is None:
+        metrics = compute_metrics()
+        cache.set(METRICS_CACHE_KEY, metrics, METRICS_CACHE_TTL)
+    return metrics
+
+
+# ==================== HISTORY ====================
+
+
+def record_snapshot():
+    """Compute fresh metrics, store them as a snapshot and refresh the cache."""
+    from .models import PlatformMetricsSnapshot
+
+    metrics = get_metrics(refresh=True)
+    return PlatformMetricsSnapshot.objects.create(
+        **{field: metrics[field] for field in SNAPSHOT_FIELDS},
+        job_apps_by_status=metrics['job_apps_by_status'],
+        intern_apps_by_status=metrics['intern_apps_by_status'],
+    )
+
+
+def metrics_history(days=30):
+    """
+    One snapshot per day (the latest of each day) for the last `days`
+    days, oldest first, as a list of dicts with 'date' and the snapshot
+    fields.
+    """
+    from .models import PlatformMetricsSnapshot
+
+    since = timezone.now() - timedelta(days=days)
+    by_day = {}
+    for row in (
+        PlatformMetricsSnapshot.objects.filter(created_at__gte=since)
+        .order_by('created_at')
+        .values('created_at', *SNAPSHOT_FIELDS)
+    ):
+        day = timezone.localdate(row.pop('created_at'))
+        by_day[day] = {'date': day, **row}
+    return [by_day[day] for day in sorted(by_day)]
+
+
+def history_series(history):
+    """Column-oriented form of metrics_history() for charts: {'dates': [...], field: [...]}"""
+    series = {'dates': [entry['date'].isoformat() for entry in history]}
+    for field in SNAPSHOT_FIELDS:
+        series[field] = [entry[field] for entry in history]
+    return series
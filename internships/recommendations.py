@@ -0,0 +1,188 @@
+"""
+Cached job recommendations.
+
+Each user's top RECOMMENDATION_CACHE_SIZE matches are cached under a
+per-user versioned key. The version changes only when the user's profile
+skills change or they apply to a job (see ``internships.signals``), so
+everything else is served from cache until the TTL expires.
+
+Jobs opened (or edited) after a list was cached are recorded in a short
+sequence-numbered log; on the next read they are scored against the
+cached skill set and merged into the list, instead of recomputing it.
+"""
+
+import time
+
+from django.core.cache import cache
+
+from .skills import job_skill_ids, match_skill_ids, skill_names, top_job_matches, user_skill_ids
+
+RECOMMENDATION_CACHE_TTL = 60 * 30
+RECOMMENDATION_CACHE_SIZE = 20
+# Beyond this many jobs opened since a list was cached, recompute it instead of merging
+MAX_MERGE_BACKLOG = 100
+# Added to the match percentage of premium jobs
+PREMIUM_BOOST = 10
+
+JOB_SEQ_KEY = 'recommendations:job_seq'
+
+
+def _version_key(user_id):
+    return f'recommendations:version:{user_id}'
+
+
+def _job_log_key(seq):
+    return f'recommendations:job_log:{seq}'
+
+
+def _cache_key(user_id):
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        version = time.time_ns()
+        cache.set(_version_key(user_id), version, None)
+    return f'recommendations:{user_id}:{version}'
+
+
+def invalidate_recommendations(user_id):
+    """Start a new cache version for the user; the old list simply expires."""
+    cache.set(_version_key(user_id), time.time_ns(), None)
+
+
+def note_job_opened(job_id):
+    """Record an open job so cached lists pick it up on their next read."""
+    try:
+        seq = cache.incr(JOB_SEQ_KEY)
+    except ValueError:
+        seq = 1
+        cache.set(JOB_SEQ_KEY, seq, None)
+    cache.set(_job_log_key(seq), job_id, RECOMMENDATION_CACHE_TTL)
+
+
+# ==================== COMPUTATION ====================
+
+
+def _recommendation_skills(user):
+    """The user's profile skill ids plus skills of jobs they applied to (empty without profile skills)."""
+    from .models import JobSkill
+
+    skills = user_skill_ids([user.pk])[user.pk]
+    if skills:
+        skills |= set(JobSkill.objects.filter(job__job_applications__applicant=user).values_list('skill_id', flat=True))
+    return skills
+
+
+def _items_for(job_premium, user_skills):
+    """Score (job_id, is_premium) pairs: list of cached items with match > 0."""
+    skills_by_job = job_skill_ids([pk for pk, _ in job_premium])
+    names = skill_names(set().union(*skills_by_job.values()))
+    items = []
+    for pk, is_premium in job_premium:
+        match = match_skill_ids(user_skills, skills_by_job[pk], names)
+        if match['match_percentage'] > 0:
+            boost = PREMIUM_BOOST if is_premium else 0
+            items.append(
+                {
+                    'job_id': pk,
+                    'matching_skills': match['matching_skills'],
+                    'missing_skills': match['missing_skills'],
+                    'match_percentage': min(match['match_percentage'] + boost, 100),
+                    'is_premium': is_premium,
+                }
+            )
+    return items
+
+
+def _compute(user, seq):
+    from .models import Job, JobApplication
+
+    user_skills = _recommendation_skills(user)
+    applied_ids = set(JobApplication.objects.filter(applicant=user).values_list('job_id', flat=True))
+    items = []
+    if user_skills:
+        # Score all open jobs at once over their skill bitsets
+        top = top_job_matches(
+            user_skills, RECOMMENDATION_CACHE_SIZE, exclude_ids=applied_ids, premium_boost=PREMIUM_BOOST
+        )
+        premium = dict(Job.objects.filter(pk__in=[pk for pk, _ in top]).values_list('pk', 'is_premium'))
+        items = _items_for([(pk, premium[pk]) for pk, _ in top if pk in premium], user_skills)
+    return {
+        'seq': seq,
+        'user_skills': user_skills,
+        'applied_ids': applied_ids,
+        'items': items,
+    }
+
+
+def _merge_new_jobs(entry, seq):
+    """
+    Score jobs logged since the entry was built and merge them in place.
+    Returns False when the log no longer covers the gap.
+    """
+    from .models import Job
+
+    if seq == entry['seq']:
+        return True
+    if seq - entry['seq'] > MAX_MERGE_BACKLOG:
+        return False
+    logged = cache.get_many([_job_log_key(s) for s in range(entry['seq'] + 1, seq + 1)])
+    if len(logged) != seq - entry['seq']:
+        return False
+
+    new_ids = set(logged.values()) - entry['applied_ids']
+    entry['seq'] = seq
+    if not new_ids or not entry['user_skills']:
+        return True
+
+    job_premium = list(Job.objects.filter(pk__in=new_ids, status='open').values_list('pk', 'is_premium'))
+    # Newer jobs come first among equal matches, as in the full ordering
+    items = _items_for(job_premium, entry['user_skills'])
+    items += [item for item in entry['items'] if item['job_id'] not in new_ids]
+    items.sort(key=lambda x: (-x['match_percentage'], not x['is_premium']))
+    entry['items'] = items[:RECOMMENDATION_CACHE_SIZE]
+    return True
+
+
+def get_recommendations(user, limit=RECOMMENDATION_CACHE_SIZE):
+    """
+    Job recommendations for a user, best first. Returns list of dicts with
+    job, matching_skills, missing_skills, match_percentage, is_premium.
+    """
+    from .models import Job
+
+    key = _cache_key(user.pk)
+    seq = cache.get(JOB_SEQ_KEY, 0)
+    entry = cache.get(key)
+    if entry is None or not _merge_new_jobs(entry, seq):
+        entry = _compute(user, seq)
+    cache.set(key, entry, RECOMMENDATION_CACHE_TTL)
+
+    jobs = (
+        Job.objects.filter(status='open')
+        .select_related('company__company_profile', 'category')
+        .in_bulk([item['job_id'] for item in entry['items']])
+    )
+
+    # Jobs closed since caching are dropped; refill if that left the list short
+    if len(jobs) < min(limit, len(entry['items'])) and len(entry['items']) == RECOMMENDATION_CACHE_SIZE:
+        entry = _compute(user, seq)
+        cache.set(key, entry, RECOMMENDATION_CACHE_TTL)
+        jobs = (
+            Job.objects.filter(status='open')
+            .select_related('company__company_profile', 'category')
+            .in_bulk([item['job_id'] for item in entry['items']])
+        )
+
+    recommendations = []
+    for item in entry['items']:
+        job = jobs.get(item['job_id'])
+        if job is not None:
+            recommendations.append(
+                {
+                    'job': job,
+                    'matching_skills': item['matching_skills'],
+                    'missing_skills': item['missing_skills'],
+                    'match_percentage': item['match_percentage'],
+                    'is_premium': item['is_premium'],
+                }
+            )
+    return recommendations[:limit]
@@ -25,23 +25,20 @@ def _get_post(application):
     return application.internship
 
 
-def _parse_skills(skills_str):
-    """Parse comma-separated skills string into a lowercase set."""
-    if not skills_str:
-        return set()
-    return set(s.strip().lower() for s in skills_str.split(',') if s.strip())
+def _post_skills(post):
+    """Canonical skills of the post as {skill_id: name}."""
+    return dict(post.skill_set.values_list('id', 'name'))
 
 
-def _skill_score(profile, post):
+def _skill_score(profile, post_skills):
     """Calculate skill match percentage."""
-    post_skills = _parse_skills(post.required_skills)
     if not post_skills:
         return 100.0, set(), set()
-    user_skills = _parse_skills(profile.skills) if profile else set()
-    matching = post_skills & user_skills
-    missing = post_skills - user_skills
+    user_skills = set(profile.skill_set.values_list('id', flat=True)) if profile else set()
+    matching = post_skills.keys() & user_skills
+    missing = post_skills.keys() - user_skills
     score = (len(matching) / len(post_skills)) * 100
-    return score, matching, missing
+    return score, {post_skills[i] for i in matching}, {post_skills[i] for i in missing}
 
 
 def _course_score(profile, post):
@@ -81,19 +78,26 @@ def _gpa_score(profile, post):
     return max(0, ratio * 100)
 
 
+def _required_years(post, is_job):
+    """Years of experience a post asks for."""
+    if is_job:
+        required_level = getattr(post, 'experience_level', '')
+        return EXP_MAP.get(required_level, 0)
+    exp_str = getattr(post, 'experience', '') or ''
+    try:
+        return int(''.join(filter(str.isdigit, exp_str)) or '0')
+    except ValueError:
+        return 0
+
+
 def _experience_score(application, post):
     """Calculate experience match score."""
     from internships.models import JobApplication
     if isinstance(application, JobApplication):
-        required_level = getattr(post, 'experience_level', '')
-        required_years = EXP_MAP.get(required_level, 0)
+        required_years = _required_years(post, is_job=True)
         actual_years = application.years_of_experience or 0
     else:
-        exp_str = getattr(post, 'experience', '') or ''
-        try:
-            required_years = int(''.join(filter(str.isdigit, exp_str)) or '0')
-        except ValueError:
-            required_years = 0
+        required_years = _required_years(post, is_job=False)
         actual_years = 0  # Internship applications don't have years_of_experience
 
     if required_years == 0:
@@ -162,19 +166,14 @@ def _profile_completeness_score(profile):
     return min(100.0, float(profile.completeness_score))
 
 
-def _assessment_score(application, post):
+def _assessment_score(application, post_skills):
     """Calculate assessment/badge score for matching skills."""
-    from assessments.models import VerifiedBadge
-    post_skills = _parse_skills(post.required_skills)
-    if not post_skills:
-        return 0.0
-    badges = VerifiedBadge.objects.filter(
-        user=application.applicant
-    ).values_list('skill_name', flat=True)
-    badge_skills = set(s.strip().lower() for s in badges)
-    matching = post_skills & badge_skills
+    from internships.models import BadgeSkill
     if not post_skills:
         return 0.0
+    matching = set(BadgeSkill.objects.filter(
+        badge__user=application.applicant, skill_id__in=post_skills
+    ).values_list('skill_id', flat=True))
     return (len(matching) / len(post_skills)) * 100
 
 
@@ -188,7 +187,8 @@ def calculate_match_score(application):
     is_premium = getattr(post, 'is_premium', False)
 
     # Calculate individual scores
-    skill, matching_skills, missing_skills = _skill_score(profile, post)
+    post_skills = _post_skills(post)
+    skill, matching_skills, missing_skills = _skill_score(profile, post_skills)
     course = _course_score(profile, post)
     gpa = _gpa_score(profile, post)
     experience = _experience_score(application, post)
@@ -196,11 +196,21 @@ def calculate_match_score(application):
     english = _english_score(profile, post)
     internet = _internet_score(profile, post)
     profile_comp = _profile_completeness_score(profile)
-    assessment = _assessment_score(application, post)
+    assessment = _assessment_score(application, post_skills)
+
+    total = _weighted_total(
+        is_premium, skill, course, gpa, experience, location, english, internet, profile_comp, assessment
+    )
+    return _score_dict(
+        skill, course, gpa, experience, location, english, internet, profile_comp, assessment,
+        total, _suggested_status(is_premium, total), matching_skills, missing_skills,
+    )
+
 
-    # Weighted total
+def _weighted_total(is_premium, skill, course, gpa, experience, location, english, internet, profile_comp, assessment):
+    """Weighted total of the sub-scores; works on floats and NumPy arrays alike."""
     if is_premium:
-        total = (
+        return (
             skill * 0.25 +
             course * 0.10 +
             gpa * 0.10 +
@@ -211,35 +221,36 @@ def calculate_match_score(application):
             profile_comp * 0.05 +
             assessment * 0.15
         )
-    else:
-        total = (
-            skill * 0.30 +
-            course * 0.10 +
-            gpa * 0.10 +
-            experience * 0.15 +
-            location * 0.05 +
-            english * 0.10 +
-            internet * 0.05 +
-            profile_comp * 0.05 +
-            assessment * 0.10
-        )
-
-    # Auto-categorize
+    return (
+        skill * 0.30 +
+        course * 0.10 +
+        gpa * 0.10 +
+        experience * 0.15 +
+        location * 0.05 +
+        english * 0.10 +
+        internet * 0.05 +
+        profile_comp * 0.05 +
+        assessment * 0.10
+    )
+
+
+def _suggested_status(is_premium, total):
+    """Auto-categorize a total score."""
     if is_premium:
         if total >= 75:
-            suggested = 'shortlisted'
+            return 'shortlisted'
         elif total >= 50:
-            suggested = 'pending'
-        else:
-            suggested = 'rejected'
-    else:
-        if total >= 70:
-            suggested = 'shortlisted'
-        elif total >= 40:
-            suggested = 'pending'
-        else:
-            suggested = 'rejected'
+            return 'pending'
+        return 'rejected'
+    if total >= 70:
+        return 'shortlisted'
+    elif total >= 40:
+        return 'pending'
+    return 'rejected'
+
 
+def _score_dict(skill, course, gpa, experience, location, english, internet, profile_comp, assessment,
+                total, suggested, matching_skills, missing_skills):
     # Generate skill gap suggestions
     skill_gaps = []
     for s in sorted(missing_skills):
@@ -263,6 +274,26 @@ def calculate_match_score(application):
     }
 
 
+def _result_fields(scores):
+    """AutoScreeningResult field values for a calculate_match_score() dict."""
+    return {
+        'skill_score': scores['skill_score'],
+        'course_score': scores['course_score'],
+        'gpa_score': scores['gpa_score'],
+        'experience_score': scores['experience_score'],
+        'location_score': scores['location_score'],
+        'english_score': scores['english_score'],
+        'internet_score': scores['internet_score'],
+        'profile_score': scores['profile_score'],
+        'assessment_score': scores['assessment_score'],
+        'total_score': scores['total_score'],
+        'suggested_status': scores['suggested_status'],
+        'matching_skills': ', '.join(scores['matching_skills']),
+        'missing_skills': ', '.join(scores['missing_skills']),
+        'skill_gaps': '\n'.join(scores['skill_gaps']),
+    }
+
+
 def auto_screen_application(application):
     """Run auto-screening on a single application and save results."""
     from internships.models import AutoScreeningResult
@@ -279,71 +310,193 @@ def auto_screen_application(application):
     if isinstance(application, JobApplication):
         result, _ = AutoScreeningResult.objects.update_or_create(
             job_application=application,
-            defaults={
-                'skill_score': scores['skill_score'],
-                'course_score': scores['course_score'],
-                'gpa_score': scores['gpa_score'],
-                'experience_score': scores['experience_score'],
-                'location_score': scores['location_score'],
-                'english_score': scores['english_score'],
-                'internet_score': scores['internet_score'],
-                'profile_score': scores['profile_score'],
-                'assessment_score': scores['assessment_score'],
-                'total_score': scores['total_score'],
-                'suggested_status': scores['suggested_status'],
-                'matching_skills': ', '.join(scores['matching_skills']),
-                'missing_skills': ', '.join(scores['missing_skills']),
-                'skill_gaps': '\n'.join(scores['skill_gaps']),
-            }
+            defaults=_result_fields(scores),
         )
     else:
         result, _ = AutoScreeningResult.objects.update_or_create(
             internship_application=application,
-            defaults={
-                'skill_score': scores['skill_score'],
-                'course_score': scores['course_score'],
-                'gpa_score': scores['gpa_score'],
-                'experience_score': scores['experience_score'],
-                'location_score': scores['location_score'],
-                'english_score': scores['english_score'],
-                'internet_score': scores['internet_score'],
-                'profile_score': scores['profile_score'],
-                'assessment_score': scores['assessment_score'],
-                'total_score': scores['total_score'],
-                'suggested_status': scores['suggested_status'],
-                'matching_skills': ', '.join(scores['matching_skills']),
-                'missing_skills': ', '.join(scores['missing_skills']),
-                'skill_gaps': '\n'.join(scores['skill_gaps']),
-            }
+            defaults=_result_fields(scores),
         )
 
     return result
 
 
-def bulk_screen_applications(post):
-    """Screen all pending applications for a job/internship post."""
-    from internships.models import Job, Internship, JobApplication, Application
+# ==================== BATCH SCREENING ====================
 
-    if isinstance(post, Job):
-        applications = JobApplication.objects.filter(
-            job=post, status='pending'
-        ).select_related('applicant__user_profile')
+class _Values:
+    """Stand-in profile carrying just the attributes one scorer reads."""
+    def __init__(self, **attrs):
+        self.__dict__.update(attrs)
+
+
+def _by_value(values, score_for):
+    """Apply a scalar scoring function once per distinct value and spread the results into an array."""
+    import numpy as np
+    cache = {}
+    return np.array([cache[v] if v in cache else cache.setdefault(v, score_for(v)) for v in values], dtype=np.float64)
+
+
+def _level_scores(levels, preferred, level_map):
+    """Column-wise _english_score / _internet_score."""
+    import numpy as np
+    if not preferred.strip():
+        return np.full(len(levels), 100.0)
+    # Blank levels score 0 before an unranked preference scores 100, as in the scalar versions
+    blank = np.array([not level.strip() for level in levels], dtype=bool)
+    required_val = level_map.get(preferred, 0)
+    if required_val == 0:
+        return np.where(blank, 0.0, 100.0)
+    user_val = np.array([level_map.get(level, 0) for level in levels], dtype=np.float64)
+    return np.where(blank, 0.0, np.where(user_val >= required_val, 100.0, (user_val / required_val) * 100))
+
+
+def _skill_matrix(owner_skills, owner_ids, columns):
+    """Boolean (owners x post skills) matrix of which owner has which post skill."""
+    import numpy as np
+    matrix = np.zeros((len(owner_ids), len(columns)), dtype=bool)
+    for row, owner_id in enumerate(owner_ids):
+        for skill_id in owner_skills.get(owner_id, ()):
+            col = columns.get(skill_id)
+            if col is not None:
+                matrix[row, col] = True
+    return matrix
+
+
+def batch_match_scores(post, applications):
+    """
+    calculate_match_score() for many applications to one post at once.
+
+    Profiles come from the applications (select_related), skills and
+    badges are loaded in two queries, and the nine sub-scores are computed
+    as NumPy columns. Returns one score dict per application, in order,
+    identical to calling calculate_match_score() on each.
+    """
+    import numpy as np
+    from internships.models import Job
+    from internships.skills import badge_skill_ids, user_skill_ids
+
+    applications = list(applications)
+    if not applications:
+        return []
+    is_job = isinstance(post, Job)
+    is_premium = getattr(post, 'is_premium', False)
+    profiles = [_get_profile(app) for app in applications]
+    has_profile = np.array([p is not None for p in profiles])
+
+    # Skills and verified badges against the post's skills
+    post_skills = _post_skills(post)
+    skill_ids = list(post_skills)
+    columns = {skill_id: col for col, skill_id in enumerate(skill_ids)}
+    applicant_ids = [app.applicant_id for app in applications]
+    if post_skills:
+        profile_owners = [app.applicant_id if p is not None else None for app, p in zip(applications, profiles)]
+        skills = _skill_matrix(user_skill_ids(applicant_ids), profile_owners, columns)
+        badges = _skill_matrix(badge_skill_ids(applicant_ids), applicant_ids, columns)
+        skill = (skills.sum(axis=1) / len(post_skills)) * 100
+        assessment = (badges.sum(axis=1) / len(post_skills)) * 100
     else:
-        applications = Application.objects.filter(
-            internship=post, status='pending'
-        ).select_related('applicant__user_profile')
+        skills = np.zeros((len(applications), 0), dtype=bool)
+        skill = np.full(len(applications), 100.0)
+        assessment = np.zeros(len(applications))
+
+    # Free-text and Decimal comparisons: scored once per distinct value
+    course = _by_value([(p.course or '') if p else None for p in profiles],
+                       lambda v: _course_score(None if v is None else _Values(course=v), post))
+    location = _by_value([(p.location or '') if p else None for p in profiles],
+                         lambda v: _location_score(None if v is None else _Values(location=v), post))
+    gpa = _by_value([p.gpa if p else None for p in profiles],
+                    lambda v: _gpa_score(_Values(gpa=v), post))
+
+    # Experience
+    required_years = _required_years(post, is_job)
+    if is_job:
+        actual_years = np.array([app.years_of_experience or 0 for app in applications], dtype=np.float64)
+    else:
+        actual_years = np.zeros(len(applications))  # Internship applications don't have years_of_experience
+    if required_years == 0:
+        experience = np.where(actual_years > 0, 100.0, 50.0)
+    else:
+        experience = np.minimum(100.0, (actual_years / required_years) * 100)
+
+    english = _level_scores([(p.english_level or '') if p else '' for p in profiles],
+                            getattr(post, 'preferred_english_level', '') or '', ENGLISH_LEVELS)
+    internet = _level_scores([(p.internet_quality or '') if p else '' for p in profiles],
+                             getattr(post, 'preferred_internet_quality', '') or '', INTERNET_LEVELS)
+    completeness = np.array([p.completeness_score if p else 0 for p in profiles], dtype=np.float64)
+    profile_comp = np.where(has_profile, np.minimum(100.0, completeness), 0.0)
+
+    total = _weighted_total(
+        is_premium, skill, course, gpa, experience, location, english, internet, profile_comp, assessment
+    )
 
     results = []
-    for app in applications:
-        try:
-            result = auto_screen_application(app)
-            results.append(result)
-        except Exception as e:
-            logger.error(f"Screening failed for application {app.pk}: {e}")
+    for i in range(len(applications)):
+        matched = skills[i]
+        results.append(_score_dict(
+            float(skill[i]), float(course[i]), float(gpa[i]), float(experience[i]), float(location[i]),
+            float(english[i]), float(internet[i]), float(profile_comp[i]), float(assessment[i]),
+            float(total[i]), _suggested_status(is_premium, float(total[i])),
+            {post_skills[sid] for sid, has in zip(skill_ids, matched) if has},
+            {post_skills[sid] for sid, has in zip(skill_ids, matched) if not has},
+        ))
+    return results
+
+
+def _screen_batch(post, applications):
+    """
+    Score applications in bulk and persist match scores and screening
+    results in one transaction. Returns the AutoScreeningResult objects.
+    """
+    from django.db import transaction
+    from internships.models import Job, JobApplication, Application, AutoScreeningResult
+
+    applications = list(applications)
+    all_scores = batch_match_scores(post, applications)
+    owner_field = 'job_application' if isinstance(post, Job) else 'internship_application'
 
+    results = []
+    for app, scores in zip(applications, all_scores):
+        app.match_score = Decimal(str(scores['total_score']))
+        app.auto_status = scores['suggested_status']
+        results.append(AutoScreeningResult(**{owner_field: app}, **_result_fields(scores)))
+
+    with transaction.atomic():
+        model = JobApplication if isinstance(post, Job) else Application
+        model.objects.bulk_update(applications, ['match_score', 'auto_status'], batch_size=500)
+        AutoScreeningResult.objects.bulk_create(
+            results,
+            update_conflicts=True,
+            unique_fields=[owner_field],
+            update_fields=list(_result_fields(all_scores[0])) if all_scores else [],
+            batch_size=500,
+        )
     return results
 
 
+def _pending_applications(post):
+    from internships.models import Job, JobApplication, Application
+
+    if isinstance(post, Job):
+        return JobApplication.objects.filter(
+            job=post, status='pending'
+        ).select_related('applicant__user_profile')
+    return Application.objects.filter(
+        internship=post, status='pending'
+    ).select_related('applicant__user_profile')
+
+
+def bulk_screen_applications(post):
+    """Screen all pending applications for a job/internship post."""
+    applications = list(_pending_applications(post))
+    if not applications:
+        return []
+    try:
+        return _screen_batch(post, applications)
+    except Exception as e:
+        logger.error(f"Screening failed for post {post.pk}: {e}")
+        return []
+
+
 def apply_auto_screening(post):
     """
     Screen and automatically update statuses for pending applications.
@@ -352,43 +505,42 @@ def apply_auto_screening(post):
     if not getattr(post, 'auto_screen_enabled', False):
         return []
 
+    from django.db import transaction
     from internships.models import Job, JobApplication, Application, StatusChange
+    from internships.company_stats import adjust_company_stats, status_deltas
 
-    if isinstance(post, Job):
-        applications = JobApplication.objects.filter(
-            job=post, status='pending'
-        ).select_related('applicant__user_profile')
-    else:
-        applications = Application.objects.filter(
-            internship=post, status='pending'
-        ).select_related('applicant__user_profile')
+    applications = list(_pending_applications(post))
+    if not applications:
+        return []
+    try:
+        results = _screen_batch(post, applications)
+    except Exception as e:
+        logger.error(f"Auto-screening failed for post {post.pk}: {e}")
+        return []
 
     updated = []
-    for app in applications:
-        try:
-            result = auto_screen_application(app)
-            suggested = result.suggested_status
-            if suggested and suggested != app.status:
-                old_status = app.status
-                app.status = suggested
-                app.save(update_fields=['status'])
-                # Record status change
-                if isinstance(post, Job):
-                    StatusChange.objects.create(
-                        job_application=app,
-                        old_status=old_status,
-                        new_status=suggested,
-                        note=f"Auto-screened (score: {result.total_score}%)",
-                    )
-                else:
-                    StatusChange.objects.create(
-                        internship_application=app,
-                        old_status=old_status,
-                        new_status=suggested,
-                        note=f"Auto-screened (score: {result.total_score}%)",
-                    )
-                updated.append(app)
-        except Exception as e:
-            logger.error(f"Auto-screening failed for application {app.pk}: {e}")
+    changes = []
+    owner_field = 'job_application' if isinstance(post, Job) else 'internship_application'
+    for app, result in zip(applications, results):
+        suggested = result.suggested_status
+        if suggested and suggested != app.status:
+            # Record status change
+            changes.append(StatusChange(**{
+                owner_field: app,
+                'old_status': app.status,
+                'new_status': suggested,
+                'note': f"Auto-screened (score: {result.total_score}%)",
+            }))
+            app.status = suggested
+            updated.append(app)
+
+    with transaction.atomic():
+        model = JobApplication if isinstance(post, Job) else Application
+        model.objects.bulk_update(updated, ['status'], batch_size=500)
+        StatusChange.objects.bulk_create(changes, batch_size=500)
+        # bulk_update skips the signal that maintains the company counters
+        adjust_company_stats(post.company_id, **status_deltas((c.old_status, c.new_status) for c in changes))
+    for app in updated:
+        app._stats_status = app.status
 
     return updated
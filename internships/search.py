@@ -3,10 +3,22 @@ Advanced search engine for the Remotely Internship Platform.
 Handles smart keyword parsing, relevance scoring, skill matching,
 auto-suggestions, and trending searches.
 """
-from django.db.models import Q, F
+from django.db.models import IntegerField, Q, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from datetime import timedelta
-from collections import Counter
+from collections import deque
+
+from .facets import all_locations, all_skill_names
+from .pagination import POSTING_KEYS, approximate_count
+from .search_index import MAX_RANKED, filter_by_keywords, rank_ids, score_postings, top_scored
+from .search_trends import log_search, trending_searches
+from .suggestions import get_suggestions
+from .skills import filter_by_skills, parse_skills
+
+
+# Sorts postings without a minimum salary after all others
+SALARY_SORT_MAX = 2 ** 31 - 1
 
 
 # ==================== SMART KEYWORD PARSER ====================
@@ -59,6 +71,95 @@ EXPERIENCE_KEYWORDS = {
 }
 
 
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over a fixed keyword set.
+
+    Built once; find_all() reports every keyword occurrence in a single
+    left-to-right pass over the text. Only occurrences delimited by
+    non-alphanumeric characters (word boundaries) are reported, so
+    "java" does not match inside "javascript" and "ft" not inside "software".
+    """
+
+    def __init__(self, keywords):
+        """keywords: iterable of (keyword, payload) pairs."""
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for keyword, payload in keywords:
+            self._add(keyword, payload)
+        self._build_failure_links()
+
+    def _add(self, keyword, payload):
+        node = 0
+        for char in keyword:
+            nxt = self._goto[node].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = nxt
+        self._output[node].append((len(keyword), keyword, payload))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find_all(self, text):
+        """Return (start, end, keyword, payload) for each word-bounded occurrence."""
+        matches = []
+        goto, fail, output = self._goto, self._fail, self._output
+        node = 0
+        for i, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length, keyword, payload in output[node]:
+                start = i - length + 1
+                if start > 0 and text[start - 1].isalnum():
+                    continue
+                if i + 1 < len(text) and text[i + 1].isalnum():
+                    continue
+                matches.append((start, i + 1, keyword, payload))
+        return matches
+
+
+# Facet dictionaries in priority order: the first value (in dict order) with a hit wins
+_FACET_KEYWORDS = (
+    ('detected_work_mode', WORK_MODE_KEYWORDS),
+    ('detected_job_type', JOB_TYPE_KEYWORDS),
+    ('detected_experience', EXPERIENCE_KEYWORDS),
+)
+
+# Original list position, used to keep the historical longest-first skill order stable
+_SKILL_ORDER = {skill: i for i, skill in enumerate(COMMON_SKILLS)}
+
+
+def _build_query_matcher():
+    keywords = [(skill, ('skill', skill, 0)) for skill in COMMON_SKILLS]
+    for facet, groups in _FACET_KEYWORDS:
+        rank = 0
+        for value, words in groups.items():
+            for word in words:
+                keywords.append((word, (facet, value, rank)))
+                rank += 1
+    return KeywordMatcher(keywords)
+
+
+QUERY_MATCHER = _build_query_matcher()
+
+
 def parse_smart_query(query_text):
     """
     Parse a natural language search query and extract structured filters.
@@ -69,66 +170,47 @@ def parse_smart_query(query_text):
         return {'keywords': '', 'detected_skills': [], 'detected_work_mode': None,
                 'detected_job_type': None, 'detected_experience': None, 'detected_location': None}
 
-    import re
     query_lower = query_text.lower().strip()
-    remaining = query_lower
+    matches = QUERY_MATCHER.find_all(query_lower)
 
-    # Detect skills (use word boundaries for short skills to avoid false positives)
+    # Skills: longest non-overlapping occurrences win, each skill reported once
+    skill_matches = sorted(
+        (m for m in matches if m[3][0] == 'skill'),
+        key=lambda m: (m[0] - m[1], m[0]),
+    )
+    taken = []
     detected_skills = []
-    for skill in sorted(COMMON_SKILLS, key=len, reverse=True):
-        if len(skill) <= 3:
-            # Short skills need boundary check (use lookarounds for non-word char skills like c++, c#)
-            pattern = r'(?<![a-zA-Z0-9])' + re.escape(skill) + r'(?![a-zA-Z0-9])'
-            if re.search(pattern, remaining):
-                detected_skills.append(skill)
-                remaining = re.sub(pattern, ' ', remaining, count=1)
-        else:
-            if skill in remaining:
-                detected_skills.append(skill)
-                remaining = remaining.replace(skill, ' ', 1)
-
-    # Detect work mode
-    detected_work_mode = None
-    for mode, keywords in WORK_MODE_KEYWORDS.items():
-        for kw in keywords:
-            if kw in query_lower:
-                detected_work_mode = mode
-                remaining = remaining.replace(kw, ' ', 1)
-                break
-        if detected_work_mode:
-            break
-
-    # Detect job type
-    detected_job_type = None
-    for jtype, keywords in JOB_TYPE_KEYWORDS.items():
-        for kw in keywords:
-            if kw in query_lower:
-                detected_job_type = jtype
-                remaining = remaining.replace(kw, ' ', 1)
-                break
-        if detected_job_type:
-            break
-
-    # Detect experience level
-    detected_experience = None
-    for exp, keywords in EXPERIENCE_KEYWORDS.items():
-        for kw in keywords:
-            if kw in query_lower:
-                detected_experience = exp
-                remaining = remaining.replace(kw, ' ', 1)
-                break
-        if detected_experience:
-            break
-
-    # Clean remaining as general keywords
-    keywords = ' '.join(remaining.split()).strip()
+    for start, end, skill, _payload in skill_matches:
+        if skill in detected_skills or any(start < t_end and t_start < end for t_start, t_end in taken):
+            continue
+        taken.append((start, end))
+        detected_skills.append(skill)
+    detected_skills.sort(key=lambda skill: (-len(skill), _SKILL_ORDER[skill]))
+
+    # Work mode, job type, experience: highest-priority keyword per facet
+    detected = {facet: None for facet, _groups in _FACET_KEYWORDS}
+    best = {}
+    for start, end, _keyword, (facet, value, rank) in matches:
+        if facet == 'skill':
+            continue
+        if facet not in best or (rank, start) < best[facet][0]:
+            best[facet] = ((rank, start), value, (start, end))
+    for facet, (_key, value, span) in best.items():
+        detected[facet] = value
+        taken.append(span)
+
+    # Whatever was not recognised remains as general keywords
+    remaining = list(query_lower)
+    for start, end in taken:
+        remaining[start:end] = ' ' * (end - start)
+    keywords = ' '.join(''.join(remaining).split()).strip()
 
     return {
         'keywords': keywords,
         'detected_skills': detected_skills,
-        'detected_work_mode': detected_work_mode,
-        'detected_job_type': detected_job_type,
-        'detected_experience': detected_experience,
+        'detected_work_mode': detected['detected_work_mode'],
+        'detected_job_type': detected['detected_job_type'],
+        'detected_experience': detected['detected_experience'],
         'detected_location': None,  # Location detection from keywords is ambiguous, use explicit filter
     }
 
@@ -143,32 +225,53 @@ def calculate_skill_match(user_skills_str, job_skills_str):
     if not user_skills_str or not job_skills_str:
         return {'match_percentage': 0, 'matching_skills': [], 'missing_skills': []}
 
-    user_skills = {s.strip().lower() for s in user_skills_str.split(',') if s.strip()}
-    job_skills = {s.strip().lower() for s in job_skills_str.split(',') if s.strip()}
+    user_skills = parse_skills(user_skills_str)
+    job_skills = parse_skills(job_skills_str)
 
     if not job_skills:
         return {'match_percentage': 0, 'matching_skills': [], 'missing_skills': []}
 
-    matching = user_skills & job_skills
-    missing = job_skills - user_skills
+    matching = job_skills.keys() & user_skills.keys()
+    missing = job_skills.keys() - user_skills.keys()
 
     percentage = int((len(matching) / len(job_skills)) * 100) if job_skills else 0
 
     return {
         'match_percentage': percentage,
-        'matching_skills': sorted(matching),
-        'missing_skills': sorted(missing),
+        'matching_skills': sorted(job_skills[s] for s in matching),
+        'missing_skills': sorted(job_skills[s] for s in missing),
     }
 
 
 # ==================== RELEVANCE SCORING ====================
 
+def _log_search(request, query, queryset, ranked_ids, scores):
+    """
+    Log a keyword search with its number of results and return that as
+    (count, capped): the ranked ids, capped if more than MAX_RANKED
+    postings matched, otherwise counted up to APPROX_COUNT_CAP.
+    (None, False) without a query.
+    """
+    if not query:
+        return None, False
+    if ranked_ids is not None:
+        count, capped = len(ranked_ids), len(scores) > MAX_RANKED
+    else:
+        count, capped = approximate_count(queryset)
+    log_search(query, getattr(request, 'user', None), count, capped)
+    return count, capped
+
+
 def search_jobs(request, queryset=None):
     """
     Advanced job search with smart parsing, filtering, sorting, and relevance scoring.
     Returns context dict with results, parsed query info, and metadata.
+    For relevance-sorted keyword queries 'ranked_ids' holds the BM25-ordered ids
+    of the MAX_RANKED best-scoring matches.
+    Keyword searches also return their number of results as 'count' ('count_capped'
+    if only counted up to the cap).
     """
-    from .models import Job, SearchLog
+    from .models import Job
 
     if queryset is None:
         queryset = Job.objects.filter(status='open').select_related('company__company_profile', 'category')
@@ -179,19 +282,19 @@ def search_jobs(request, queryset=None):
     # Smart parse the query
     parsed = parse_smart_query(query)
 
+    sort_by = params.get('sort', 'relevance')
+
     # === KEYWORD SEARCH ===
+    # Answered from the inverted index; detected skills widen the match
+    scores = None
     if query:
-        keyword_q = (
-            Q(title__icontains=query) |
-            Q(description__icontains=query) |
-            Q(required_skills__icontains=query) |
-            Q(location__icontains=query) |
-            Q(company__company_profile__company_name__icontains=query)
-        )
-        # Also search for individual detected skills
-        for skill in parsed['detected_skills']:
-            keyword_q |= Q(required_skills__icontains=skill)
-        queryset = queryset.filter(keyword_q)
+        if sort_by == 'relevance':
+            scores = score_postings('job', parsed['keywords'], parsed['detected_skills'])
+            if scores is not None:
+                # Ranked among the best-scoring matches only (see top_scored)
+                queryset = queryset.filter(pk__in=top_scored(scores, MAX_RANKED))
+        else:
+            queryset = filter_by_keywords(queryset, 'job', parsed['keywords'], parsed['detected_skills'])
 
     # === EXPLICIT FILTERS ===
     # Job type
@@ -214,27 +317,6 @@ def search_jobs(request, queryset=None):
     if remote == 'yes':
         queryset = queryset.filter(Q(is_remote=True) | Q(work_mode='remote'))
 
-    # Category
-    category = params.get('category', '')
-    if category:
-        queryset = queryset.filter(category__slug=category)
-
-    # Skills filter (multi-select, OR logic)
-    skills = params.getlist('skills')
-    if skills:
-        skills_q = Q()
-        for skill in skills:
-            s = skill.strip()
-            if s:
-                skills_q |= Q(required_skills__icontains=s)
-        if skills_q:
-            queryset = queryset.filter(skills_q)
-
-    # Location
-    location = params.get('location', '')
-    if location:
-        queryset = queryset.filter(location__icontains=location)
-
     # Date posted
     date_posted = params.get('date_posted', '')
     if date_posted == '24h':
@@ -259,28 +341,49 @@ def search_jobs(request, queryset=None):
         except ValueError:
             pass
 
+    # === FACET FILTERS ===
+    # Applied last so facet counts can start from the search without them
+    facet_base = queryset
+
+    # Category
+    category = params.get('category', '')
+    if category:
+        queryset = queryset.filter(category__slug=category)
+
+    # Skills filter (multi-select, OR logic, exact canonical skills)
+    skills = params.getlist('skills')
+    if skills:
+        queryset = filter_by_skills(queryset, skills)
+
+    # Location
+    location = params.get('location', '')
+    if location:
+        queryset = queryset.filter(location__icontains=location)
+
     # === SORTING ===
-    sort_by = params.get('sort', 'relevance')
-    if sort_by == 'latest':
-        queryset = queryset.order_by('-is_premium', '-created_at')
-    elif sort_by == 'salary_high':
-        queryset = queryset.order_by('-is_premium', F('salary_max').desc(nulls_last=True))
+    # sort_keys end in pk so results can be keyset-paginated (see internships.pagination)
+    ranked_ids = None
+    sort_keys = POSTING_KEYS
+    if sort_by == 'salary_high':
+        # Postings without a salary last
+        queryset = queryset.annotate(salary_sort=Coalesce('salary_max', Value(-1), output_field=IntegerField()))
+        sort_keys = ('-is_premium', '-salary_sort', '-pk')
     elif sort_by == 'salary_low':
-        queryset = queryset.order_by('-is_premium', F('salary_min').asc(nulls_last=True))
-    else:
-        # Relevance: premium first, then by created_at
-        queryset = queryset.order_by('-is_premium', '-created_at')
-
-    # === LOG SEARCH ===
-    if query:
-        SearchLog.objects.create(
-            query=query,
-            user=request.user if request.user.is_authenticated else None,
-            results_count=queryset.count(),
-        )
+        queryset = queryset.annotate(salary_sort=Coalesce('salary_min', Value(SALARY_SORT_MAX), output_field=IntegerField()))
+        sort_keys = ('-is_premium', 'salary_sort', 'pk')
+    queryset = queryset.order_by(*sort_keys)
+    if sort_by not in ('latest', 'salary_high', 'salary_low') and scores is not None:
+        # Relevance: premium first, then BM25 score (falls back to recency without a query)
+        ranked_ids = rank_ids(list(queryset.values_list('pk', 'is_premium', 'created_at')), scores)
+    count, count_capped = _log_search(request, query, queryset, ranked_ids, scores)
 
     return {
         'queryset': queryset,
+        'facet_base': facet_base,
+        'ranked_ids': ranked_ids,
+        'sort_keys': sort_keys,
+        'count': count,
+        'count_capped': count_capped,
         'query': query,
         'parsed': parsed,
         'filters': {
@@ -304,7 +407,7 @@ def search_internships(request, queryset=None):
     Advanced internship search with smart parsing, filtering, sorting.
     Returns context dict with results and metadata.
     """
-    from .models import Internship, SearchLog
+    from .models import Internship
 
     if queryset is None:
         queryset = Internship.objects.filter(status='open').select_related('company__company_profile', 'category')
@@ -314,18 +417,18 @@ def search_internships(request, queryset=None):
 
     parsed = parse_smart_query(query)
 
+    sort_by = params.get('sort', 'relevance')
+
     # === KEYWORD SEARCH ===
+    scores = None
     if query:
-        keyword_q = (
-            Q(title__icontains=query) |
-            Q(description__icontains=query) |
-            Q(required_skills__icontains=query) |
-            Q(location__icontains=query) |
-            Q(company__company_profile__company_name__icontains=query)
-        )
-        for skill in parsed['detected_skills']:
-            keyword_q |= Q(required_skills__icontains=skill)
-        queryset = queryset.filter(keyword_q)
+        if sort_by == 'relevance':
+            scores = score_postings('internship', parsed['keywords'], parsed['detected_skills'])
+            if scores is not None:
+                # Ranked among the best-scoring matches only (see top_scored)
+                queryset = queryset.filter(pk__in=top_scored(scores, MAX_RANKED))
+        else:
+            queryset = filter_by_keywords(queryset, 'internship', parsed['keywords'], parsed['detected_skills'])
 
     # === EXPLICIT FILTERS ===
     internship_type = params.get('type', '')
@@ -336,50 +439,45 @@ def search_internships(request, queryset=None):
     if work_mode:
         queryset = queryset.filter(work_mode=work_mode)
 
+    date_posted = params.get('date_posted', '')
+    if date_posted == '24h':
+        queryset = queryset.filter(created_at__gte=timezone.now() - timedelta(hours=24))
+    elif date_posted == '7d':
+        queryset = queryset.filter(created_at__gte=timezone.now() - timedelta(days=7))
+    elif date_posted == '30d':
+        queryset = queryset.filter(created_at__gte=timezone.now() - timedelta(days=30))
+
+    # Facet filters last, so facet counts can start from the search without them
+    facet_base = queryset
+
     category = params.get('category', '')
     if category:
         queryset = queryset.filter(category__slug=category)
 
-    # Skills filter (multi-select, OR logic)
+    # Skills filter (multi-select, OR logic, exact canonical skills)
     skills = params.getlist('skills')
     if skills:
-        skills_q = Q()
-        for skill in skills:
-            s = skill.strip()
-            if s:
-                skills_q |= Q(required_skills__icontains=s)
-        if skills_q:
-            queryset = queryset.filter(skills_q)
+        queryset = filter_by_skills(queryset, skills)
 
     location = params.get('location', '')
     if location:
         queryset = queryset.filter(location__icontains=location)
 
-    date_posted = params.get('date_posted', '')
-    if date_posted == '24h':
-        queryset = queryset.filter(created_at__gte=timezone.now() - timedelta(hours=24))
-    elif date_posted == '7d':
-        queryset = queryset.filter(created_at__gte=timezone.now() - timedelta(days=7))
-    elif date_posted == '30d':
-        queryset = queryset.filter(created_at__gte=timezone.now() - timedelta(days=30))
-
     # Sorting
-    sort_by = params.get('sort', 'relevance')
-    if sort_by == 'latest':
-        queryset = queryset.order_by('-is_premium', '-created_at')
-    else:
-        queryset = queryset.order_by('-is_premium', '-created_at')
-
-    # Log search
-    if query:
-        SearchLog.objects.create(
-            query=query,
-            user=request.user if request.user.is_authenticated else None,
-            results_count=queryset.count(),
-        )
+    ranked_ids = None
+    sort_keys = POSTING_KEYS
+    queryset = queryset.order_by(*sort_keys)
+    if sort_by == 'relevance' and scores is not None:
+        ranked_ids = rank_ids(list(queryset.values_list('pk', 'is_premium', 'created_at')), scores)
+    count, count_capped = _log_search(request, query, queryset, ranked_ids, scores)
 
     return {
         'queryset': queryset,
+        'facet_base': facet_base,
+        'ranked_ids': ranked_ids,
+        'sort_keys': sort_keys,
+        'count': count,
+        'count_capped': count_capped,
         'query': query,
         'parsed': parsed,
         'filters': {
@@ -399,66 +497,17 @@ def search_internships(request, queryset=None):
 def get_auto_suggestions(query, limit=10):
     """
     Get auto-suggestions based on partial query.
-    Returns dict with skill_suggestions, title_suggestions, location_suggestions.
+    Returns dict with skills, titles, locations and companies, served from
+    the in-memory prefix index in internships.suggestions.
     """
-    from .models import Job, Internship
-
-    if not query or len(query) < 2:
-        return {'skills': [], 'titles': [], 'locations': []}
-
-    query_lower = query.lower().strip()
-
-    # Skill suggestions from common skills list
-    skill_suggestions = [s for s in COMMON_SKILLS if query_lower in s][:limit]
-
-    # Title suggestions from existing jobs/internships
-    title_suggestions = list(
-        Job.objects.filter(status='open', title__icontains=query)
-        .values_list('title', flat=True)
-        .distinct()[:limit]
-    )
-    title_suggestions += list(
-        Internship.objects.filter(status='open', title__icontains=query)
-        .values_list('title', flat=True)
-        .distinct()[:limit]
-    )
-    title_suggestions = list(dict.fromkeys(title_suggestions))[:limit]
-
-    # Location suggestions
-    location_suggestions = list(
-        Job.objects.filter(status='open', location__icontains=query)
-        .values_list('location', flat=True)
-        .distinct()[:limit]
-    )
-    location_suggestions += list(
-        Internship.objects.filter(status='open', location__icontains=query)
-        .values_list('location', flat=True)
-        .distinct()[:limit]
-    )
-    location_suggestions = list(dict.fromkeys(location_suggestions))[:limit]
-
-    return {
-        'skills': skill_suggestions,
-        'titles': title_suggestions,
-        'locations': location_suggestions,
-    }
+    return get_suggestions(query, limit=limit)
 
 
 # ==================== TRENDING SEARCHES ====================
 
 def get_trending_searches(days=7, limit=10):
-    """Get trending search queries from the last N days."""
-    from .models import SearchLog
-
-    since = timezone.now() - timedelta(days=days)
-    recent_searches = (
-        SearchLog.objects.filter(created_at__gte=since)
-        .values_list('query', flat=True)
-    )
-
-    # Count and return most common
-    counter = Counter(q.lower().strip() for q in recent_searches if q.strip())
-    return [{'query': q, 'count': c} for q, c in counter.most_common(limit)]
+    """Get trending search queries from the last N days (hourly counters, see search_trends)."""
+    return trending_searches(days=days, limit=limit)
 
 
 # ==================== RECOMMENDED JOBS ====================
@@ -467,90 +516,19 @@ def get_recommended_jobs(user, limit=20):
     """
     Get job recommendations based on user's profile skills and past applications.
     Returns list of dicts with job, matching_skills, match_percentage.
+    Served from the per-user cache in internships.recommendations.
     """
-    from .models import Job, JobApplication
-    from accounts.models import UserProfile
-
-    try:
-        profile = UserProfile.objects.get(user=user)
-        user_skills = {s.strip().lower() for s in profile.skills.split(',') if s.strip()}
-    except UserProfile.DoesNotExist:
-        user_skills = set()
-
-    if not user_skills:
-        return []
-
-    # Get skills from past applications too
-    past_job_skills = (
-        JobApplication.objects.filter(applicant=user)
-        .values_list('job__required_skills', flat=True)
-    )
-    for skills_str in past_job_skills:
-        if skills_str:
-            for s in skills_str.split(','):
-                if s.strip():
-                    user_skills.add(s.strip().lower())
-
-    # Already applied job IDs
-    applied_ids = set(
-        JobApplication.objects.filter(applicant=user).values_list('job_id', flat=True)
-    )
-
-    jobs = Job.objects.filter(status='open').select_related('company__company_profile', 'category')
-
-    recommendations = []
-    for job in jobs:
-        if job.pk in applied_ids:
-            continue
-
-        match = calculate_skill_match(','.join(user_skills), job.required_skills)
-        if match['match_percentage'] > 0:
-            # Premium boost
-            boost = 10 if job.is_premium else 0
-            recommendations.append({
-                'job': job,
-                'matching_skills': match['matching_skills'],
-                'missing_skills': match['missing_skills'],
-                'match_percentage': min(match['match_percentage'] + boost, 100),
-                'is_premium': job.is_premium,
-            })
-
-    recommendations.sort(key=lambda x: (-x['match_percentage'], not x['is_premium']))
-    return recommendations[:limit]
+    from .recommendations import get_recommendations
+    return get_recommendations(user, limit=limit)
 
 
 # ==================== ALL AVAILABLE SKILLS ====================
 
 def get_all_available_skills():
     """Get all unique skills from open jobs and internships."""
-    from .models import Job, Internship
-
-    skills = set()
-    for skills_str in Job.objects.filter(status='open').values_list('required_skills', flat=True):
-        if skills_str:
-            for s in skills_str.split(','):
-                if s.strip():
-                    skills.add(s.strip())
-
-    for skills_str in Internship.objects.filter(status='open').values_list('required_skills', flat=True):
-        if skills_str:
-            for s in skills_str.split(','):
-                if s.strip():
-                    skills.add(s.strip())
-
-    return sorted(skills, key=str.lower)
+    return all_skill_names()
 
 
 def get_all_locations():
     """Get all unique locations from open jobs and internships."""
-    from .models import Job, Internship
-
-    locations = set()
-    for loc in Job.objects.filter(status='open').values_list('location', flat=True).distinct():
-        if loc:
-            locations.add(loc.strip())
-    for loc in Internship.objects.filter(status='open').values_list('location', flat=True).distinct():
-        if loc:
-            locations.add(loc.strip())
-
-    return sorted(locations, key=str.lower)
+    return all_locations()
@@ -0,0 +1,424 @@
+"""
+Inverted index for job and internship keyword search.
+
+Every open posting is tokenized into SearchIndexEntry rows
+(token -> posting id, field, term frequency), so keyword queries are
+answered with indexed token lookups instead of LIKE '%x%' scans over
+every open posting. The index is kept current by the signal handlers in
+``internships.signals`` and can be rebuilt with
+``python manage.py rebuild_search_index``.
+"""
+
+import heapq
+import re
+from collections import Counter
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import Q
+
+# Relative importance of each indexed field
+FIELD_WEIGHTS = {
+    'title': 3.0,
+    'skills': 2.0,
+    'company': 1.5,
+    'location': 1.0,
+    'description': 1.0,
+}
+
+# Model fields whose change requires reindexing a posting
+INDEXED_FIELDS = {'title', 'required_skills', 'description', 'location', 'status', 'company'}
+
+MAX_TOKEN_LENGTH = 64
+
+# Keeps technology names like c++, c#, node.js and .net intact
+TOKEN_RE = re.compile(r'[a-z0-9.][a-z0-9+#.]*')
+
+STOP_WORDS = {
+    'a',
+    'an',
+    'and',
+    'are',
+    'as',
+    'at',
+    'be',
+    'by',
+    'for',
+    'from',
+    'in',
+    'is',
+    'it',
+    'of',
+    'on',
+    'or',
+    'our',
+    'the',
+    'to',
+    'we',
+    'with',
+    'you',
+    'your',
+    'will',
+}
+
+
+def tokenize(text):
+    """Split free text into lowercase search tokens."""
+    if not text:
+        return []
+    tokens = []
+    for token in TOKEN_RE.findall(text.lower()):
+        token = token.rstrip('.')
+        if token.startswith('..'):
+            token = token.lstrip('.')
+        if token and token not in STOP_WORDS:
+            tokens.append(token[:MAX_TOKEN_LENGTH])
+    return tokens
+
+
+def skill_terms(skills_str):
+    """
+    Tokens for a comma-separated skills string: each whole skill
+    (e.g. "react native") plus its individual words.
+    """
+    if not skills_str:
+        return []
+    terms = []
+    for skill in skills_str.split(','):
+        phrase = ' '.join(skill.lower().split())
+        if not phrase:
+            continue
+        words = tokenize(phrase)
+        if len(words) != 1 or words[0] != phrase:
+            terms.append(phrase[:MAX_TOKEN_LENGTH])
+        terms.extend(words)
+    return terms
+
+
+def post_type_for(post):
+    """Return the index post_type for a Job or Internship instance."""
+    from .models import Job
+
+    return 'job' if isinstance(post, Job) else 'internship'
+
+
+def company_name(post):
+    """The posting company's profile name, or '' without a profile."""
+    try:
+        return post.company.company_profile.company_name
+    except ObjectDoesNotExist:
+        return ''
+
+
+def posting_fields(post):
+    return {
+        'title': tokenize(post.title),
+        'skills': skill_terms(post.required_skills),
+        'description': tokenize(post.description),
+        'location': tokenize(post.location),
+        'company': tokenize(company_name(post)),
+    }
+
+
+# ==================== INDEX MAINTENANCE ====================
+
+
+def remove_posting(post_type, post_id):
+    """Drop all index entries of a posting."""
+    remove_postings(post_type, [post_id])
+
+
+def remove_postings(post_type, post_ids):
+    """Drop all index entries of several postings of a type."""
+    from .models import SearchIndexEntry
+
+    SearchIndexEntry.objects.filter(post_type=post_type, post_id__in=post_ids).delete()
+
+
+def index_posting(post):
+    """
+    (Re)index a single Job or Internship. Closed postings are removed
+    from the index. Returns the number of entries written.
+    """
+    from .models import SearchIndexEntry
+
+    post_type = post_type_for(post)
+    with transaction.atomic():
+        remove_posting(post_type, post.pk)
+        if post.status != 'open':
+            return 0
+
+        entries = []
+        for field, tokens in posting_fields(post).items():
+            for token, tf in Counter(tokens).items():
+                entries.append(
+                    SearchIndexEntry(
+                        post_type=post_type,
+                        post_id=post.pk,
+                        token=token,
+                        field=field,
+                        term_frequency=tf,
+                        field_length=len(tokens),
+                    )
+                )
+        SearchIndexEntry.objects.bulk_create(entries, batch_size=500)
+    return len(entries)
+
+
+def rebuild_index():
+    """Rebuild the whole index from open jobs and internships."""
+    from .models import Internship, Job, SearchIndexEntry
+
+    SearchIndexEntry.objects.all().delete()
+    total = 0
+    for model in (Job, Internship):
+        postings = model.objects.filter(status='open').select_related('company__company_profile')
+        for post in postings.iterator(chunk_size=500):
+            total += index_posting(post)
+    return total
+
+
+# ==================== QUERYING ====================
+
+
+def query_terms(keywords):
+    """Split keywords into exact terms and a trailing prefix term (for as-you-type queries)."""
+    tokens = list(dict.fromkeys(tokenize(keywords)))
+    if not tokens:
+        return [], None
+    return tokens[:-1], tokens[-1]
+
+
+def _load_postings(post_type, keywords, skills):
+    """
+    Fetch the posting lists for a query in one indexed lookup.
+    Returns (rows, exact, prefix, skill_phrases), or None when the query
+    has nothing to search for.
+    """
+    from .models import SearchIndexEntry
+
+    terms = _query_lookups(keywords, skills)
+    if terms is None:
+        return None
+    exact, prefix, skill_phrases = terms
+    condition = Q()
+    for lookup in _token_lookups(exact, prefix, skill_phrases).values():
+        condition |= lookup
+
+    rows = list(
+        SearchIndexEntry.objects.filter(condition, post_type=post_type).values_list(
+            'post_id', 'token', 'field', 'term_frequency', 'field_length'
+        )
+    )
+    return rows, exact, prefix, skill_phrases
+
+
+def _query_lookups(keywords, skills):
+    """(exact terms, prefix term, skill phrases) of a query, or None when it has nothing to search for."""
+    exact, prefix = query_terms(keywords)
+    skill_phrases = {' '.join(s.lower().split())[:MAX_TOKEN_LENGTH] for s in skills if s.strip()}
+    if not exact and prefix is None and not skill_phrases:
+        return None
+    return exact, prefix, skill_phrases
+
+
+def _token_lookups(exact, prefix, skill_phrases):
+    """The index token lookup of each kind of query term the query has."""
+    lookups = {}
+    if exact:
+        lookups['exact'] = Q(token__in=exact)
+    if prefix is not None:
+        # Range scan instead of LIKE 'x%' so the (post_type, token) index is used on every backend
+        lookups['prefix'] = Q(token__gte=prefix, token__lt=prefix + '\uffff')
+    if skill_phrases:
+        # Any field, not just skills: a skill named in a title is still a match and scores there
+        lookups['skills'] = Q(token__in=skill_phrases)
+    return lookups
+
+
+def _matching_ids(rows, exact, prefix, skill_phrases):
+    keyword_hits = {}
+    skill_hits = set()
+    for post_id, token, _field, _tf, _length in rows:
+        if token in skill_phrases:
+            skill_hits.add(post_id)
+        if token in exact:
+            keyword_hits.setdefault(post_id, set()).add(token)
+        if prefix is not None and token.startswith(prefix):
+            keyword_hits.setdefault(post_id, set()).add(prefix)
+
+    required = len(exact) + (1 if prefix is not None else 0)
+    if required:
+        matched = {pid for pid, hits in keyword_hits.items() if len(hits) == required}
+    else:
+        matched = set()
+    return matched | skill_hits
+
+
+def filter_by_keywords(queryset, post_type, keywords, skills=()):
+    """
+    Restrict a Job/Internship queryset to postings matching the keyword
+    query: postings that contain every keyword (the last one may be a
+    prefix of an indexed token) or any of the given skills as a whole
+    token in any field, as the query used to be matched against every
+    field before the index. The match runs as a grouped subquery on the
+    index, so no list of matching ids is fetched or bound. Without
+    anything to search for the queryset is returned unchanged.
+    """
+    from django.db.models import Count
+
+    from .models import SearchIndexEntry
+
+    terms = _query_lookups(keywords, skills)
+    if terms is None:
+        return queryset
+    exact, prefix, skill_phrases = terms
+    lookups = _token_lookups(exact, prefix, skill_phrases)
+    condition = Q()
+    for lookup in lookups.values():
+        condition |= lookup
+
+    # Hits per posting of each kind of term, from the entries the lookups select
+    counts = {}
+    if exact:
+        counts['exact_hits'] = Count('token', filter=lookups['exact'], distinct=True)
+    if prefix is not None:
+        counts['prefix_hits'] = Count('pk', filter=lookups['prefix'])
+    if skill_phrases:
+        counts['skill_hits'] = Count('pk', filter=lookups['skills'])
+    matched = Q()
+    if exact or prefix is not None:
+        every_keyword = Q()
+        if exact:
+            every_keyword &= Q(exact_hits=len(exact))
+        if prefix is not None:
+            every_keyword &= Q(prefix_hits__gt=0)
+        matched |= every_keyword
+    if skill_phrases:
+        matched |= Q(skill_hits__gt=0)
+
+    hits = (
+        SearchIndexEntry.objects.filter(condition, post_type=post_type)
+        .values('post_id')
+        .annotate(**counts)
+        .filter(matched)
+        .values('post_id')
+    )
+    return queryset.filter(pk__in=hits)
+
+
+# ==================== BM25 RELEVANCE ====================
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Extra weight for skills recognised by parse_smart_query
+SKILL_BOOST = 2.0
+STATS_CACHE_TTL = 300
+# Relevance ranking only considers this many best-scoring postings, so it never loads every match
+MAX_RANKED = 1000
+
+
+def index_stats(post_type):
+    """
+    Corpus statistics for BM25: number of indexed postings and the
+    average length of each field. Cached briefly, as exact values are
+    not needed for ranking.
+    """
+    from django.core.cache import cache
+    from django.db.models import Sum
+
+    from .models import SearchIndexEntry
+
+    cache_key = f'search_index_stats:{post_type}'
+    stats = cache.get(cache_key)
+    if stats is None:
+        entries = SearchIndexEntry.objects.filter(post_type=post_type)
+        doc_count = entries.values('post_id').distinct().count()
+        # term frequencies of a (posting, field) add up to the field length
+        field_totals = dict(entries.values_list('field').annotate(total=Sum('term_frequency')))
+        stats = {
+            'doc_count': doc_count,
+            'avg_length': {
+                field: (field_totals.get(field, 0) / doc_count) if doc_count else 0.0 for field in FIELD_WEIGHTS
+            },
+        }
+        cache.set(cache_key, stats, STATS_CACHE_TTL)
+    return stats
+
+
+def score_postings(post_type, keywords, skills=()):
+    """
+    Score matching postings with BM25F: field-weighted, length-normalised
+    term frequencies (title > skills > description) combined per term,
+    with detected skills boosted. Scoring is vectorised with NumPy over
+    the fetched posting lists.
+
+    Returns {post_id: score} for matching postings, or None when the query
+    has nothing to search for.
+    """
+    import numpy as np
+
+    loaded = _load_postings(post_type, keywords, skills)
+    if loaded is None:
+        return None
+    rows, exact, prefix, skill_phrases = loaded
+    matched = _matching_ids(rows, exact, prefix, skill_phrases)
+    if not matched:
+        return {}
+
+    stats = index_stats(post_type)
+    doc_count = max(stats['doc_count'], 1)
+    field_names = list(FIELD_WEIGHTS)
+    field_pos = {field: i for i, field in enumerate(field_names)}
+    weights = np.array([FIELD_WEIGHTS[f] for f in field_names])
+    avg_length = np.array([stats['avg_length'].get(f) or 1.0 for f in field_names])
+
+    post_ids, tokens, fields, tfs, lengths = zip(*rows)
+    doc_values, doc_idx = np.unique(np.array(post_ids, dtype=np.int64), return_inverse=True)
+    term_values, term_idx = np.unique(np.array(tokens, dtype=object).astype(str), return_inverse=True)
+    field_idx = np.array([field_pos[f] for f in fields])
+    tf = np.array(tfs, dtype=np.float64)
+    length = np.array(lengths, dtype=np.float64)
+
+    # BM25F: normalise each field's tf by its length, weight and sum per (posting, term)
+    norm_tf = weights[field_idx] * tf / (1 - BM25_B + BM25_B * length / avg_length[field_idx])
+    pair_key = doc_idx * len(term_values) + term_idx
+    pair_values, pair_idx = np.unique(pair_key, return_inverse=True)
+    pseudo_tf = np.bincount(pair_idx, weights=norm_tf)
+    pair_doc = pair_values // len(term_values)
+    pair_term = pair_values % len(term_values)
+
+    df = np.bincount(pair_term, minlength=len(term_values))
+    idf = np.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+    boost = np.where(np.isin(term_values, list(skill_phrases)), SKILL_BOOST, 1.0)
+
+    pair_score = idf[pair_term] * boost[pair_term] * pseudo_tf * (BM25_K1 + 1) / (pseudo_tf + BM25_K1)
+    doc_score = np.bincount(pair_doc, weights=pair_score, minlength=len(doc_values))
+
+    return {int(pid): float(score) for pid, score in zip(doc_values, doc_score) if int(pid) in matched}
+
+
+def top_scored(scores, limit):
+    """Ids of the `limit` best-scoring postings in `scores` (all of them if there are fewer)."""
+    if len(scores) <= limit:
+        return list(scores)
+    return heapq.nlargest(limit, scores, key=scores.get)
+
+
+def rank_ids(rows, scores):
+    """
+    Order (pk, is_premium, created_at) rows by premium first, then BM25
+    score, then recency. Returns the list of ids.
+    """
+    import numpy as np
+
+    if not rows:
+        return []
+    pks, premium, created = zip(*rows)
+    pks = np.array(pks, dtype=np.int64)
+    score = np.array([scores.get(int(pk), 0.0) for pk in pks])
+    created_ts = np.array([c.timestamp() for c in created])
+    premium = np.array(premium, dtype=bool)
+    # lexsort uses the last key as the primary one
+    order = np.lexsort((-created_ts, -score, ~premium))
+    return [int(pk) for pk in pks[order]]
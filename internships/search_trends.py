@@ -0,0 +1,203 @@
+"""
+Search logging and trending searches.
+
+search_jobs and search_internships log each keyword search (sampled at
+SEARCH_LOG_SAMPLE_RATE) to a buffer in this process's memory, which
+costs no database or cache round trip; every FLUSH_SECONDS the buffer is
+written off the request path (see internships.write_buffer): one bulk
+insert into SearchLog plus one increment of the hourly counter
+(SearchTrendHourly) per normalized query and hour. Trending over a
+sliding window of days is a sum over at most days x 24 hourly buckets
+instead of a scan of every SearchLog row in the window. The ranked list
+is cached per hour bucket for TRENDING_CACHE_TTL seconds, so most reads
+are one cache hit.
+
+``python manage.py compact_search_logs`` deletes raw SearchLog rows past
+their retention once their hours are covered by the aggregates.
+"""
+
+import random
+from datetime import timedelta
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Sum
+from django.db.models.functions import Lower, Trim, TruncHour
+from django.utils import timezone
+
+from .write_buffer import WriteBuffer
+
+MAX_QUERY_LENGTH = 255
+TRENDING_CACHE_TTL = 300
+
+FLUSH_SECONDS = 60
+
+
+def normalize_query(query):
+    """Lowercased, whitespace-collapsed form that trending counts are keyed on."""
+    return ' '.join(query.lower().split())[:MAX_QUERY_LENGTH]
+
+
+def _hour(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def _bump(query, hour, count, zero_results):
+    from .models import SearchTrendHourly
+
+    updates = {'count': F('count') + count, 'zero_results': F('zero_results') + zero_results}
+    if SearchTrendHourly.objects.filter(query=query, hour=hour).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            SearchTrendHourly.objects.create(query=query, hour=hour, count=count, zero_results=zero_results)
+    except IntegrityError:
+        # Another flush created the bucket first
+        SearchTrendHourly.objects.filter(query=query, hour=hour).update(**updates)
+
+
+# ==================== BUFFERED LOGGING ====================
+
+
+def _write_searches(events):
+    """
+    Write buffered searches with one bulk insert and one counter update
+    per (query, hour). Returns the number of SearchLog rows written.
+    """
+    from django.contrib.auth import get_user_model
+
+    from .models import SearchLog
+
+    user_ids = set(
+        get_user_model().objects.filter(pk__in={e[1] for e in events if e[1] is not None}).values_list('pk', flat=True)
+    )
+    SearchLog.objects.bulk_create(
+        [
+            SearchLog(
+                query=query,
+                user_id=user_id if user_id in user_ids else None,
+                results_count=results_count,
+                results_capped=results_capped,
+                weight=weight,
+                created_at=created_at,
+            )
+            for query, user_id, results_count, results_capped, created_at, weight in events
+        ],
+        batch_size=500,
+    )
+
+    buckets = {}
+    for query, user_id, results_count, results_capped, created_at, weight in events:
+        normalized = normalize_query(query)
+        if normalized:
+            bucket = buckets.setdefault((normalized, _hour(created_at)), [0, 0])
+            bucket[0] += weight
+            bucket[1] += weight if results_count == 0 else 0
+    for (query, hour), (count, zero_results) in buckets.items():
+        _bump(query, hour, round(count), round(zero_results))
+    return len(events)
+
+
+_search_logs = WriteBuffer('search logs', _write_searches, FLUSH_SECONDS)
+
+
+def log_search(query, user=None, results_count=0, results_capped=False):
+    """
+    Buffer one search for SearchLog and the hourly counters; returns
+    immediately. `results_capped` marks a results_count that is only a
+    lower bound. Only SEARCH_LOG_SAMPLE_RATE of searches are kept, each
+    weighted so the trending counts stay unbiased.
+    """
+    rate = settings.SEARCH_LOG_SAMPLE_RATE
+    if not query.strip() or rate <= 0 or (rate < 1 and random.random() >= rate):
+        return
+    user_id = user.pk if user is not None and user.is_authenticated else None
+    _search_logs.add((query[:500], user_id, results_count, results_capped, timezone.now(), 1 / min(rate, 1)))
+
+
+def flush_search_logs():
+    """Write this process's buffered searches now; returns the number of SearchLog rows written."""
+    return _search_logs.flush()
+
+
+# ==================== READS ====================
+
+
+def _window_start(days):
+    return _hour(timezone.now()) - timedelta(hours=days * 24 - 1)
+
+
+def trending_searches(days=7, limit=10):
+    """Most searched queries over the last `days` days (hour granularity), most frequent first."""
+    from .models import SearchTrendHourly
+
+    since = _window_start(days)
+    key = f'search_trends:{days}:{limit}:{since:%Y%m%d%H}'
+    trending = cache.get(key)
+    if trending is None:
+        trending = [
+            {'query': query, 'count': count}
+            for query, count in (
+                SearchTrendHourly.objects.filter(hour__gte=since)
+                .values_list('query')
+                .annotate(total=Sum('count'))
+                .order_by('-total', 'query')[:limit]
+            )
+        ]
+        cache.set(key, trending, TRENDING_CACHE_TTL)
+    return trending
+
+
+# ==================== COMPACTION ====================
+
+
+def rebuild_search_trends(since=None):
+    """
+    Recompute the hourly counters from raw SearchLog rows for every hour
+    from `since` (default: the oldest log) on, replacing what is stored.
+    Each row counts with its sampling weight. Used to backfill logs that
+    predate the counters. Returns the number of buckets written.
+    """
+    from .models import SearchLog, SearchTrendHourly
+
+    if since is None:
+        oldest = SearchLog.objects.order_by('created_at').values_list('created_at', flat=True).first()
+        if oldest is None:
+            return 0
+        since = oldest
+    since = _hour(since)
+    rows = (
+        SearchLog.objects.filter(created_at__gte=since)
+        .annotate(hour=TruncHour('created_at', tzinfo=dt_timezone.utc), norm=Lower(Trim('query')))
+        .values_list('norm', 'hour')
+        .order_by()
+        .annotate(total=Sum('weight'), zero=Sum('weight', filter=Q(results_count=0)))
+    )
+    buckets = {}
+    for query, hour, total, zero in rows.iterator(chunk_size=2000):
+        query = normalize_query(query)
+        if query:
+            bucket = buckets.setdefault((query, hour), [0, 0])
+            bucket[0] += total
+            bucket[1] += zero or 0
+
+    with transaction.atomic():
+        SearchTrendHourly.objects.filter(hour__gte=since).delete()
+        SearchTrendHourly.objects.bulk_create(
+            [
+                SearchTrendHourly(query=query, hour=hour, count=round(total), zero_results=round(zero))
+                for (query, hour), (total, zero) in buckets.items()
+            ],
+            batch_size=500,
+        )
+    return len(buckets)
+
+
+def compact_search_logs(before):
+    """Delete raw SearchLog rows older than `before`; the hourly counters keep their totals."""
+    from .models import SearchLog
+
+    deleted, _ = SearchLog.objects.filter(created_at__lt=before).delete()
+    return deleted
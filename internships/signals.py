@@ -0,0 +1,215 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from accounts.models import CompanyProfile, UserProfile
+from assessments.models import VerifiedBadge
+
+from .company_stats import adjust_company_stats, recount_active_postings, status_deltas
+from .facets import FACET_FIELDS, note_postings_changed
+from .models import Application, BadgeSkill, Internship, Job, JobApplication
+from .recommendations import invalidate_recommendations, note_job_opened
+from .search_index import INDEXED_FIELDS, index_posting, post_type_for, remove_posting, remove_postings
+from .skills import bump_bitset_version, sync_skills
+from .suggestions import SUGGESTED_FIELDS, schedule_suggestion_rebuild
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_save, sender=Internship)
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    """Keep the keyword index in sync when a posting is saved, closed or reopened"""
+    if update_fields is not None and not INDEXED_FIELDS.intersection(update_fields):
+        return
+    index_posting(instance)
+
+
+@receiver(post_delete, sender=Job)
+@receiver(post_delete, sender=Internship)
+def remove_from_search_index(sender, instance, **kwargs):
+    remove_posting(post_type_for(instance), instance.pk)
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_save, sender=Internship)
+def refresh_suggestions(sender, instance, update_fields=None, **kwargs):
+    """Titles, locations, skills and company names of open postings feed the autocomplete index"""
+    if update_fields is not None and not SUGGESTED_FIELDS.intersection(update_fields):
+        return
+    schedule_suggestion_rebuild()
+
+
+@receiver(post_delete, sender=Job)
+@receiver(post_delete, sender=Internship)
+def drop_suggestions(sender, instance, **kwargs):
+    schedule_suggestion_rebuild()
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_save, sender=Internship)
+def refresh_facets(sender, instance, update_fields=None, **kwargs):
+    """Skills, category and location of open postings feed the search facets"""
+    if update_fields is not None and not FACET_FIELDS.intersection(update_fields):
+        return
+    note_postings_changed(post_type_for(instance), [instance.pk])
+
+
+@receiver(post_delete, sender=Job)
+@receiver(post_delete, sender=Internship)
+def drop_facets(sender, instance, **kwargs):
+    note_postings_changed(post_type_for(instance), [instance.pk])
+
+
+@receiver(post_save, sender=CompanyProfile)
+def reindex_company_postings(sender, instance, created=False, update_fields=None, **kwargs):
+    """Company name is indexed on every posting, so refresh the company's open postings"""
+    if created or (update_fields is not None and 'company_name' not in update_fields):
+        return
+    for model in (Job, Internship):
+        for post in model.objects.filter(company_id=instance.user_id, status='open'):
+            index_posting(post)
+    schedule_suggestion_rebuild()
+
+
+# Posting fields the skill links and the job bitsets are built from
+SKILL_STATE_FIELDS = ('required_skills', 'status', 'is_premium')
+
+
+@receiver(post_init, sender=Job)
+@receiver(post_init, sender=Internship)
+def remember_skill_state(sender, instance, **kwargs):
+    """Keep the loaded skill state so post_save can tell whether it changed (deferred fields are not loaded)"""
+    instance._skill_state = {field: instance.__dict__.get(field) for field in SKILL_STATE_FIELDS}
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_save, sender=Internship)
+def sync_posting_skills(sender, instance, created=False, update_fields=None, **kwargs):
+    """Link the posting to canonical Skill rows for its required_skills"""
+    saved = SKILL_STATE_FIELDS if update_fields is None else [f for f in SKILL_STATE_FIELDS if f in update_fields]
+    changed = {field for field in saved if created or instance._skill_state[field] != getattr(instance, field)}
+    instance._skill_state.update({field: getattr(instance, field) for field in saved})
+    if 'required_skills' in changed:
+        sync_skills(instance, instance.required_skills)
+    if sender is Job and changed:
+        bump_bitset_version()
+        if instance.status == 'open':
+            # Opened, reopened or re-skilled: cached recommendation lists merge it in
+            note_job_opened(instance.pk)
+
+
+@receiver(post_delete, sender=Job)
+def drop_job_bitset(sender, instance, **kwargs):
+    bump_bitset_version()
+
+
+@receiver(post_save, sender=UserProfile)
+def sync_profile_skills(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'skills' not in update_fields:
+        return
+    if sync_skills(instance, instance.skills):
+        invalidate_recommendations(instance.user_id)
+
+
+@receiver(post_save, sender=VerifiedBadge)
+def sync_badge_skill(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'skill_name' not in update_fields:
+        return
+    sync_skills(instance, instance.skill_name)
+
+
+@receiver(post_delete, sender=VerifiedBadge)
+def drop_badge_skill(sender, instance, **kwargs):
+    BadgeSkill.objects.filter(badge_id=instance.pk).delete()
+
+
+@receiver(post_save, sender=JobApplication)
+def refresh_applicant_recommendations(sender, instance, created=False, **kwargs):
+    """Applied jobs drop out of recommendations and their skills count towards the user's"""
+    if created:
+        invalidate_recommendations(instance.applicant_id)
+
+
+# ==================== COMPANY STATS ====================
+
+
+@receiver(post_init, sender=Job)
+@receiver(post_init, sender=Internship)
+@receiver(post_init, sender=JobApplication)
+@receiver(post_init, sender=Application)
+def remember_status(sender, instance, **kwargs):
+    """Keep the loaded status so post_save can tell what changed (deferred fields are not loaded)"""
+    instance._stats_status = instance.__dict__.get('status')
+
+
+def _posting_counter(sender):
+    return ('job_posts', 'active_jobs') if sender is Job else ('internship_posts', 'active_internships')
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_save, sender=Internship)
+def count_posting(sender, instance, created=False, **kwargs):
+    posts, active = _posting_counter(sender)
+    old = None if created else instance._stats_status
+    if created or old is not None:
+        adjust_company_stats(
+            instance.company_id,
+            **{
+                posts: 1 if created else 0,
+                active: (instance.status == 'open') - (old == 'open'),
+            },
+        )
+    instance._stats_status = instance.status
+
+
+@receiver(post_delete, sender=Job)
+@receiver(post_delete, sender=Internship)
+def uncount_posting(sender, instance, **kwargs):
+    posts, active = _posting_counter(sender)
+    adjust_company_stats(instance.company_id, **{posts: -1, active: -(instance.status == 'open')})
+
+
+def _application_company(sender, instance):
+    field, model = ('job', Job) if sender is JobApplication else ('internship', Internship)
+    if getattr(sender, field).is_cached(instance):
+        return getattr(instance, field).company_id
+    return model.objects.filter(pk=getattr(instance, f'{field}_id')).values_list('company_id', flat=True).first()
+
+
+@receiver(post_save, sender=JobApplication)
+@receiver(post_save, sender=Application)
+def count_application(sender, instance, created=False, **kwargs):
+    old = None if created else instance._stats_status
+    if created or (old is not None and old != instance.status):
+        total = 'job_applications' if sender is JobApplication else 'internship_applications'
+        deltas = status_deltas([(old, instance.status)])
+        if created:
+            deltas[total] += 1
+        adjust_company_stats(_application_company(sender, instance), **deltas)
+    instance._stats_status = instance.status
+
+
+@receiver(post_delete, sender=JobApplication)
+@receiver(post_delete, sender=Application)
+def uncount_application(sender, instance, **kwargs):
+    total = 'job_applications' if sender is JobApplication else 'internship_applications'
+    deltas = status_deltas([(instance.status, None)])
+    deltas[total] -= 1
+    adjust_company_stats(_application_company(sender, instance), **deltas)
+
+
+# ==================== BULK UPDATES ====================
+
+
+def postings_closed(post_type, post_ids):
+    """
+    What the handlers above do for a posting that closes, for postings
+    closed with a queryset update(), which sends no signals.
+    """
+    if not post_ids:
+        return
+    model = Job if post_type == 'job' else Internship
+    remove_postings(post_type, post_ids)
+    if post_type == 'job':
+        bump_bitset_version()
+    schedule_suggestion_rebuild()
+    note_postings_changed(post_type, post_ids)
+    recount_active_postings(model.objects.filter(pk__in=post_ids).values_list('company_id', flat=True).distinct())
@@ -0,0 +1,276 @@
+"""
+Canonical skills.
+
+Comma-separated skill strings on postings, profiles and verified badges
+are normalized into Skill rows and linked through JobSkill,
+InternshipSkill, UserProfileSkill and BadgeSkill. Matching then works on
+sets of integer skill ids loaded with indexed joins, instead of
+re-parsing strings on every request, and filtering no longer needs
+``icontains`` (which let "java" match "javascript"). Links are kept
+current by the signal handlers in ``internships.signals``.
+"""
+
+import time
+
+from django.db.models import Q
+
+MAX_SKILL_LENGTH = 100
+
+
+def normalize_skill(name):
+    """Normalized key for a skill name: lowercase, single dashes for whitespace."""
+    return '-'.join(name.lower().split())[:MAX_SKILL_LENGTH]
+
+
+def parse_skills(skills_str):
+    """
+    Parse a comma-separated skills string into {slug: display name},
+    keeping the first spelling of duplicates.
+    """
+    skills = {}
+    if not skills_str:
+        return skills
+    for raw in skills_str.split(','):
+        name = ' '.join(raw.split())[:MAX_SKILL_LENGTH]
+        if name:
+            skills.setdefault(normalize_skill(name), name)
+    return skills
+
+
+def get_skill_ids(skills):
+    """
+    Return {slug: id} for the given {slug: display name}, creating
+    missing Skill rows.
+    """
+    from .models import Skill
+
+    if not skills:
+        return {}
+    ids = dict(Skill.objects.filter(slug__in=skills).values_list('slug', 'id'))
+    missing = [Skill(slug=slug, name=name) for slug, name in skills.items() if slug not in ids]
+    if missing:
+        Skill.objects.bulk_create(missing, ignore_conflicts=True)
+        ids = dict(Skill.objects.filter(slug__in=skills).values_list('slug', 'id'))
+    return ids
+
+
+def sync_skills(owner, skills_str):
+    """
+    Point the owner's skill_set (posting, profile or badge) at the skills
+    in skills_str. Returns True if the links changed.
+    """
+    skill_ids = set(get_skill_ids(parse_skills(skills_str)).values())
+    if skill_ids == set(owner.skill_set.values_list('id', flat=True)):
+        return False
+    owner.skill_set.set(skill_ids)
+    return True
+
+
+# ==================== LOOKUPS ====================
+
+
+def _skill_ids_by(links, owner_field, owner_ids):
+    result = {owner_id: set() for owner_id in owner_ids}
+    for owner_id, skill_id in links.filter(**{f'{owner_field}__in': owner_ids}).values_list(owner_field, 'skill_id'):
+        result[owner_id].add(skill_id)
+    return result
+
+
+def job_skill_ids(job_ids):
+    """{job_id: set of skill ids} in one query"""
+    from .models import JobSkill
+
+    return _skill_ids_by(JobSkill.objects.all(), 'job_id', job_ids)
+
+
+def internship_skill_ids(internship_ids):
+    """{internship_id: set of skill ids} in one query"""
+    from .models import InternshipSkill
+
+    return _skill_ids_by(InternshipSkill.objects.all(), 'internship_id', internship_ids)
+
+
+def post_skill_ids(post_type, post_ids):
+    """{post_id: set of skill ids} for 'job' or 'internship' postings"""
+    if post_type == 'job':
+        return job_skill_ids(post_ids)
+    return internship_skill_ids(post_ids)
+
+
+def user_skill_ids(user_ids):
+    """{user_id: set of profile skill ids} in one query"""
+    from .models import UserProfileSkill
+
+    return _skill_ids_by(UserProfileSkill.objects.all(), 'profile__user_id', user_ids)
+
+
+def badge_skill_ids(user_ids):
+    """{user_id: set of verified badge skill ids} in one query"""
+    from .models import BadgeSkill
+
+    return _skill_ids_by(BadgeSkill.objects.all(), 'badge__user_id', user_ids)
+
+
+def users_matching_skills(skill_ids, min_percentage=0):
+    """
+    Percolate a posting's skills against user profiles: {user_id: matched
+    skill count} for users having at least min_percentage of the skills.
+    Reads only the skill -> profile index rows of those skills, so the
+    cost grows with the number of matching users, not with all profiles.
+    """
+    from django.db.models import Count
+
+    from .models import UserProfileSkill
+
+    if not skill_ids:
+        return {}
+    required = max(1, -(-min_percentage * len(skill_ids) // 100))
+    return dict(
+        UserProfileSkill.objects.filter(skill_id__in=skill_ids)
+        .values_list('profile__user_id')
+        .annotate(matched=Count('skill_id'))
+        .filter(matched__gte=required)
+    )
+
+
+def skill_names(skill_ids):
+    """{skill_id: display name}"""
+    from .models import Skill
+
+    return dict(Skill.objects.filter(id__in=skill_ids).values_list('id', 'name'))
+
+
+def match_skill_ids(user_ids, post_ids, names):
+    """
+    Compare a user's skill ids with a posting's. Returns the same dict as
+    search.calculate_skill_match: match_percentage, matching_skills,
+    missing_skills (display names, sorted).
+    """
+    if not user_ids or not post_ids:
+        return {'match_percentage': 0, 'matching_skills': [], 'missing_skills': []}
+    matching = post_ids & user_ids
+    return {
+        'match_percentage': int(len(matching) / len(post_ids) * 100),
+        'matching_skills': sorted(names[i] for i in matching),
+        'missing_skills': sorted(names[i] for i in post_ids - matching),
+    }
+
+
+def filter_by_skills(queryset, skills):
+    """Restrict a Job/Internship queryset to postings having any of the given skills (exact match)."""
+    slugs = {normalize_skill(s) for s in skills if s.strip()}
+    if not slugs:
+        return queryset
+    return queryset.filter(pk__in=queryset.model.objects.filter(skill_set__slug__in=slugs).values('pk'))
+
+
+def open_posting_skills():
+    """Skills used by at least one open job or internship."""
+    from .models import Skill
+
+    return Skill.objects.filter(Q(jobs__status='open') | Q(internships__status='open')).distinct()
+
+
+# ==================== SKILL BITSETS ====================
+#
+# Each process keeps the open jobs' skills as one bitmask row per job
+# (bit position = index of the skill id in a shared vocabulary), so a
+# recommendation is an AND + popcount over a uint64 array rather than a
+# loop over Job rows. The arrays are rebuilt lazily whenever the shared
+# version counter in the cache is bumped by a posting change.
+
+BITSET_VERSION_KEY = 'job_skill_bitsets:version'
+
+_job_bitsets = {'version': None, 'data': None}
+
+
+def bump_bitset_version():
+    """Mark every process's job bitsets as stale."""
+    from django.core.cache import cache
+
+    cache.set(BITSET_VERSION_KEY, time.time_ns(), None)
+
+
+def _build_job_bitsets():
+    import numpy as np
+
+    from .models import Job, JobSkill
+
+    jobs = list(Job.objects.filter(status='open').values_list('pk', 'is_premium'))
+    links = list(JobSkill.objects.filter(job__status='open').values_list('job_id', 'skill_id'))
+
+    vocabulary = {skill_id: bit for bit, skill_id in enumerate(sorted({s for _, s in links}))}
+    row_of = {pk: row for row, (pk, _premium) in enumerate(jobs)}
+    masks = np.zeros((len(jobs), max(1, (len(vocabulary) + 63) // 64)), dtype=np.uint64)
+    if links:
+        rows = np.array([row_of[job_id] for job_id, _ in links])
+        bits = np.array([vocabulary[skill_id] for _, skill_id in links], dtype=np.uint64)
+        np.bitwise_or.at(masks, (rows, (bits >> np.uint64(6)).astype(np.intp)), np.uint64(1) << (bits & np.uint64(63)))
+
+    return {
+        'vocabulary': vocabulary,
+        'job_ids': np.array([pk for pk, _ in jobs], dtype=np.int64),
+        'is_premium': np.array([premium for _, premium in jobs], dtype=bool),
+        'masks': masks,
+        'skill_counts': np.bitwise_count(masks).sum(axis=1),
+    }
+
+
+def job_bitsets():
+    """The open jobs' skill bitsets, rebuilt if a posting changed since the last build."""
+    from django.core.cache import cache
+
+    version = cache.get(BITSET_VERSION_KEY)
+    if version is None:
+        version = time.time_ns()
+        cache.set(BITSET_VERSION_KEY, version, None)
+    if _job_bitsets['data'] is None or _job_bitsets['version'] != version:
+        _job_bitsets['data'] = _build_job_bitsets()
+        _job_bitsets['version'] = version
+    return _job_bitsets['data']
+
+
+def skill_mask(skill_ids, bitsets):
+    """Bitmask of the given skill ids; skills no open job uses are dropped."""
+    import numpy as np
+
+    mask = np.zeros(bitsets['masks'].shape[1], dtype=np.uint64)
+    for skill_id in skill_ids:
+        bit = bitsets['vocabulary'].get(skill_id)
+        if bit is not None:
+            mask[bit >> 6] |= np.uint64(1) << np.uint64(bit & 63)
+    return mask
+
+
+def top_job_matches(skill_ids, limit, exclude_ids=(), premium_boost=0):
+    """
+    Score every open job against a skill set in one vectorized pass and
+    return up to `limit` (job_id, match_percentage) pairs, best first.
+    The percentage is the share of the job's skills covered, plus
+    premium_boost for premium jobs (capped at 100); ties keep premium
+    jobs first, then the default job ordering.
+    """
+    import heapq
+
+    import numpy as np
+
+    bitsets = job_bitsets()
+    if not len(bitsets['job_ids']):
+        return []
+    matched = np.bitwise_count(bitsets['masks'] & skill_mask(skill_ids, bitsets)).sum(axis=1)
+    counts = bitsets['skill_counts']
+    percentage = np.zeros(len(counts), dtype=np.int64)
+    has_skills = counts > 0
+    percentage[has_skills] = (matched[has_skills] / counts[has_skills] * 100).astype(np.int64)
+
+    candidates = (percentage > 0) & ~np.isin(bitsets['job_ids'], list(exclude_ids))
+    if premium_boost:
+        percentage = np.where(bitsets['is_premium'], np.minimum(percentage + premium_boost, 100), percentage)
+
+    rows = np.flatnonzero(candidates)
+    best = heapq.nlargest(
+        limit,
+        rows.tolist(),
+        key=lambda row: (percentage[row], bitsets['is_premium'][row], -row),
+    )
+    return [(int(bitsets['job_ids'][row]), int(percentage[row])) for row in best]
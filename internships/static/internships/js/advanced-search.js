@@ -149,6 +149,14 @@ const AdvancedSearch = {
             });
         }
 
+        if (data.companies && data.companies.length) {
+            html += '<div class="px-3 py-2 text-xs text-gray-500 font-semibold uppercase border-t border-gray-700">Companies</div>';
+            data.companies.forEach(c => {
+                const safe = this._escapeHTML(c);
+                html += `<div class="suggestion-item px-4 py-2 hover:bg-gray-700 text-gray-300 cursor-pointer text-sm" data-value="${safe}">🏢 ${safe}</div>`;
+            });
+        }
+
         return html;
     },
 
@@ -0,0 +1,159 @@
+"""
+In-memory autocomplete index for the search box.
+
+Each process keeps a prefix table (a flattened trie: every prefix of
+every word-start suffix of a phrase maps to its best TOP_K phrases) for
+open postings' titles, locations, skills and company names, so a
+suggestion is a few dict lookups with no database round trip. Phrases
+are ranked by the number of open postings using them plus the number of
+times they were searched in the last POPULARITY_DAYS (SearchTrendHourly).
+
+A posting change queues one rebuild_suggestion_index task, which builds
+the table off the request path and stores it in the cache with a new
+version; each process loads the stored table when it sees the version
+change. A table older than INDEX_MAX_AGE seconds queues a rebuild so
+popularity stays current. Requests only build the table themselves on a
+cold cache, or when no rebuild reached them for twice that long (a
+process-local cache never sees the worker's table).
+"""
+
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+KINDS = ('skills', 'titles', 'locations', 'companies')
+TOP_K = 10
+MIN_PREFIX_LENGTH = 2
+MAX_PREFIX_LENGTH = 30
+POPULARITY_DAYS = 30
+INDEX_MAX_AGE = 600
+
+VERSION_KEY = 'suggestion_index:version'
+TABLE_KEY = 'suggestion_index:table'
+REBUILD_SCHEDULED_KEY = 'suggestion_index:rebuild_scheduled'
+
+# Model fields whose change alters a posting's suggestions
+SUGGESTED_FIELDS = {'title', 'location', 'required_skills', 'status', 'company'}
+
+_index = {'version': None, 'built_at': 0, 'data': None}
+
+
+def schedule_suggestion_rebuild():
+    """Queue a rebuild_suggestion_index task unless one is already pending."""
+    from .tasks import rebuild_suggestion_index
+
+    if cache.add(REBUILD_SCHEDULED_KEY, 1, INDEX_MAX_AGE):
+        rebuild_suggestion_index.delay()
+
+
+def _normalize(text):
+    return ' '.join(text.lower().split()) if text else ''
+
+
+def _prefixes(phrase):
+    """Every prefix (MIN..MAX_PREFIX_LENGTH chars) of each suffix of the phrase that starts a word."""
+    starts = [0] + [i + 1 for i, char in enumerate(phrase) if char == ' ']
+    keys = set()
+    for start in starts:
+        suffix = phrase[start : start + MAX_PREFIX_LENGTH]
+        keys.update(suffix[:end] for end in range(MIN_PREFIX_LENGTH, len(suffix) + 1))
+    return keys
+
+
+def _build_index():
+    from .models import Internship, InternshipSkill, Job, JobSkill, SearchTrendHourly
+    from .search import COMMON_SKILLS
+
+    postings = {kind: Counter() for kind in KINDS}
+    display = {}
+
+    def add(kind, text, count=1):
+        phrase = _normalize(text)
+        if phrase:
+            postings[kind][phrase] += count
+            display.setdefault((kind, phrase), text.strip())
+
+    for model in (Job, Internship):
+        for title, location, company_name in model.objects.filter(status='open').values_list(
+            'title', 'location', 'company__company_profile__company_name'
+        ):
+            add('titles', title)
+            add('locations', location)
+            add('companies', company_name)
+    for link_model, post_field in ((JobSkill, 'job'), (InternshipSkill, 'internship')):
+        for name, count in (
+            link_model.objects.filter(**{f'{post_field}__status': 'open'})
+            .values_list('skill__name')
+            .annotate(n=Count('pk'))
+            .order_by()
+        ):
+            add('skills', name, count)
+    for skill in COMMON_SKILLS:
+        add('skills', skill, 0)
+
+    searches = dict(
+        SearchTrendHourly.objects.filter(hour__gte=timezone.now() - timedelta(days=POPULARITY_DAYS))
+        .values_list('query')
+        .annotate(total=Sum('count'))
+        .order_by()
+    )
+
+    table = {}
+    for kind, counts in postings.items():
+        candidates = {}
+        for phrase, count in counts.items():
+            entry = (-(count + searches.get(phrase, 0)), phrase)
+            for prefix in _prefixes(phrase):
+                candidates.setdefault(prefix, []).append(entry)
+        table[kind] = {
+            prefix: tuple((phrase, display[kind, phrase]) for _, phrase in sorted(entries)[:TOP_K])
+            for prefix, entries in candidates.items()
+        }
+    return table
+
+
+def rebuild_index():
+    """Build the prefix table and publish it to every process under a new version."""
+    # Changes made from here on queue another rebuild
+    cache.delete(REBUILD_SCHEDULED_KEY)
+    stored = {'version': time.time_ns(), 'built_at': time.time(), 'data': _build_index()}
+    cache.set(TABLE_KEY, stored, None)
+    cache.set(VERSION_KEY, stored['version'], None)
+    return stored
+
+
+def suggestion_index():
+    """The prefix table: this process's copy, or the stored one once its version changed."""
+    version = cache.get(VERSION_KEY)
+    if _index['data'] is None or _index['version'] != version:
+        stored = cache.get(TABLE_KEY) if version is not None else None
+        if stored is None:
+            stored = rebuild_index()  # cold cache
+        _index.update(stored)
+    age = time.time() - _index['built_at']
+    if age > 2 * INDEX_MAX_AGE:
+        _index.update(rebuild_index())
+    elif age > INDEX_MAX_AGE:
+        schedule_suggestion_rebuild()
+    return _index['data']
+
+
+def get_suggestions(query, limit=TOP_K):
+    """Phrases of each kind with a word starting with `query`, most popular first."""
+    query = _normalize(query)
+    if len(query) < MIN_PREFIX_LENGTH:
+        return {kind: [] for kind in KINDS}
+
+    index = suggestion_index()
+    prefix = query[:MAX_PREFIX_LENGTH]
+    suggestions = {}
+    for kind in KINDS:
+        entries = index[kind].get(prefix, ())
+        if len(query) > MAX_PREFIX_LENGTH:
+            entries = [entry for entry in entries if f' {query}' in f' {entry[0]}']
+        suggestions[kind] = [text for _, text in entries[:limit]]
+    return suggestions
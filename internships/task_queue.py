@@ -0,0 +1,185 @@
+"""
+Database-backed task queue.
+
+Work is stored as BackgroundTask rows and executed by
+``python manage.py run_task_worker``; no external broker is needed.
+Tasks are registered by name with the @task decorator (see
+``internships.tasks``) and queued with ``some_task.delay(**payload)``.
+
+A worker claims a task with a conditional UPDATE, which makes it
+invisible to other workers until its visibility timeout expires. A task
+whose worker died is picked up again after the timeout; failing tasks
+are retried with exponential backoff up to max_attempts.
+"""
+
+import logging
+import traceback
+from datetime import timedelta
+
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Max, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_HIGH = 10
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 1
+
+DEFAULT_VISIBILITY_TIMEOUT = 300
+RETRY_BACKOFF_SECONDS = 30
+
+_registry = {}
+
+
+def task(name=None, priority=PRIORITY_NORMAL, max_attempts=3):
+    """
+    Register a function as a queueable task. The function takes
+    JSON-serializable keyword arguments; call func.delay(**kwargs) to queue it.
+    """
+
+    def decorator(func):
+        task_name = name or f'{func.__module__}.{func.__name__}'
+        _registry[task_name] = func
+
+        def delay(_priority=priority, _run_after=None, **payload):
+            return enqueue(task_name, payload, priority=_priority, max_attempts=max_attempts, run_after=_run_after)
+
+        func.task_name = task_name
+        func.delay = delay
+        return func
+
+    return decorator
+
+
+def enqueue(name, payload=None, priority=PRIORITY_NORMAL, max_attempts=3, run_after=None):
+    """Queue a registered task. Returns the BackgroundTask row."""
+    from .models import BackgroundTask
+
+    return BackgroundTask.objects.create(
+        name=name,
+        payload=payload or {},
+        priority=priority,
+        max_attempts=max_attempts,
+        run_after=run_after or timezone.now(),
+    )
+
+
+def load_tasks():
+    """Import every installed app's tasks module so the registry is complete."""
+    from django.utils.module_loading import autodiscover_modules
+
+    autodiscover_modules('tasks')
+
+
+# ==================== WORKER SIDE ====================
+
+
+def claim_tasks(worker_id, limit=10, visibility_timeout=DEFAULT_VISIBILITY_TIMEOUT):
+    """
+    Claim up to `limit` runnable tasks for this worker, highest priority
+    first. Tasks whose previous attempt outlived its visibility timeout
+    are runnable again (or failed, once out of attempts).
+    """
+    from .models import BackgroundTask
+
+    now = timezone.now()
+    BackgroundTask.objects.filter(
+        status='running',
+        locked_until__lt=now,
+        attempts__gte=F('max_attempts'),
+    ).update(status='failed', finished_at=now, last_error='Visibility timeout expired')
+
+    runnable = Q(status='queued', run_after__lte=now) | Q(
+        status='running', locked_until__lt=now, attempts__lt=F('max_attempts')
+    )
+    candidates = BackgroundTask.objects.filter(runnable).order_by('-priority', 'run_after', 'pk')
+    claimed = []
+    for pk in candidates.values_list('pk', flat=True)[: limit * 2]:
+        # Conditional update: only one worker can win each row
+        won = BackgroundTask.objects.filter(runnable, pk=pk).update(
+            status='running',
+            locked_by=worker_id,
+            locked_until=now + timedelta(seconds=visibility_timeout),
+            attempts=F('attempts') + 1,
+            started_at=now,
+        )
+        if won:
+            claimed.append(pk)
+            if len(claimed) == limit:
+                break
+    return list(BackgroundTask.objects.filter(pk__in=claimed).order_by('-priority', 'run_after', 'pk'))
+
+
+def run_task(task_row):
+    """Execute a claimed task and record the outcome. Returns True on success."""
+    from .models import BackgroundTask
+
+    mine = BackgroundTask.objects.filter(pk=task_row.pk, locked_by=task_row.locked_by, status='running')
+    func = _registry.get(task_row.name)
+    try:
+        if func is None:
+            raise LookupError(f'Unknown task {task_row.name!r}')
+        func(**task_row.payload)
+    except Exception:
+        logger.exception(f'Task {task_row.name} #{task_row.pk} failed')
+        now = timezone.now()
+        if task_row.attempts < task_row.max_attempts and func is not None:
+            backoff = RETRY_BACKOFF_SECONDS * 2 ** (task_row.attempts - 1)
+            mine.update(
+                status='queued',
+                run_after=now + timedelta(seconds=backoff),
+                locked_until=None,
+                last_error=traceback.format_exc(),
+            )
+        else:
+            mine.update(status='failed', finished_at=now, locked_until=None, last_error=traceback.format_exc())
+        return False
+
+    mine.update(status='done', finished_at=timezone.now(), locked_until=None, last_error='')
+    return True
+
+
+def run_pending(worker_id, limit=10, visibility_timeout=DEFAULT_VISIBILITY_TIMEOUT):
+    """Claim and run one batch. Returns the number of tasks processed."""
+    tasks = claim_tasks(worker_id, limit=limit, visibility_timeout=visibility_timeout)
+    for task_row in tasks:
+        run_task(task_row)
+    return len(tasks)
+
+
+# ==================== METRICS ====================
+
+
+def queue_metrics(since=None):
+    """
+    Per task name: counts by status, and queue latency (ready -> started)
+    and run time (started -> finished) of finished tasks since `since`.
+    """
+    from .models import BackgroundTask
+
+    if since is None:
+        since = timezone.now() - timedelta(hours=24)
+
+    wait = ExpressionWrapper(F('started_at') - F('run_after'), output_field=DurationField())
+    run = ExpressionWrapper(F('finished_at') - F('started_at'), output_field=DurationField())
+
+    metrics = {}
+    for row in (
+        BackgroundTask.objects.filter(status='done', finished_at__gte=since)
+        .values('name')
+        .annotate(
+            avg_wait=Avg(wait),
+            max_wait=Max(wait),
+            avg_run=Avg(run),
+            max_run=Max(run),
+        )
+    ):
+        metrics[row.pop('name')] = row
+
+    for name, status, count in (
+        BackgroundTask.objects.filter(Q(finished_at__gte=since) | Q(status__in=['queued', 'running']))
+        .values_list('name', 'status')
+        .annotate(count=Count('pk'))
+    ):
+        metrics.setdefault(name, {})[status] = count
+    return metrics
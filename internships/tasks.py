@@ -0,0 +1,77 @@
+"""
+Background tasks, executed by the run_task_worker management command.
+"""
+
+import logging
+
+from django.conf import settings
+
+from .task_queue import PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL, task
+
+logger = logging.getLogger(__name__)
+
+
+@task(name='screen_application', priority=PRIORITY_HIGH)
+def screen_application(application_id, post_type='job'):
+    """Auto-screen a newly submitted job or internship application."""
+    from .models import Application, JobApplication
+    from .screening import auto_screen_application
+
+    model = JobApplication if post_type == 'job' else Application
+    application = model.objects.select_related('applicant__user_profile').filter(pk=application_id).first()
+    if application is None:
+        logger.info(f'Skipping screening of deleted {post_type} application {application_id}')
+        return
+    auto_screen_application(application)
+
+
+@task(name='screen_job_applications', priority=PRIORITY_LOW)
+def screen_job_applications(job_id):
+    """Screen all pending applications of a job."""
+    from .models import Job
+    from .screening import bulk_screen_applications
+
+    job = Job.objects.filter(pk=job_id).first()
+    if job is not None:
+        bulk_screen_applications(job)
+
+
+@task(name='notify_job_matches', priority=PRIORITY_LOW)
+def notify_job_matches(post_id, post_type='job'):
+    """Notify users whose profile skills match a newly created job or internship."""
+    from notifications.services import notify_job_matches as notify
+
+    from .models import Internship, Job
+    from .skills import post_skill_ids, users_matching_skills
+
+    model = Job if post_type == 'job' else Internship
+    post = model.objects.filter(pk=post_id, status='open').first()
+    if post is None:
+        return
+    skill_ids = post_skill_ids(post_type, [post.pk])[post.pk]
+    matches = users_matching_skills(skill_ids, min_percentage=settings.JOB_MATCH_MIN_PERCENTAGE)
+    matches.pop(post.company_id, None)
+    created = notify(post, matches, daily_cap=settings.JOB_MATCH_NOTIFICATIONS_PER_DAY)
+    logger.info(f'{post_type} {post_id}: {len(matches)} matching user(s), {created} notified')
+
+
+@task(name='flush_outbox', priority=PRIORITY_NORMAL)
+def flush_outbox():
+    """
+    Deliver one batch of spooled emails, then queue the next batch no
+    sooner than EMAIL_OUTBOX_RATE_PER_SECOND allows.
+    """
+    from .emails import next_outbox_run, schedule_outbox_flush, send_outbox_batch
+
+    send_outbox_batch(settings.EMAIL_OUTBOX_BATCH_SIZE)
+    run_after = next_outbox_run()
+    if run_after is not None:
+        schedule_outbox_flush(run_after)
+
+
+@task(name='rebuild_suggestion_index', priority=PRIORITY_LOW)
+def rebuild_suggestion_index():
+    """Rebuild the autocomplete prefix table and publish it to every process."""
+    from .suggestions import rebuild_index
+
+    rebuild_index()
@@ -1,3 +1,966 @@
-from django.test import TestCase
+import unittest
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import CompanyProfile, UserProfile
+from assessments.models import SkillAssessment, VerifiedBadge
+from notifications.models import Notification
+
+from . import job_views
+from .alerts import search_key, send_search_alerts
+from .company_stats import COUNTER_FIELDS, compute_company_stats, get_company_stats
+from .emails import send_application_status_email, send_outbox_batch
+from .facets import facet_counts, open_postings
+from .hyperloglog import HyperLogLog
+from .job_views import flush_job_views, job_view_stats, record_job_view, rollup_job_views
+from .models import (
+    AutoScreeningResult,
+    BackgroundTask,
+    CompanyStats,
+    Job,
+    JobApplication,
+    JobCategory,
+    JobView,
+    JobViewDaily,
+    JobViewTotal,
+    OutboundEmail,
+    PlatformMetricsSnapshot,
+    SavedSearch,
+    SearchIndexEntry,
+    SearchLog,
+    SearchTrendHourly,
+    Skill,
+    StatusChange,
+)
+from .pagination import keyset_paginate
+from .platform_metrics import get_metrics, metrics_history, record_snapshot
+from .recommendations import get_recommendations
+from .screening import apply_auto_screening, batch_match_scores, bulk_screen_applications, calculate_match_score
+from .search import get_recommended_jobs, get_trending_searches, parse_smart_query, search_jobs
+from . import search_trends
+from .search_trends import flush_search_logs, log_search, rebuild_search_trends
+from .skills import badge_skill_ids
+from .suggestions import INDEX_MAX_AGE, get_suggestions
+from .task_queue import claim_tasks, run_pending, task
+from .tasks import notify_job_matches, screen_application
+
+User = get_user_model()
+
+
+def setUpModule():
+    # Buffered events are written when a test flushes them, never by a background thread
+    patcher = mock.patch('internships.write_buffer.WriteBuffer.start_flusher')
+    patcher.start()
+    unittest.addModuleCleanup(patcher.stop)
+
+
+def make_job(company, **kwargs):
+    data = {
+        'company': company,
+        'title': 'Backend Developer',
+        'description': 'Build APIs for our platform.',
+        'job_type': 'full_time',
+        'required_skills': 'Python, Django',
+        'qualifications': 'BSc',
+        'experience_level': 'junior',
+        'location': 'Kathmandu',
+        'email': 'jobs@example.com',
+    }
+    data.update(kwargs)
+    return Job.objects.create(**data)
+
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        self.company = User.objects.create_user(username='acme', email='acme@example.com', password='pass', user_type='company')
+        self.factory = RequestFactory()
+
+    def search(self, **params):
+        # Relevance matches come from the scored postings, other sorts filter with an index subquery
+        matches = []
+        for sort in ('relevance', 'latest'):
+            request = self.factory.get('/internships/search/', {**params, 'sort': sort})
+            request.user = AnonymousUser()
+            matches.append(set(search_jobs(request)['queryset'].values_list('pk', flat=True)))
+        self.assertEqual(matches[0], matches[1])
+        return matches[0]
+
+    def test_saving_open_job_indexes_it(self):
+        job = make_job(self.company)
+        self.assertTrue(SearchIndexEntry.objects.filter(post_type='job', post_id=job.pk, token='backend', field='title').exists())
+        self.assertEqual(self.search(q='backend'), {job.pk})
+
+    def test_closing_job_removes_it_from_index(self):
+        job = make_job(self.company)
+        job.status = 'closed'
+        job.save()
+        self.assertFalse(SearchIndexEntry.objects.filter(post_id=job.pk).exists())
+
+    def test_skill_search_has_no_substring_false_positives(self):
+        java_job = make_job(self.company, title='Engineer', required_skills='Java, Spring')
+        make_job(self.company, title='Engineer', required_skills='JavaScript, React')
+        self.assertEqual(self.search(q='java'), {java_job.pk})
+
+    def test_detected_skills_match_whole_tokens_in_any_field(self):
+        in_skills = make_job(self.company, title='Engineer', required_skills='Django')
+        in_title = make_job(self.company, title='Django Evangelist', required_skills='Writing')
+        make_job(self.company, title='Engineer', description='We use djangorestframework.', required_skills='Writing')
+        self.assertEqual(self.search(q='django'), {in_skills.pk, in_title.pk})
+
+    def test_last_keyword_matches_as_prefix(self):
+        job = make_job(self.company, title='Frontend Engineer')
+        self.assertEqual(self.search(q='fronte'), {job.pk})
+        self.assertEqual(self.search(q='engineer fro'), {job.pk})
+        self.assertEqual(self.search(q='backend fro'), set())
+        self.assertEqual(self.search(q='zzz'), set())
+
+
+class RelevanceRankingTests(TestCase):
+    def setUp(self):
+        self.company = User.objects.create_user(username='acme', email='acme@example.com', password='pass', user_type='company')
+        self.factory = RequestFactory()
+
+    def ranked(self, **params):
+        request = self.factory.get('/internships/search/', params)
+        request.user = AnonymousUser()
+        return search_jobs(request)['ranked_ids']
+
+    def test_title_match_outranks_description_match(self):
+        in_description = make_job(self.company, title='Engineer', description='Some kubernetes exposure is a plus.')
+        in_title = make_job(self.company, title='Kubernetes Engineer', description='Run our clusters.')
+        self.assertEqual(self.ranked(q='kubernetes'), [in_title.pk, in_description.pk])
+
+    def test_premium_postings_stay_first(self):
+        premium = make_job(self.company, title='Engineer', description='Kubernetes', is_premium=True)
+        strong = make_job(self.company, title='Kubernetes Kubernetes Engineer')
+        self.assertEqual(self.ranked(q='kubernetes'), [premium.pk, strong.pk])
+
+    def test_latest_sort_does_not_rank(self):
+        make_job(self.company, title='Kubernetes Engineer')
+        self.assertIsNone(self.ranked(q='kubernetes', sort='latest'))
+
+    def test_only_the_best_scoring_matches_are_ranked(self):
+        best = make_job(self.company, title='Kubernetes Engineer', description='Kubernetes, kubernetes.')
+        make_job(self.company, title='Engineer', description='Some kubernetes exposure is a plus.')
+        request = self.factory.get('/internships/search/', {'q': 'kubernetes'})
+        request.user = AnonymousUser()
+        with mock.patch('internships.search.MAX_RANKED', 1):
+            result = search_jobs(request)
+        self.assertEqual(result['ranked_ids'], [best.pk])
+        self.assertEqual((result['count'], result['count_capped']), (1, True))
+
+
+class SmartQueryParserTests(TestCase):
+    def test_detects_all_facets_in_one_query(self):
+        parsed = parse_smart_query('Senior Python Django developer remote full-time')
+        self.assertEqual(parsed['detected_skills'], ['python', 'django'])
+        self.assertEqual(parsed['detected_work_mode'], 'remote')
+        self.assertEqual(parsed['detected_job_type'], 'full_time')
+        self.assertEqual(parsed['detected_experience'], 'senior')
+        self.assertEqual(parsed['keywords'], 'developer')
+
+    def test_matches_respect_word_boundaries(self):
+        parsed = parse_smart_query('javascript software leading')
+        self.assertEqual(parsed['detected_skills'], ['javascript'])
+        self.assertIsNone(parsed['detected_job_type'])
+        self.assertIsNone(parsed['detected_experience'])
+
+    def test_longest_overlapping_skill_wins(self):
+        parsed = parse_smart_query('react native app')
+        self.assertEqual(parsed['detected_skills'], ['react native'])
+        self.assertEqual(parsed['keywords'], 'app')
+
+
+class CanonicalSkillTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.company = User.objects.create_user(username='acme', email='acme@example.com', password='pass', user_type='company')
+        self.user = User.objects.create_user(username='sam', email='sam@example.com', password='pass', user_type='user')
+        self.factory = RequestFactory()
+
+    def test_postings_link_to_shared_normalized_skills(self):
+        first = make_job(self.company, required_skills='React Native, Python')
+        second = make_job(self.company, required_skills='react  native')
+        self.assertEqual(Skill.objects.filter(slug='react-native').count(), 1)
+        self.assertEqual(set(first.skill_set.values_list('slug', flat=True)), {'react-native', 'python'})
+        self.assertEqual(list(second.skill_set.values_list('slug', flat=True)), ['react-native'])
+
+    def test_editing_skills_updates_links(self):
+        job = make_job(self.company, required_skills='Python')
+        job.required_skills = 'Go'
+        job.save()
+        self.assertEqual(list(job.skill_set.values_list('slug', flat=True)), ['go'])
+
+    def test_only_real_changes_mark_job_bitsets_stale(self):
+        job = make_job(self.company, required_skills='Python')
+        with mock.patch('internships.signals.bump_bitset_version') as bump:
+            job.save()
+            Job.objects.get(pk=job.pk).save()
+            bump.assert_not_called()
+            job.is_premium = True
+            job.save()
+            bump.assert_called_once()
+
+    def test_badge_links_follow_edits_and_deletes(self):
+        badge = VerifiedBadge.objects.create(
+            user=self.user, assessment=SkillAssessment.objects.create(skill_name='Python'), skill_name='Python', score=90,
+        )
+        self.assertEqual(list(badge.skill_set.values_list('slug', flat=True)), ['python'])
+        badge.skill_name = 'Django'
+        badge.save(update_fields=['skill_name'])
+        self.assertEqual(list(badge.skill_set.values_list('slug', flat=True)), ['django'])
+        badge.delete()
+        self.assertEqual(badge_skill_ids([self.user.pk]), {self.user.pk: set()})
+
+    def test_skills_filter_is_exact(self):
+        java_job = make_job(self.company, required_skills='Java')
+        make_job(self.company, required_skills='JavaScript')
+        request = self.factory.get('/internships/search/', {'skills': ['java'], 'sort': 'latest'})
+        request.user = AnonymousUser()
+        self.assertEqual(list(search_jobs(request)['queryset'].values_list('pk', flat=True)), [java_job.pk])
+
+    def test_recommendations_use_profile_skills(self):
+        UserProfile.objects.create(user=self.user, skills='python, sql')
+        match = make_job(self.company, required_skills='Python, Django')
+        make_job(self.company, required_skills='Java')
+        recommendations = get_recommended_jobs(self.user)
+        self.assertEqual([r['job'].pk for r in recommendations], [match.pk])
+        self.assertEqual(recommendations[0]['matching_skills'], ['python'])
+        self.assertEqual(recommendations[0]['match_percentage'], 50)
+
+    def test_recommendations_rank_by_coverage_with_premium_boost(self):
+        UserProfile.objects.create(user=self.user, skills='python, django')
+        full = make_job(self.company, required_skills='Python, Django')
+        half = make_job(self.company, required_skills='Python, Go')
+        boosted = make_job(self.company, required_skills='Python, Go', is_premium=True)
+        recommendations = get_recommended_jobs(self.user, limit=2)
+        self.assertEqual([r['job'].pk for r in recommendations], [full.pk, boosted.pk])
+        self.assertEqual([r['match_percentage'] for r in recommendations], [100, 60])
+        self.assertEqual(recommendations[1]['missing_skills'], ['Go'])
+        half.status = 'closed'
+        half.save()
+        self.assertEqual(len(get_recommended_jobs(self.user)), 2)
+
+
+class RecommendationCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.company = User.objects.create_user(username='acme', email='acme@example.com', password='pass', user_type='company')
+        self.user = User.objects.create_user(username='sam', email='sam@example.com', password='pass', user_type='user')
+        self.profile = UserProfile.objects.create(user=self.user, skills='python, django')
+
+    def job_ids(self):
+        return [rec['job'].pk for rec in get_recommendations(self.user)]
+
+    def test_cached_list_is_reused(self):
+        make_job(self.company, required_skills='Python')
+        self.job_ids()
+        # only loading the recommended jobs hits the database
+        with self.assertNumQueries(1):
+            self.job_ids()
+
+    def test_new_job_is_merged_into_cached_list(self):
+        partial = make_job(self.company, required_skills='Python, Go')
+        self.assertEqual(self.job_ids(), [partial.pk])
+        full = make_job(self.company, required_skills='Python, Django')
+        make_job(self.company, required_skills='Rust')
+        self.assertEqual(self.job_ids(), [full.pk, partial.pk])
+
+    def test_only_opened_or_edited_jobs_are_logged(self):
+        with mock.patch('internships.signals.note_job_opened') as note:
+            job = make_job(self.company, required_skills='Python')
+            job.save()
+            Job.objects.get(pk=job.pk).save()
+            self.assertEqual(note.call_count, 1)
+            job.required_skills = 'Python, Django'
+            job.save()
+            job.status = 'closed'
+            job.save()
+            self.assertEqual(note.call_count, 2)
+
+    def test_profile_skill_change_and_applying_invalidate(self):
+        job = make_job(self.company, required_skills='Go')
+        self.assertEqual(self.job_ids(), [])
+        self.profile.skills = 'go'
+        self.profile.save()
+        self.assertEqual(self.job_ids(), [job.pk])
+        JobApplication.objects.create(job=job, applicant=self.user, full_name='Sam', email='sam@example.com', phone='1', cv='cv.pdf')
+        self.assertEqual(self.job_ids(), [])
+
+
+class BatchScreeningTests(TestCase):
+    def setUp(self):
+        self.company = User.objects.create_user(username='acme', email='acme@example.com', password='pass', user_type='company')
+        self.job = make_job(
+            self.company, required_skills='Python, Django, SQL, Docker', experience_level='mid',
+            required_course='Computer Science', min_gpa=Decimal('3.30'), preferred_location='Kathmandu',
+            preferred_english_level='fluent', preferred_internet_quality='good', is_premium=True,
+        )
+        assessment = SkillAssessment.objects.create(skill_name='Python')
+        profiles = [
+            {
+                'skills': 'python, django, sql, docker', 'course': 'Computer Science', 'gpa': Decimal('3.90'),
+                'location': 'Kathmandu', 'english_level': 'native', 'internet_quality': 'excellent',
+                'completeness_score': 95,
+            },
+            {
+                'skills': 'python', 'course': 'Computer Engineering', 'gpa': Decimal('2.70'),
+                'location': 'Kathmandu, Nepal', 'english_level': 'intermediate', 'internet_quality': 'average',
+                'completeness_score': 40,
+            },
+            {
+                'skills': '', 'course': '', 'gpa': None, 'location': 'Pokhara', 'english_level': '',
+                'internet_quality': '', 'completeness_score': 0,
+            },
+            None,
+        ]
+        for i, data in enumerate(profiles):
+            user = User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='pass', user_type='user')
+            if data is not None:
+                UserProfile.objects.create(user=user, **data)
+            JobApplication.objects.create(job=self.job, applicant=user, full_name=user.username, email=user.email,
+                                          phone='1', cv='cv.pdf', years_of_experience=i * 2)
+            if i == 0:
+                VerifiedBadge.objects.create(user=user, assessment=assessment, skill_name='Python', score=90)
+
+    def applications(self):
+        return list(self.job.job_applications.select_related('applicant__user_profile').order_by('pk'))
+
+    def test_batch_scores_match_single_scoring(self):
+        applications = self.applications()
+        self.assertEqual(batch_match_scores(self.job, applications), [calculate_match_score(app) for app in applications])
+
+    def test_blank_levels_score_alike_without_a_ranked_preference(self):
+        # '' (no preference) and a preference outside the level scale
+        for preference in ('', 'any'):
+            Job.objects.filter(pk=self.job.pk).update(
+                preferred_english_level=preference, preferred_internet_quality=preference
+            )
+            self.job.refresh_from_db()
+            applications = self.applications()
+            self.assertEqual(batch_match_scores(self.job, applications), [calculate_match_score(app) for app in applications])
+
+    def test_bulk_screen_persists_results(self):
+        expected = {app.pk: calculate_match_score(app) for app in self.applications()}
+        bulk_screen_applications(self.job)
+        bulk_screen_applications(self.job)  # re-screening updates in place
+        self.assertEqual(AutoScreeningResult.objects.count(), len(expected))
+        for app in self.applications():
+            self.assertEqual(app.match_score, Decimal(str(expected[app.pk]['total_score'])))
+            self.assertEqual(app.screening_result.suggested_status, expected[app.pk]['suggested_status'])
+
+    def test_apply_auto_screening_updates_statuses(self):
+        self.job.auto_screen_enabled = True
+        self.job.save()
+        updated = apply_auto_screening(self.job)
+        changed = [app for app in self.applications() if app.status != 'pending']
+        self.assertEqual(len(updated), len(changed))
+        self.assertEqual(StatusChange.objects.count(), len(changed))
+
+
+CALLS = []
+
+
+@task(name='tests.record', max_attempts=2)
+def record_call(value, fail=False):
+    CALLS.append(value)
+    if fail:
+        raise ValueError('boom')
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_higher_priority_runs_first(self):
+        record_call.delay(value='low', _priority=1)
+        record_call.delay(value='high', _priority=10)
+        run_pending('w1')
+        self.assertEqual(CALLS, ['high', 'low'])
+        self.assertEqual(BackgroundTask.objects.filter(status='done').count(), 2)
+
+    def test_failing_task_is_retried_with_backoff_then_failed(self):
+        row = record_call.delay(value='x', fail=True)
+        run_pending('w1')
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), ('queued', 1))
+        self.assertGreater(row.run_after, timezone.now())
+        self.assertEqual(run_pending('w1'), 0)  # not before the backoff
+        BackgroundTask.objects.filter(pk=row.pk).update(run_after=timezone.now())
+        run_pending('w1')
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), ('failed', 2))
+        self.assertIn('ValueError', row.last_error)
+
+    def test_claimed_task_is_invisible_until_timeout(self):
+        row = record_call.delay(value='x')
+        self.assertEqual(len(claim_tasks('w1', visibility_timeout=60)), 1)
+        self.assertEqual(claim_tasks('w2'), [])
+        BackgroundTask.objects.filter(pk=row.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual([t.locked_by for t in claim_tasks('w2')], ['w2'])
+
+    def test_worker_runs_queued_screening(self):
+        company = User.objects.create_user(username='acme', email='acme@example.com', password='pass', user_type='company')
+        user = User.objects.create_user(username='sam', email='sam@example.com', password='pass', user_type='user')
+        application = JobApplication.objects.create(job=make_job(company), applicant=user, full_name='Sam',
+                                                    email='sam@example.com', phone='1', cv='cv.pdf')
+        screen_application.delay(application_id=application.pk, post_type='job')
+        call_command('run_task_worker', '--once', stdout=StringIO())
+        self.assertTrue(AutoScreeningResult.objects.filter(job_application=application).exists())
+
+
+class EmailOutboxTests(TestCase):
+    def setUp(self):
+        company = User.objects.create_user(username='acme', email='acme@example.com', password='pass', user_type='company')
+        user = User.objects.create_user(username='sam', email='sam@example.com', password='pass', user_type='user')
+        self.application = JobApplication.objects.create(job=make_job(company), applicant=user, full_name='Sam',
+                                                         email='sam@example.com', phone='1', cv='cv.pdf')
+
+    def test_status_email_is_spooled_not_sent(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(send_application_status_email(self.application, 'pending', 'shortlisted'))
+        email = OutboundEmail.objects.get()
+        self.assertEqual((email.recipients, email.status), (['sam@example.com'], 'queued'))
+        self.assertIn('Backend Developer', email.subject)
+        self.assertIn('shortlisted', email.body_text)
+        self.assertEqual(mail.outbox, [])
+        self.assertTrue(BackgroundTask.objects.filter(name='flush_outbox', status='queued').exists())
+
+    def test_worker_delivers_outbox(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            send_application_status_email(self.application, 'pending', 'shortlisted')
+            send_application_status_email(self.application, 'shortlisted', 'interview')
+        self.assertEqual(BackgroundTask.objects.filter(name='flush_outbox').count(), 1)
+        call_command('run_task_worker', '--once', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+        self.assertEqual(OutboundEmail.objects.filter(status='sent').count(), 2)
+
+    def test_failed_delivery_is_retried_later(self):
+        email = OutboundEmail.objects.create(recipients=['sam@example.com'], subject='Hi', body_text='Hello')
+        with self.settings(EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+                           EMAIL_HOST='127.0.0.1', EMAIL_PORT=1, EMAIL_USE_TLS=False):
+            self.assertEqual(send_outbox_batch(), 0)
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('queued', 1))
+        self.assertGreater(email.send_after, timezone.now())
+        self.assertEqual(send_outbox_batch(), 0)  # not before the backoff
+
+
+class SearchAlertTests(TestCase):
+    def setUp(self):
+        self.company = User.objects.create_user(username='acme', email='acme@example.com', password='pass', user_type='company')
+        self.ann = User.objects.create_user(username='ann', email='ann@example.com', password='pass', user_type='user')
+        self.bob = User.objects.create_user(username='bob', email='bob@example.com', password='pass', user_type='user')
+        self.last_run = timezone.now() - timedelta(hours=1)
+        old = make_job(self.company, title='Old Django Role')
+        Job.objects.filter(pk=old.pk).update(created_at=self.last_run - timedelta(hours=1))
+
+    def save_search(self, user, query, filters):
+        saved = SavedSearch.objects.create(user=user, name=query, query=query, filters=filters, alert_enabled=True)
+        SavedSearch.objects.filter(pk=saved.pk).update(last_alerted=self.last_run)
+        return saved
+
+    def test_equivalent_searches_share_a_key(self):
+        a = SavedSearch(query='Django  Developer', filters={'skills': ['Python', 'Django'], 'sort': 'latest'})
+        b = SavedSearch(query='django developer', filters={'skills': ['django', 'python']})
+        self.assertEqual(search_key(a), search_key(b))
+
+    def test_one_digest_per_user_with_new_matches_only(self):
+        self.save_search(self.ann, 'django', {})
+        self.save_search(self.ann, '', {'skills': 'Python', 'experience': 'junior'})
+        self.save_search(self.bob, 'django', {'location': 'pokhara'})
+        make_job(self.company, title='New Django Role')
+        make_job(self.company, title='Go Role', required_skills='Go', description='Services in Go.')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = send_search_alerts()
+        self.assertEqual((result['searches'], result['sent']), (3, 1))
+        email = OutboundEmail.objects.get()
+        self.assertEqual(email.recipients, ['ann@example.com'])
+        self.assertIn('New Django Role', email.body_text)
+        self.assertNotIn('Old Django Role', email.body_text)
+        self.assertNotIn('Go Role', email.body_text)
+
+        # Already alerted: nothing new to send
+        self.assertEqual(send_search_alerts()['sent'], 0)
+
+    def test_long_digests_link_to_the_rest(self):
+        self.save_search(self.ann, 'django', {})
+        make_job(self.company, title='First Django Role')
+        make_job(self.company, title='Second Django Role')
+        with mock.patch('internships.alerts.MAX_DIGEST_POSTINGS', 1), self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(send_search_alerts()['sent'], 1)
+        email = OutboundEmail.objects.get()
+        self.assertIn('Second Django Role', email.body_text)
+        self.assertNotIn('First Django Role', email.body_text)
+        self.assertIn('and 1 more', email.body_text)
+        self.assertIn(reverse('internships:my_saved_searches'), email.body_html)
+
+    def test_unsent_digests_are_retried(self):
+        saved = self.save_search(self.ann, 'django', {})
+        make_job(self.company, title='New Django Role')
+        with mock.patch('internships.emails.send_new_job_alert_email', return_value=False):
+            self.assertEqual(send_search_alerts()['sent'], 0)
+        saved.refresh_from_db()
+        self.assertEqual(saved.last_alerted, self.last_run)
+        self.assertEqual(send_search_alerts()['sent'], 1)
+
+
+class JobMatchNotificationTests(TestCase):
+    def setUp(self):
+        self.company = User.objects.create_user(username='acme', email='acme@example.com', password='pass', user_type='company')
+        self.users = {}
+        for name, skills in [('ann', 'Python, Django'), ('bob', 'python'), ('cara', 'Go')]:
+            user = User.objects.create_user(username=name, email=f'{name}@example.com', password='pass', user_type='user')
+            UserProfile.objects.create(user=user, skills=skills)
+            self.users[name] = user
+
+    def notified(self):
+        return set(Notification.objects.filter(notification_type='job_match').values_list('user__username', flat=True))
+
+    def test_matching_users_are_notified_in_bulk(self):
+        job = make_job(self.company)
+        with self.assertNumQueries(5):
+            notify_job_matches(post_id=job.pk)
+        self.assertEqual(self.notified(), {'ann', 'bob'})
+
+    def test_daily_cap_per_user(self):
+        Notification.create_notification(self.users['bob'], 'Earlier match', notification_type='job_match')
+        with self.settings(JOB_MATCH_NOTIFICATIONS_PER_DAY=1):
+            notify_job_matches(post_id=make_job(self.company).pk)
+        self.assertEqual(Notification.objects.filter(user=self.users['bob']).count(), 1)
+        self.assertIn('ann', self.notified())
+
+    def test_create_job_queues_fan_out(self):
+        CompanyProfile.objects.create(user=self.company, company_name='Acme', approval_status='approved')
+        self.client.force_login(self.company)
+        self.client.post(reverse('internships:create_job'), {
+            'title': 'Django Developer', 'description': 'APIs', 'job_type': 'full_time',
+            'required_skills': 'Python, Django', 'qualifications': 'BSc', 'experience_level': 'junior',
+            'salary_currency': 'NPR', 'location': 'Kathmandu', 'email': 'jobs@example.com',
+        })
+        self.assertTrue(BackgroundTask.objects.filter(name='notify_job_matches').exists())
+        self.assertEqual(self.notified(), set())
+        call_command('run_task_worker', '--once', stdout=StringIO())
+        self.assertEqual(self.notified(), {'ann', 'bob'})
+
+
+class JobViewRollupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(job_views._views.clear)
+        self.company = User.objects.create_user(username='acme', email='acme@example.com', password='pass', user_type='company')
+        self.viewer = User.objects.create_user(username='sam', email='sam@example.com', password='pass', user_type='user')
+        self.job = make_job(self.company)
+
+    def test_views_are_buffered_and_flushed_in_one_batch(self):
+        with self.assertNumQueries(0):
+            for _ in range(3):
+                record_job_view(self.job.pk, self.viewer.pk, '10.0.0.1')
+        self.assertEqual(JobView.objects.count(), 0)
+        with self.assertNumQueries(3):
+            self.assertEqual(flush_job_views(), 3)
+        self.assertEqual(JobView.objects.filter(viewer=self.viewer).count(), 3)
+
+    def test_crawlers_are_not_tracked(self):
+        self.client.get(reverse('internships:job_detail', args=[self.job.pk]), HTTP_USER_AGENT='Googlebot/2.1')
+        flush_job_views()
+        self.assertEqual(JobView.objects.count(), 0)
+
+    def test_rollup_feeds_analytics(self):
+        yesterday = timezone.now() - timedelta(days=1)
+        JobView.objects.bulk_create([
+            JobView(job=self.job, viewer=self.viewer, viewed_at=yesterday),
+            JobView(job=self.job, viewer=self.viewer, viewed_at=yesterday),
+            JobView(job=self.job, ip_address='10.0.0.9', viewed_at=timezone.now()),
+        ])
+        rollup_job_views()
+        self.assertEqual(JobViewDaily.objects.count(), 2)
+        JobView.objects.create(job=self.job, viewer=self.viewer)
+        rollup_job_views()  # recomputes the partial last day only
+        stats = job_view_stats(self.job)
+        # The signed-in viewer counts once across both days, plus one anonymous IP
+        self.assertEqual((stats['total_views'], stats['unique_viewers'], stats['unique_ips']), (4, 2, 1))
+        self.assertEqual([day['count'] for day in stats['daily_views']], [2, 2])
+
+        self.client.force_login(self.company)
+        response = self.client.get(reverse('internships:company_analytics'))
+        self.assertEqual(response.context['total_views'], 4)
+        self.assertEqual(response.context['top_jobs'][0].view_count, 4)
+        self.assertEqual(response.context['unique_viewers'], 2)
+
+    def test_rollups_fold_into_cumulative_totals(self):
+        get_company_stats(self.company)  # the row exists before any views, so rollups fold into it
+        JobView.objects.create(job=self.job, viewer=self.viewer, viewed_at=timezone.now() - timedelta(days=1))
+        rollup_job_views()
+        JobView.objects.create(job=self.job, viewer=self.viewer)
+        JobView.objects.create(job=self.job, ip_address='10.0.0.9')
+        rollup_job_views()
+        JobView.objects.create(job=self.job, ip_address='10.0.0.9')
+        rollup_job_views()  # today again: the delta and the idempotent merge keep the totals exact
+
+        total = JobViewTotal.objects.get(job=self.job)
+        stats = CompanyStats.objects.get(company=self.company)
+        self.assertEqual((total.views, total.unique_viewers, total.unique_ips), (4, 2, 1))
+        self.assertEqual((stats.total_views, stats.unique_viewers, stats.unique_ips), (4, 2, 1))
+        expected = compute_company_stats([self.company.pk])[self.company.pk]
+        self.assertEqual(stats.viewer_sketch, expected['viewer_sketch'])
+
+    def test_dashboard_windowed_figures_are_cached(self):
+        self.client.force_login(self.company)
+        url = reverse('internships:company_analytics')
+        self.client.get(url)
+        JobApplication.objects.create(job=self.job, applicant=self.viewer, full_name='Sam', email='sam@example.com',
+                                      phone='1', cv='cv.pdf')
+        response = self.client.get(url)
+        self.assertEqual(response.context['total_applications'], 1)  # counter, always current
+        self.assertEqual(response.context['recent_applications'], 0)  # rollup, until DASHBOARD_CACHE_TTL passes
+        cache.clear()
+        response = self.client.get(url)
+        self.assertEqual(response.context['recent_applications'], 1)
+        self.assertEqual(response.context['top_jobs'][0].app_count, 1)
+
+    def test_hyperloglog_estimates_and_merges(self):
+        a = HyperLogLog().update(f'user:{i}' for i in range(6000))
+        b = HyperLogLog.from_bytes(HyperLogLog().update(f'user:{i}' for i in range(3000, 9000)).to_bytes())
+        self.assertEqual(len(a.to_bytes()), 4096)
+        self.assertAlmostEqual(a.count(), 6000, delta=6000 * 0.05)
+        self.assertAlmostEqual(a.merge(b).count(), 9000, delta=9000 * 0.05)
+        self.assertEqual(HyperLogLog().update(['x', 'y', 'x']).count(), 2)
+
+
+class CompanyStatsTests(TestCase):
+    def setUp(self):
+        self.company = User.objects.create_user(username='acme', email='acme@example.com', password='pass', user_type='company')
+        self.user = User.objects.create_user(username='sam', email='sam@example.com', password='pass', user_type='user')
+        get_company_stats(self.company)
+
+    def assertCountersMatch(self):
+        stats = CompanyStats.objects.get(company=self.company)
+        expected = compute_company_stats([self.company.pk])[self.company.pk]
+        self.assertEqual({field: getattr(stats, field) for field in COUNTER_FIELDS},
+                         {field: expected[field] for field in COUNTER_FIELDS})
+        return stats
+
+    def test_counters_follow_postings_and_applications(self):
+        job = make_job(self.company)
+        make_job(self.company, status='closed')
+        application = JobApplication.objects.create(job=job, applicant=self.user, full_name='Sam',
+                                                    email='sam@example.com', phone='1', cv='cv.pdf')
+        stats = self.assertCountersMatch()
+        self.assertEqual((stats.job_posts, stats.active_jobs, stats.pending_applications), (2, 1, 1))
+
+        application = JobApplication.objects.get(pk=application.pk)
+        application.status = 'interview'
+        application.save()
+        job.status = 'closed'
+        job.save(update_fields=['status'])
+        stats = self.assertCountersMatch()
+        self.assertEqual((stats.active_jobs, stats.pending_applications, stats.interview_applications), (0, 0, 1))
+
+        job.delete()
+        self.assertEqual(self.assertCountersMatch().job_applications, 0)
+
+    def test_bulk_close_and_reconcile(self):
+        job = make_job(self.company, deadline=timezone.now().date() - timedelta(days=1))
+        call_command('close_expired_postings', stdout=StringIO())
+        self.assertEqual(self.assertCountersMatch().active_jobs, 0)
+        self.assertFalse(SearchIndexEntry.objects.filter(post_type='job', post_id=job.pk).exists())
+
+        CompanyStats.objects.filter(company=self.company).update(job_posts=99)
+        call_command('reconcile_company_stats', stdout=StringIO())
+        self.assertEqual(self.assertCountersMatch().job_posts, 1)
+
+    def test_dashboards_render_from_counters(self):
+        CompanyProfile.objects.create(user=self.company, company_name='Acme')
+        make_job(self.company)
+        self.client.force_login(self.company)
+        response = self.client.get(reverse('accounts:dashboard'))
+        self.assertEqual((response.context['total_posts'], response.context['active_posts']), (1, 1))
+        response = self.client.get(reverse('internships:company_analytics'))
+        self.assertEqual(response.context['total_jobs'], 1)
+
+
+class PlatformMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.company = User.objects.create_user(username='acme', email='acme@example.com', password='pass', user_type='company')
+        self.user = User.objects.create_user(username='sam', email='sam@example.com', password='pass', user_type='user')
+        self.staff = User.objects.create_user(username='admin', email='admin@example.com', password='pass', is_staff=True)
+        CompanyProfile.objects.create(user=self.company, company_name='Acme', approval_status='pending')
+        job = make_job(self.company)
+        make_job(self.company, status='closed')
+        JobApplication.objects.create(job=job, applicant=self.user, full_name='Sam',
+                                      email='sam@example.com', phone='1', cv='cv.pdf')
+
+    def test_metrics_are_grouped_and_cached(self):
+        with self.assertNumQueries(7):
+            metrics = get_metrics()
+        self.assertEqual(
+            (metrics['total_users'], metrics['total_companies'], metrics['total_jobs'], metrics['active_jobs'],
+             metrics['total_job_applications'], metrics['pending_companies']),
+            (1, 1, 2, 1, 1, 1),
+        )
+        self.assertEqual(metrics['job_apps_by_status'], {'pending': 1})
+        with self.assertNumQueries(0):
+            get_metrics()
+
+    def test_snapshot_history(self):
+        call_command('snapshot_platform_metrics', stdout=StringIO())
+        make_job(self.company)
+        record_snapshot()
+        self.assertEqual(PlatformMetricsSnapshot.objects.count(), 2)
+        history = metrics_history()
+        self.assertEqual(len(history), 1)  # latest snapshot of the day
+        self.assertEqual((history[0]['date'], history[0]['total_jobs']), (timezone.localdate(), 3))
+
+    def test_dashboard_is_staff_only(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('accounts:admin_dashboard'))
+        self.assertEqual((response.context['total_applications'], response.context['active_jobs']), (1, 1))
+        record_snapshot()
+        response = self.client.get(reverse('accounts:admin_metrics_history'))
+        self.assertEqual(response.json()['total_jobs'], [2])
+
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('accounts:admin_dashboard')).status_code, 403)
+
+
+class SearchTrendTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        search_trends._search_logs.clear()
+        self.addCleanup(search_trends._search_logs.clear)
+
+    def test_searches_are_buffered_then_batched(self):
+        self.client.get(reverse('internships:advanced_search'), {'q': '  Python  Developer'})
+        with self.assertNumQueries(0):
+            log_search('python developer', results_count=3)
+            log_search('react', results_count=1000, results_capped=True)
+        self.assertFalse(SearchLog.objects.exists())
+
+        self.assertEqual(flush_search_logs(), 3)
+        self.assertEqual(SearchLog.objects.count(), 3)
+        self.assertEqual(SearchLog.objects.filter(results_count=0).count(), 1)
+        self.assertEqual(str(SearchLog.objects.get(query='react')), 'react (1000+ results)')
+        bucket = SearchTrendHourly.objects.get(query='python developer')
+        self.assertEqual((bucket.count, bucket.zero_results), (2, 1))
+        self.assertEqual(get_trending_searches(limit=1), [{'query': 'python developer', 'count': 2}])
+        with self.assertNumQueries(0):
+            get_trending_searches(limit=1)
+
+    def test_searches_log_their_result_count(self):
+        company = User.objects.create_user(username='acme', email='acme@example.com', password='pass', user_type='company')
+        make_job(company, title='Kotlin Developer')
+        make_job(company, title='Kotlin Engineer')
+        for sort in ('relevance', 'latest'):
+            response = self.client.get(reverse('internships:advanced_search'), {'q': 'kotlin', 'sort': sort})
+            self.assertEqual(response.context['page_obj'].count, 2)
+        flush_search_logs()
+        self.assertEqual(list(SearchLog.objects.values_list('results_count', 'results_capped')), [(2, False)] * 2)
+
+    @override_settings(SEARCH_LOG_SAMPLE_RATE=0.5)
+    def test_sampled_searches_are_weighted(self):
+        with mock.patch('internships.search_trends.random.random', side_effect=[0.2, 0.7, 0.4]):
+            for _ in range(3):
+                log_search('golang')
+        flush_search_logs()
+        self.assertEqual(SearchLog.objects.count(), 2)
+        self.assertEqual(SearchTrendHourly.objects.get(query='golang').count, 4)
+        rebuild_search_trends()  # the rebuild weights the sampled rows the same way
+        self.assertEqual(SearchTrendHourly.objects.get(query='golang').count, 4)
+
+    def test_old_buckets_leave_the_window(self):
+        log_search('cobol')
+        flush_search_logs()
+        SearchTrendHourly.objects.update(hour=timezone.now() - timedelta(days=8))
+        log_search('rust')
+        flush_search_logs()
+        self.assertEqual([t['query'] for t in get_trending_searches()], ['rust'])
+
+    def test_rebuild_and_compact(self):
+        for query in ('Django', 'django ', 'Vue'):
+            SearchLog.objects.create(query=query, results_count=1)
+        SearchLog.objects.filter(query='Vue').update(created_at=timezone.now() - timedelta(days=40))
+        SearchTrendHourly.objects.all().delete()
+
+        self.assertEqual(rebuild_search_trends(), 2)
+        self.assertEqual(SearchTrendHourly.objects.get(query='django').count, 2)
+        call_command('compact_search_logs', days=30, stdout=StringIO())
+        self.assertEqual(SearchLog.objects.count(), 2)
+        self.assertEqual(SearchTrendHourly.objects.get(query='vue').count, 1)
+
+        out = StringIO()
+        call_command('compact_search_logs', '--rebuild', stdout=out)
+        self.assertIn('Rebuilt 1 hourly bucket(s)', out.getvalue())
+
+
+class SuggestionIndexTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.company = User.objects.create_user(username='acme', email='acme@example.com', password='pass', user_type='company')
+        CompanyProfile.objects.create(user=self.company, company_name='Acme Devices')
+        self.job = make_job(self.company, title='Backend Developer', location='Kathmandu', required_skills='Django, DevOps')
+        make_job(self.company, title='Frontend Developer', location='Lalitpur')
+
+    def test_word_prefixes_across_kinds(self):
+        suggestions = get_suggestions('dev')
+        self.assertEqual(suggestions['titles'], ['Backend Developer', 'Frontend Developer'])
+        self.assertEqual(suggestions['companies'], ['Acme Devices'])
+        self.assertEqual(suggestions['skills'][0], 'DevOps')  # used by an open posting
+        self.assertEqual(get_suggestions('kath')['locations'], ['Kathmandu'])
+        self.assertEqual(get_suggestions('end dev')['titles'], [])
+        with self.assertNumQueries(0):
+            get_suggestions('backend d')
+
+    def test_search_popularity_and_posting_changes(self):
+        SearchTrendHourly.objects.create(query='frontend developer', hour=timezone.now(), count=5)
+        cache.clear()
+        self.assertEqual(get_suggestions('developer')['titles'][0], 'Frontend Developer')
+
+        self.job.status = 'closed'
+        self.job.save()
+        with self.assertNumQueries(0):  # the rebuild is queued, not run by the request
+            self.assertIn('Backend Developer', get_suggestions('back')['titles'])
+        call_command('run_task_worker', '--once', stdout=StringIO())
+        self.assertNotIn('Backend Developer', get_suggestions('back')['titles'])
+        response = self.client.get(reverse('internships:search_suggestions_api'), {'q': 'front'})
+        self.assertEqual(response.json()['titles'], ['Frontend Developer'])
+
+    def test_old_table_queues_a_rebuild(self):
+        get_suggestions('dev')
+        call_command('run_task_worker', '--once', stdout=StringIO())
+        later = timezone.now().timestamp() + INDEX_MAX_AGE + 1
+        with mock.patch('internships.suggestions.time.time', return_value=later):
+            self.assertEqual(get_suggestions('kath')['locations'], ['Kathmandu'])
+        self.assertTrue(BackgroundTask.objects.filter(name='rebuild_suggestion_index', status='queued').exists())
+
+
+class FacetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.company = User.objects.create_user(username='acme', email='acme@example.com', password='pass', user_type='company')
+        self.web = JobCategory.objects.create(name='Web', slug='web')
+        self.data = JobCategory.objects.create(name='Data', slug='data')
+        self.django_job = make_job(self.company, category=self.web, required_skills='Python, Django', location='Kathmandu')
+        make_job(self.company, category=self.data, required_skills='Python, Pandas', location='Pokhara')
+        make_job(self.company, category=self.web, required_skills='React', location='Kathmandu')
+
+    def counts(self, **params):
+        request = RequestFactory().get('/internships/search/', params)
+        request.user = AnonymousUser()
+        result = search_jobs(request)
+        return facet_counts('job', result['facet_base'], result['filters'])
+
+    def test_counts_follow_the_other_filters(self):
+        facets = self.counts()
+        self.assertEqual(facets['skills'][0], ('Python', 2))
+        self.assertEqual(facets['locations'], [('Kathmandu', 2), ('Pokhara', 1)])
+
+        facets = self.counts(skills='Django', category='web')
+        # Skill counts ignore the skill filter, category counts ignore the category
+        self.assertEqual(dict(facets['skills']), {'Python': 1, 'Django': 1, 'React': 1})
+        self.assertEqual(facets['categories'], [('web', 1)])
+        self.assertEqual(facets['locations'], [('Kathmandu', 1)])
+
+    def test_incremental_sync(self):
+        self.counts()
+        with self.assertNumQueries(0):  # the plain listing is served from the kept totals
+            self.assertEqual(self.counts()['categories'], [('web', 2), ('data', 1)])
+        with self.assertNumQueries(3):  # otherwise one GROUP BY per facet
+            self.assertEqual(self.counts(q='', location='kath')['categories'], [('web', 2)])
+
+        new = make_job(self.company, category=self.data, required_skills='SQL', location='Lalitpur')
+        self.django_job.status = 'closed'
+        self.django_job.save()
+        with self.assertNumQueries(2):  # reloads just the two changed postings
+            postings = open_postings('job')
+        self.assertNotIn(self.django_job.pk, postings)
+        self.assertEqual(postings[new.pk], ('data', 'Lalitpur', frozenset({'sql'})))
+        facets = self.counts()
+        self.assertEqual(facets['categories'], [('data', 2), ('web', 1)])
+        self.assertNotIn('Django', dict(facets['skills']))
+
+    def test_advanced_search_shows_counts(self):
+        response = self.client.get(reverse('internships:advanced_search'), {'category': 'data'})
+        skills = {skill['name']: skill['count'] for skill in response.context['available_skills']}
+        self.assertEqual((skills['Pandas'], skills['React']), (1, 0))
+        self.assertEqual({c.slug: c.facet_count for c in response.context['categories']}, {'web': 2, 'data': 1})
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.company = User.objects.create_user(username='acme', email='acme@example.com', password='pass', user_type='company')
+        moment = timezone.now()
+        for i in range(7):
+            job = make_job(self.company, is_premium=i % 3 == 0, salary_max=None if i % 2 else 1000 * i)
+            # Ties on created_at are broken by id
+            Job.objects.filter(pk=job.pk).update(created_at=moment - timedelta(hours=i // 2))
+
+    def walk(self, queryset, keys, per_page=3):
+        pages, cursor = [], None
+        while True:
+            page = keyset_paginate(queryset, cursor, per_page, keys=keys)
+            pages.append([obj.pk for obj in page])
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        back = keyset_paginate(queryset, page.previous_cursor, per_page, keys=keys)
+        self.assertEqual([obj.pk for obj in back], pages[-2])
+        return pages
+
+    def test_pages_follow_the_ordering(self):
+        jobs = Job.objects.all()
+        expected = list(jobs.order_by('-is_premium', '-created_at', '-pk').values_list('pk', flat=True))
+        pages = self.walk(jobs, ('-is_premium', '-created_at', '-pk'))
+        self.assertEqual([len(p) for p in pages], [3, 3, 1])
+        self.assertEqual([pk for page in pages for pk in page], expected)
+
+    def test_deep_pages_cost_the_same(self):
+        first = keyset_paginate(Job.objects.all(), None, 2, with_count=True)
+        self.assertEqual((first.count, first.count_capped, first.has_previous()), (7, False, False))
+        with self.assertNumQueries(2):
+            keyset_paginate(Job.objects.all(), first.next_cursor, 2, with_count=True)
+        self.assertEqual(len(keyset_paginate(Job.objects.all(), 'not-a-cursor', 2)), 2)
+
+    def test_cursor_from_another_sort_starts_over(self):
+        jobs = Job.objects.all()
+        first = keyset_paginate(jobs, None, 2)
+        # Same number of keys, different sort: the cursor is not applied to it
+        other_keys = ('-is_premium', '-salary_max', '-pk')
+        page = keyset_paginate(jobs, first.next_cursor, 2, keys=other_keys)
+        self.assertEqual([job.pk for job in page], [job.pk for job in keyset_paginate(jobs, None, 2, keys=other_keys)])
+        self.assertFalse(page.has_previous())
+
+    def test_views_link_cursors(self):
+        response = self.client.get(reverse('internships:job_list'))
+        page = response.context['page_obj']
+        self.assertEqual((len(page), page.count), (7, 7))
+
+        response = self.client.get(reverse('internships:advanced_search'), {'sort': 'salary_high'})
+        page = response.context['page_obj']
+        # Premium first, postings without a salary last within each group
+        self.assertEqual([job.salary_max for job in page], [6000, 0, None, 4000, 2000, None, None])
+        self.assertFalse(page.has_other_pages())
+
+        for i in range(25):
+            Notification.objects.create(user=self.company, message=f'Note {i}')
+        self.client.force_login(self.company)
+        page = self.client.get(reverse('notifications:notification_list')).context['page_obj']
+        self.assertEqual((len(page), page.has_next()), (20, True))
+        page = self.client.get(reverse('notifications:notification_list'), {'cursor': page.next_cursor}).context['page_obj']
+        self.assertEqual([n.message for n in page], [f'Note {i}' for i in range(4, -1, -1)])
 
-# Create your tests here.
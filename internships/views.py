@@ -9,7 +9,7 @@ from django.views.decorators.http import require_POST
 from django.utils import timezone
 from datetime import timedelta
 from .models import (
-    Internship, Application, Job, JobApplication, JobBookmark, JobView,
+    Internship, Application, Job, JobApplication, JobBookmark,
     Interview, StatusChange, RejectionTag, AcceptanceTag, ApplicationRemark,
     AutoScreeningResult, CandidateFeedback, JobCategory, SavedSearch,
 )
@@ -20,9 +20,20 @@ from .forms import (
 from .emails import send_application_status_email, send_interview_scheduled_email
 from .search import (
     search_jobs, search_internships,
-    calculate_skill_match, get_auto_suggestions, get_trending_searches,
+    get_auto_suggestions, get_trending_searches,
     get_all_available_skills,
 )
+from .search_index import filter_by_keywords
+from .skills import (
+    badge_skill_ids, job_skill_ids, match_skill_ids, post_skill_ids,
+    skill_names, user_skill_ids,
+)
+from .recommendations import get_recommendations
+from .company_stats import get_company_stats, get_dashboard_rollup
+from .facets import facet_counts
+from .pagination import keyset_paginate, paginate_ids
+from .job_views import is_bot, job_view_stats, record_job_view
+from .tasks import notify_job_matches, screen_application, screen_job_applications
 from accounts.decorators import company_approved_required, user_required, company_required
 from notifications.services import (
     notify_application_status_change, notify_interview_scheduled,
@@ -31,9 +42,10 @@ from notifications.services import (
 
 
 def _build_query_string(request):
-    """Build query string from GET params excluding 'page'."""
+    """Build query string from GET params excluding 'page' and 'cursor'."""
     params = request.GET.copy()
     params.pop('page', None)
+    params.pop('cursor', None)
     return params.urlencode()
 
 
@@ -46,13 +58,7 @@ def internship_list(request):
     # Search
     query = request.GET.get('q', '')
     if query:
-        internships = internships.filter(
-            Q(title__icontains=query) |
-            Q(description__icontains=query) |
-            Q(required_skills__icontains=query) |
-            Q(location__icontains=query) |
-            Q(company__company_profile__company_name__icontains=query)
-        )
+        internships = filter_by_keywords(internships, 'internship', query)
     
     # Filter by type
     internship_type = request.GET.get('type', '')
@@ -73,10 +79,8 @@ def internship_list(request):
     elif date_posted == '30d':
         internships = internships.filter(created_at__gte=timezone.now() - timedelta(days=30))
     
-    # Pagination
-    paginator = Paginator(internships, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination on (is_premium, created_at, id)
+    page_obj = keyset_paginate(internships, request.GET.get('cursor'), 10, with_count=True)
     
     return render(request, 'internships/internship_list.html', {
         'page_obj': page_obj,
@@ -117,6 +121,7 @@ def create_internship(request):
             internship = form.save(commit=False)
             internship.company = request.user
             internship.save()
+            notify_job_matches.delay(post_id=internship.pk, post_type='internship')
             messages.success(request, 'Internship posted successfully!')
             return redirect('internships:my_internships')
     else:
@@ -200,10 +205,8 @@ def view_applications(request, pk):
     if status:
         applications = applications.filter(status=status)
     
-    # Pagination
-    paginator = Paginator(applications, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination, newest first
+    page_obj = keyset_paginate(applications, request.GET.get('cursor'), 10, keys=('-applied_at', '-pk'), with_count=True)
     
     return render(request, 'internships/view_applications.html', {
         'internship': internship,
@@ -332,12 +335,8 @@ def apply_internship(request, pk):
             application.internship = internship
             application.applicant = request.user
             application.save()
-            # Auto-screen on submission
-            try:
-                from .screening import auto_screen_application
-                auto_screen_application(application)
-            except Exception:
-                pass
+            # Auto-screen on submission, in the background
+            screen_application.delay(application_id=application.pk, post_type='internship')
             notify_new_application(application)
             messages.success(request, 'Application submitted successfully!')
             return redirect('internships:my_applications')
@@ -397,13 +396,7 @@ def job_list(request):
     # Search
     query = request.GET.get('q', '')
     if query:
-        jobs = jobs.filter(
-            Q(title__icontains=query) |
-            Q(description__icontains=query) |
-            Q(required_skills__icontains=query) |
-            Q(location__icontains=query) |
-            Q(company__company_profile__company_name__icontains=query)
-        )
+        jobs = filter_by_keywords(jobs, 'job', query)
     
     # Filter by job type
     job_type = request.GET.get('type', '')
@@ -449,10 +442,8 @@ def job_list(request):
         except ValueError:
             pass
     
-    # Pagination
-    paginator = Paginator(jobs, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination on (is_premium, created_at, id)
+    page_obj = keyset_paginate(jobs, request.GET.get('cursor'), 10, with_count=True)
     
     return render(request, 'internships/job_list.html', {
         'page_obj': page_obj,
@@ -513,6 +504,7 @@ def create_job(request):
             job = form.save(commit=False)
             job.company = request.user
             job.save()
+            notify_job_matches.delay(post_id=job.pk, post_type='job')
             messages.success(request, 'Job posted successfully!')
             return redirect('internships:my_jobs')
     else:
@@ -730,12 +722,8 @@ def apply_job(request, pk):
             application.job = job
             application.applicant = request.user
             application.save()
-            # Auto-screen on submission
-            try:
-                from .screening import auto_screen_application
-                auto_screen_application(application)
-            except Exception:
-                pass
+            # Auto-screen on submission, in the background
+            screen_application.delay(application_id=application.pk, post_type='job')
             notify_new_application(application)
             messages.success(request, 'Application submitted successfully!')
             return redirect('internships:my_job_applications')
@@ -814,18 +802,17 @@ def saved_jobs(request):
 # ==================== JOB VIEWS TRACKING ====================
 
 def track_job_view(request, job):
-    """Helper function to track job views"""
+    """Helper function to track job views (buffered, crawlers skipped)"""
+    if is_bot(request.META.get('HTTP_USER_AGENT', '')):
+        return
+
     ip_address = request.META.get('HTTP_X_FORWARDED_FOR', request.META.get('REMOTE_ADDR', ''))
     if ',' in ip_address:
         ip_address = ip_address.split(',')[0].strip()
     
-    viewer = request.user if request.user.is_authenticated else None
+    viewer_id = request.user.pk if request.user.is_authenticated else None
     
-    JobView.objects.create(
-        job=job,
-        viewer=viewer,
-        ip_address=ip_address[:45] if ip_address else None
-    )
+    record_job_view(job.pk, viewer_id, ip_address[:45] if ip_address else None)
 
 
 # ==================== JOB RECOMMENDATIONS ====================
@@ -833,13 +820,7 @@ def track_job_view(request, job):
 @user_required
 def recommended_jobs(request):
     """Get job recommendations based on user's skills"""
-    from accounts.models import UserProfile
-    
-    try:
-        profile = UserProfile.objects.get(user=request.user)
-        user_skills = [s.strip().lower() for s in profile.skills.split(',') if s.strip()]
-    except UserProfile.DoesNotExist:
-        user_skills = []
+    user_skills = user_skill_ids([request.user.pk])[request.user.pk]
     
     if not user_skills:
         messages.info(request, 'Add skills to your profile to get personalized job recommendations.')
@@ -848,26 +829,9 @@ def recommended_jobs(request):
             'user_skills': []
         })
     
-    jobs = Job.objects.filter(status='open')
-    
-    recommendations = []
-    for job in jobs:
-        job_skills = [s.strip().lower() for s in job.required_skills.split(',') if s.strip()]
-        matching_skills = set(user_skills) & set(job_skills)
-        
-        if matching_skills:
-            match_percentage = int((len(matching_skills) / len(job_skills)) * 100) if job_skills else 0
-            recommendations.append({
-                'job': job,
-                'matching_skills': list(matching_skills),
-                'match_percentage': match_percentage
-            })
-    
-    recommendations.sort(key=lambda x: x['match_percentage'], reverse=True)
-    
     return render(request, 'internships/recommended_jobs.html', {
-        'recommendations': recommendations[:20],
-        'user_skills': user_skills
+        'recommendations': get_recommendations(request.user, limit=20),
+        'user_skills': sorted(skill_names(user_skills).values())
     })
 
 
@@ -878,29 +842,17 @@ def job_analytics(request, pk):
     """View analytics for a specific job"""
     job = get_object_or_404(Job, pk=pk, company=request.user)
     
-    from django.db.models.functions import TruncDate
-    from django.utils import timezone
-    from datetime import timedelta
-    
-    views = JobView.objects.filter(job=job)
-    total_views = views.count()
-    unique_viewers = views.exclude(viewer=None).values('viewer').distinct().count()
-    
-    last_30_days = timezone.now() - timedelta(days=30)
-    daily_views = views.filter(viewed_at__gte=last_30_days)\
-        .annotate(date=TruncDate('viewed_at'))\
-        .values('date')\
-        .annotate(count=Count('id'))\
-        .order_by('date')
+    view_stats = job_view_stats(job, days=30)
     
     applications = job.job_applications.all()
     app_by_status = applications.values('status').annotate(count=Count('id'))
     
     return render(request, 'internships/job_analytics.html', {
         'job': job,
-        'total_views': total_views,
-        'unique_viewers': unique_viewers,
-        'daily_views': list(daily_views),
+        'total_views': view_stats['total_views'],
+        'unique_viewers': view_stats['unique_viewers'],
+        'unique_ips': view_stats['unique_ips'],
+        'daily_views': view_stats['daily_views'],
         'applications': applications,
         'app_by_status': {item['status']: item['count'] for item in app_by_status},
         'total_applications': applications.count(),
@@ -910,31 +862,17 @@ def job_analytics(request, pk):
 @company_required
 def company_dashboard_analytics(request):
     """Company-wide analytics dashboard"""
-    jobs = Job.objects.filter(company=request.user)
-    
-    total_jobs = jobs.count()
-    active_jobs = jobs.filter(status='open').count()
-    total_applications = JobApplication.objects.filter(job__company=request.user).count()
-    total_views = JobView.objects.filter(job__company=request.user).count()
-    
-    last_7_days = timezone.now() - timedelta(days=7)
-    recent_applications = JobApplication.objects.filter(
-        job__company=request.user,
-        applied_at__gte=last_7_days
-    ).count()
-    
-    top_jobs = jobs.annotate(
-        view_count=Count('views'),
-        app_count=Count('job_applications')
-    ).order_by('-view_count')[:5]
+    stats = get_company_stats(request.user)
+    rollup = get_dashboard_rollup(request.user)
     
     return render(request, 'internships/company_analytics.html', {
-        'total_jobs': total_jobs,
-        'active_jobs': active_jobs,
-        'total_applications': total_applications,
-        'total_views': total_views,
-        'recent_applications': recent_applications,
-        'top_jobs': top_jobs,
+        'total_jobs': stats.job_posts,
+        'active_jobs': stats.active_jobs,
+        'total_applications': stats.job_applications,
+        'total_views': stats.total_views,
+        'unique_viewers': stats.unique_viewers,
+        'recent_applications': rollup['recent_applications'],
+        'top_jobs': rollup['top_jobs'],
     })
 
 
@@ -1059,22 +997,17 @@ def ranked_applicants(request, pk):
     """View ranked applicants for a job based on ATS match score"""
     job = get_object_or_404(Job, pk=pk, company=request.user)
 
-    from assessments.models import VerifiedBadge
-
     applications = job.job_applications.select_related(
         'applicant__user_profile'
     ).all()
 
-    # Prefetch all badges for these applicants in one query
+    # Load all applicants' profile and badge skills in two queries
     applicant_ids = [app.applicant_id for app in applications]
-    all_badges = VerifiedBadge.objects.filter(
-        user_id__in=applicant_ids
-    ).values_list('user_id', 'skill_name')
-    badges_by_user = {}
-    for user_id, skill_name in all_badges:
-        badges_by_user.setdefault(user_id, set()).add(skill_name.lower())
+    skills_by_user = user_skill_ids(applicant_ids)
+    badges_by_user = badge_skill_ids(applicant_ids)
 
-    job_skills = set(s.strip().lower() for s in job.required_skills.split(',') if s.strip())
+    job_skills = job_skill_ids([job.pk])[job.pk]
+    names = skill_names(job_skills)
 
     ranked = []
     for app in applications:
@@ -1084,15 +1017,10 @@ def ranked_applicants(request, pk):
             profile = None
 
         # Skill match score (50% weight)
-        if profile and profile.skills:
-            user_skills = set(s.strip().lower() for s in profile.skills.split(',') if s.strip())
-            matching = job_skills & user_skills
-            missing = job_skills - user_skills
-            skill_match = (len(matching) / len(job_skills) * 100) if job_skills else 0
-        else:
-            matching = set()
-            missing = job_skills
-            skill_match = 0
+        user_skills = skills_by_user.get(app.applicant_id, set())
+        matching = {names[i] for i in job_skills & user_skills}
+        missing = {names[i] for i in job_skills - user_skills}
+        skill_match = (len(matching) / len(job_skills) * 100) if job_skills else 0
 
         # Experience score (20% weight)
         exp_map = {'fresher': 0, 'junior': 1, 'mid': 3, 'senior': 5, 'lead': 8}
@@ -1107,8 +1035,7 @@ def ranked_applicants(request, pk):
         profile_score = profile.completeness_score if profile else 0
 
         # Assessment score (20% weight) - check for verified badges
-        badge_skills_lower = badges_by_user.get(app.applicant_id, set())
-        verified_matching = job_skills & badge_skills_lower
+        verified_matching = job_skills & badges_by_user.get(app.applicant_id, set())
         assessment_score = (len(verified_matching) / len(job_skills) * 100) if job_skills else 0
 
         # Final score
@@ -1276,9 +1203,9 @@ def run_auto_screening(request, pk):
     job = get_object_or_404(Job, pk=pk, company=request.user)
     
     if request.method == 'POST':
-        from .screening import bulk_screen_applications
-        results = bulk_screen_applications(job)
-        messages.success(request, f'Auto-screening completed for {len(results)} applications.')
+        pending = job.job_applications.filter(status='pending').count()
+        screen_job_applications.delay(job_id=job.pk)
+        messages.success(request, f'Auto-screening started for {pending} applications. Scores will update shortly.')
     
     return redirect('internships:ranked_applicants', pk=pk)
 
@@ -1478,14 +1405,9 @@ def advanced_search(request):
     search_type = request.GET.get('search_type', 'jobs')
     
     # Get user skills for match percentage
-    user_skills = ''
+    user_skills = set()
     if request.user.is_authenticated and request.user.user_type == 'user':
-        try:
-            from accounts.models import UserProfile
-            profile = UserProfile.objects.get(user=request.user)
-            user_skills = profile.skills or ''
-        except Exception:
-            pass
+        user_skills = user_skill_ids([request.user.pk])[request.user.pk]
     
     if search_type == 'internships':
         result = search_internships(request)
@@ -1494,23 +1416,38 @@ def advanced_search(request):
         result = search_jobs(request)
         queryset = result['queryset']
     
-    # Pagination
-    paginator = Paginator(queryset, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Pagination: offsets into the BM25-ranked ids when sorting by relevance, otherwise keyset
+    ranked_ids = result.get('ranked_ids')
+    cursor = request.GET.get('cursor')
+    if ranked_ids is not None:
+        page_obj = paginate_ids(ranked_ids, cursor, 12)
+        posts = queryset.in_bulk(page_obj.object_list)
+        page_obj.object_list = [posts[pk] for pk in page_obj.object_list if pk in posts]
+    else:
+        page_obj = keyset_paginate(queryset, cursor, 12, keys=result['sort_keys'], with_count=result['count'] is None)
+    if result['count'] is not None:  # already counted (and logged) by the search
+        page_obj.count, page_obj.count_capped = result['count'], result['count_capped']
     
     # Attach skill match info to each result
+    if user_skills:
+        skills_by_post = post_skill_ids('internship' if search_type == 'internships' else 'job', [item.pk for item in page_obj])
+        names = skill_names(set().union(*skills_by_post.values()))
     results_with_match = []
     for item in page_obj:
-        match_info = calculate_skill_match(user_skills, item.required_skills) if user_skills else None
+        match_info = match_skill_ids(user_skills, skills_by_post[item.pk], names) if user_skills else None
         results_with_match.append({
             'item': item,
             'match_info': match_info,
         })
     
-    # Get filter options
-    categories = JobCategory.objects.filter(is_active=True)
-    available_skills = get_all_available_skills()
+    # Filter options with counts for the current search (see facets)
+    facets = facet_counts('internship' if search_type == 'internships' else 'job', result['facet_base'], result['filters'])
+    category_counts = dict(facets['categories'])
+    categories = list(JobCategory.objects.filter(is_active=True))
+    for cat in categories:
+        cat.facet_count = category_counts.get(cat.slug, 0)
+    skill_counts = dict(facets['skills'])
+    available_skills = [{'name': name, 'count': skill_counts.get(name, 0)} for name in get_all_available_skills()]
     trending = get_trending_searches(days=7, limit=8)
     
     # Saved searches for logged-in users
@@ -1527,6 +1464,7 @@ def advanced_search(request):
         'filters': result['filters'],
         'categories': categories,
         'available_skills': available_skills,
+        'location_facets': facets['locations'][:20],
         'trending_searches': trending,
         'saved_searches': saved_searches,
         'user_skills': user_skills,
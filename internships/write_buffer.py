@@ -0,0 +1,72 @@
+"""
+Per-process write-behind buffers for analytics events.
+
+Hot request paths (job views, search logs) append an event to a list in
+this process's memory, which costs no database or cache round trip. A
+daemon thread, started with the first event, hands the list to the
+buffer's write function every ``interval`` seconds, so the batch insert
+never runs on a request. A failed write keeps its events for the next
+tick, and whatever is still buffered when the process exits is written
+by an atexit hook; a process that is killed loses at most one interval
+of events, which the analytics they feed tolerate.
+"""
+
+import atexit
+import logging
+import threading
+import time
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBuffer:
+    def __init__(self, name, write, interval):
+        self.name = name
+        self.write = write
+        self.interval = interval
+        self._events = []
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    def __len__(self):
+        return len(self._events)
+
+    def add(self, event):
+        with self._lock:
+            self._events.append(event)
+            if self._flusher is None:
+                self.start_flusher()
+
+    def start_flusher(self):
+        self._flusher = threading.Thread(target=self._flush_periodically, name=f'{self.name} flusher', daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
+
+    def clear(self):
+        with self._lock:
+            self._events = []
+
+    def flush(self):
+        """Write the buffered events now. Returns what the write function returned, 0 if nothing was buffered."""
+        with self._lock:
+            events, self._events = self._events, []
+        if not events:
+            return 0
+        try:
+            return self.write(events)
+        except Exception:
+            with self._lock:
+                self._events[:0] = events
+            raise
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception(f'Writing buffered {self.name} failed; retrying in {self.interval} s')
+            finally:
+                connections.close_all()  # this thread's connections; do not hold one between ticks
@@ -5,7 +5,7 @@ from .models import Notification
 
 def notify_application_status_change(application, new_status):
     """Notify applicant when their application status changes."""
-    from internships.models import JobApplication, Application
+    from internships.models import Application, JobApplication
 
     status_display = dict(application.STATUS_CHOICES).get(new_status, new_status)
 
@@ -91,9 +91,58 @@ def notify_job_match(user, job):
     )
 
 
+def notify_job_matches(post, user_ids, daily_cap=None):
+    """
+    Notify many users at once that a new job or internship matches their
+    skills, skipping users who already got daily_cap match notifications
+    in the last 24 hours. Returns the number of notifications created.
+    """
+    from datetime import timedelta
+
+    from django.core.cache import cache
+    from django.db.models import Count
+    from django.utils import timezone
+
+    from internships.models import Job
+
+    user_ids = set(user_ids)
+    if daily_cap is not None and user_ids:
+        recent = (
+            Notification.objects.filter(
+                user_id__in=user_ids, notification_type='job_match',
+                created_at__gte=timezone.now() - timedelta(days=1),
+            )
+            .values_list('user_id').annotate(count=Count('pk')).filter(count__gte=daily_cap)
+        )
+        user_ids -= {user_id for user_id, _count in recent}
+    if not user_ids:
+        return 0
+
+    if isinstance(post, Job):
+        message = f'New job matching your skills: "{post.title}"'
+        related_url = reverse('internships:job_detail', args=[post.pk])
+    else:
+        message = f'New internship matching your skills: "{post.title}"'
+        related_url = reverse('internships:internship_detail', args=[post.pk])
+
+    Notification.objects.bulk_create([
+        Notification(
+            user_id=user_id,
+            message=message,
+            notification_type='job_match',
+            related_object_id=post.pk,
+            related_url=related_url,
+        )
+        for user_id in sorted(user_ids)
+    ], batch_size=500)
+    # bulk_create skips Notification.save(), which clears the unread badge cache
+    cache.delete_many([f'unread_notif:{user_id}' for user_id in user_ids])
+    return len(user_ids)
+
+
 def notify_new_application(application):
     """Notify company when someone applies to their job/internship."""
-    from internships.models import JobApplication, Application
+    from internships.models import Application, JobApplication
 
     if isinstance(application, JobApplication):
         job = application.job
@@ -1,9 +1,10 @@
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, render
 from django.views.decorators.http import require_POST
 
+from internships.pagination import keyset_paginate
+
 from .models import Notification
 
 
@@ -18,9 +19,7 @@ def notification_list(request):
     # Mark all unread as read
     notifications.filter(is_read=False).update(is_read=True)
 
-    paginator = Paginator(notifications, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = keyset_paginate(notifications, request.GET.get('cursor'), 20, keys=('-created_at', '-pk'))
 
     return render(request, 'notifications/notification_list.html', {
         'page_obj': page_obj,
@@ -165,6 +165,17 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'  # For developm
 # EMAIL_HOST_USER = 'apikey'
 # EMAIL_HOST_PASSWORD = SENDGRID_API_KEY
 
+# Outgoing mail is spooled to the OutboundEmail table and delivered by run_task_worker
+EMAIL_OUTBOX_BATCH_SIZE = 100  # messages sent per SMTP connection
+EMAIL_OUTBOX_RATE_PER_SECOND = 20  # delivery rate cap
+
+# New-posting match notifications
+JOB_MATCH_MIN_PERCENTAGE = 50  # share of the posting's skills a user must have
+JOB_MATCH_NOTIFICATIONS_PER_DAY = 5  # per-user cap
+
+# Searches are buffered in process memory and batch-inserted into SearchLog every minute
+SEARCH_LOG_SAMPLE_RATE = 1.0  # share of searches logged; lower it under heavy traffic
+
 
 # ==================== CACHING ====================
 CACHES = {
@@ -172,17 +183,31 @@ CACHES = {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+# Several processes only see each other's invalidations through a shared
+# in-memory cache such as Redis:
+# CACHES = {
+#     'default': {
+#         'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+#         'LOCATION': 'redis://127.0.0.1:6379',
+#     }
+# }
 
 # ==================== DJANGO CHANNELS ====================
 ASGI_APPLICATION = 'remotely_internship.asgi.application'
 
-# Channel layer - InMemory for development
+# Channel layer - database-backed (chat/layers.py), so several ASGI worker
+# processes on one host share rooms without an external service
 CHANNEL_LAYERS = {
     'default': {
-        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        'BACKEND': 'chat.layers.DatabaseChannelLayer',
+        'CONFIG': {
+            'poll_interval': 0.05,     # seconds between checks for messages from other workers
+            'batch_interval': 0.005,   # sends collected into one write
+            'capacity': 100,           # messages queued per socket before sends are dropped
+        },
     }
 }
-# For production, use Redis:
+# Across several hosts, use Redis:
 # CHANNEL_LAYERS = {
 #     'default': {
 #         'BACKEND': 'channels_redis.core.RedisChannelLayer',
@@ -192,6 +217,10 @@ CHANNEL_LAYERS = {
 #     }
 # }
 
+# Websocket chat messages are broadcast at once and batch-inserted by a write-behind buffer
+CHAT_MESSAGE_FLUSH_MS = 250  # how long a message may wait in the buffer before its batch is written
+CHAT_LONG_POLL_SECONDS = 25  # how long the fallback endpoint holds a request open on an idle room
+
 
 # ==================== DJANGO ALLAUTH ====================
 AUTHENTICATION_BACKENDS = [